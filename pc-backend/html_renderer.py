@@ -0,0 +1,84 @@
+"""
+HTML to PDF Renderer Workers
+Runs inside the renderer process pool started by main.py. Each worker imports
+WeasyPrint and loads the fontconfig cache once, then keeps compiled stylesheets
+between requests, so a render only pays for layout.
+
+This module must stay light: spawned workers import it, not main.py.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+STYLESHEET_CACHE_SIZE = 64
+
+weasyprint = None
+font_config = None
+stylesheet_cache = OrderedDict()  # sha256 of the CSS text -> compiled weasyprint.CSS
+
+
+def init_worker(pid_queue=None):
+    """Import WeasyPrint and warm fontconfig before the first job arrives
+
+    The worker's PID goes on pid_queue first, so main.py can terminate a
+    worker stuck in a render without reaching into the executor.
+    """
+    global weasyprint, font_config
+    if pid_queue is not None:
+        pid_queue.put(os.getpid())
+    import weasyprint as weasyprint_module
+    from weasyprint.text.fonts import FontConfiguration
+
+    weasyprint = weasyprint_module
+    font_config = FontConfiguration()
+    # Laying out text loads the fontconfig cache and the default fonts
+    weasyprint.HTML(string="<p>warm-up</p>").write_pdf(font_config=font_config)
+
+
+def warm_up():
+    """No-op job; raises if the worker could not import WeasyPrint"""
+    return weasyprint.__version__
+
+
+def compiled_stylesheet(css):
+    """Parse css once per worker, keyed by its hash, with LRU eviction"""
+    key = hashlib.sha256(css.encode("utf-8")).hexdigest()
+    stylesheet = stylesheet_cache.get(key)
+    if stylesheet is None:
+        stylesheet = weasyprint.CSS(string=css, font_config=font_config)
+        stylesheet_cache[key] = stylesheet
+        if len(stylesheet_cache) > STYLESHEET_CACHE_SIZE:
+            stylesheet_cache.popitem(last=False)
+    else:
+        stylesheet_cache.move_to_end(key)
+    return stylesheet
+
+
+def render_html(html, stylesheets):
+    """Render one HTML document to PDF bytes; returns (pdf, render seconds)"""
+    start = time.perf_counter()
+    compiled = [compiled_stylesheet(css) for css in stylesheets]
+    pdf = weasyprint.HTML(string=html).write_pdf(stylesheets=compiled, font_config=font_config)
+    return pdf, time.perf_counter() - start
+
+
+def render_html_batch(documents, stylesheets, merge=False):
+    """Render many HTML documents with one set of compiled stylesheets
+
+    Returns a list of PDFs, or a single PDF with every document's pages in
+    order when merge is set, plus the render seconds.
+    """
+    start = time.perf_counter()
+    compiled = [compiled_stylesheet(css) for css in stylesheets]
+    rendered = [
+        weasyprint.HTML(string=html).render(stylesheets=compiled, font_config=font_config)
+        for html in documents
+    ]
+    if merge:
+        pages = [page for document in rendered for page in document.pages]
+        pdfs = [rendered[0].copy(pages).write_pdf()]
+    else:
+        pdfs = [document.write_pdf() for document in rendered]
+    return pdfs, time.perf_counter() - start
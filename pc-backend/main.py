@@ -1,6 +1,6 @@
 ﻿from fastapi import FastAPI, File, UploadFile, HTTPException, Form, BackgroundTasks, Depends, status, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse, RedirectResponse
+from fastapi.responses import FileResponse, StreamingResponse, RedirectResponse, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Union
@@ -8,9 +8,16 @@ import os
 import io
 import tempfile
 import shutil
+import signal
+import subprocess
 from pathlib import Path
 import uuid
+import secrets
 import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import time
 from datetime import datetime, timedelta
 import httpx
 from jose import JWTError, jwt
@@ -34,12 +41,13 @@ from reportlab.lib.pagesizes import letter
 import fitz  # PyMuPDF
 from pdf2docx import Converter
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 
 # Image processing
-from PIL import Image, ImageEnhance, ImageFilter, ImageDraw, ImageFont
+from PIL import Image, ImageEnhance, ImageFilter, ImageDraw, ImageFont, ImageChops, ImageOps, ImageStat
 import cv2
 import numpy as np
 from rembg import remove
@@ -49,10 +57,21 @@ import pytesseract
 
 # Utilities
 import zipfile
+import csv
+import html_renderer
+import pdf_workers
+import pii_scanner
 import json
 import re
 from io import BytesIO
 import base64
+import contextvars
+import hashlib
+import html as html_lib
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
 
 # Helper functions for page numbering
 def convert_to_roman(num):
@@ -180,6 +199,7 @@ users_collection = db["users"]
 conversions_collection = db["conversions"]
 files_collection = db["files"]
 sessions_collection = db["sessions"]
+job_costs_collection = db["job_costs"]  # measured vs. predicted cost of every routed job, for calibration
 
 # CORS middleware
 app.add_middleware(
@@ -188,8 +208,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "Server-Timing", "X-Redacted-Items", "X-Redacted-Pages", "X-Encryption", "X-Queue-Depth", "X-Table-Count",
+        "X-Document-Id", "X-Page-Count", "X-Element-Count", "X-Save-Mode", "X-Bytes-Written",
+        "X-Compression-Format", "X-Compression-Quality", "X-Compression-Ratio", "X-Compression-SSIM", "X-Compression-Target-Met"
+    ],
 )
 
+# Per-request cost record: when the request started, seconds spent queued, CPU
+# and wall seconds of its process-pool jobs, read back by log_operation and
+# route_job to build timing history
+request_costs = contextvars.ContextVar("request_costs", default=None)
+
+class RequestCostMiddleware:
+    """Start a cost record for every HTTP request (plain ASGI, no body buffering)"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            request_costs.set({"start": time.perf_counter(), "queued": 0.0, "jobs_running": 0, "worker_cpu": 0.0, "worker_wall": 0.0})
+        await self.app(scope, receive, send)
+
+app.add_middleware(RequestCostMiddleware)
+
 # Authentication configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")  # Change this in production
 ALGORITHM = "HS256"
@@ -355,6 +397,74 @@ def cleanup_file(file_path: str):
     except Exception:
         pass
 
+def format_server_timing(timings):
+    """Format (name, seconds) pairs as a Server-Timing header value"""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings)
+
+def parse_page_selection(page_count, pages=None, start=None, end=None):
+    """0-based page indexes from 1-based "1,3,5-7" pages or a start/end range
+
+    pages wins over start/end; with neither, every page is selected.
+    """
+    if pages:
+        indexes = []
+        try:
+            for part in pages.split(","):
+                first, _, last = part.strip().partition("-")
+                indexes.extend(range(int(first), int(last or first) + 1))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid pages: {pages}")
+    else:
+        indexes = range(start or 1, (end or page_count) + 1)
+    if not indexes or min(indexes) < 1 or max(indexes) > page_count:
+        raise HTTPException(status_code=400, detail=f"Pages must be between 1 and {page_count}")
+    return sorted({index - 1 for index in indexes})
+
+def split_pages(page_indexes, max_jobs, min_pages_per_job):
+    """Split page indexes into at most max_jobs contiguous runs of at least min_pages_per_job"""
+    jobs = max(1, min(max_jobs, len(page_indexes) // min_pages_per_job))
+    size = -(-len(page_indexes) // jobs)
+    return [page_indexes[index:index + size] for index in range(0, len(page_indexes), size)]
+
+# Process pool for CPU-bound PDF page work (see pdf_workers.py)
+# spawn, not fork: a forked copy of this process (rembg, Mongo client) can hang
+PDF_WORKER_PROCESSES = int(os.getenv("PDF_WORKER_PROCESSES", str(os.cpu_count() or 2)))
+
+def make_pdf_process_executor():
+    return ProcessPoolExecutor(max_workers=PDF_WORKER_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+
+pdf_process_executor = make_pdf_process_executor()
+
+async def run_pdf_job(func, *args):
+    """Run a pdf_workers job in the process pool
+
+    A worker that dies (e.g. MuPDF crashing on a malformed file) breaks the
+    whole pool, so it is replaced before the error is raised. The worker's CPU
+    time, and the wall time while any of the request's jobs ran, go into the
+    request's cost record.
+    """
+    global pdf_process_executor
+    executor = pdf_process_executor
+    cost = request_costs.get()
+    if cost is not None:
+        if not cost["jobs_running"]:
+            cost["jobs_since"] = time.perf_counter()
+        cost["jobs_running"] += 1
+    try:
+        result, cpu_seconds = await asyncio.wrap_future(executor.submit(pdf_workers.timed_job, func, *args))
+    except BrokenProcessPool:
+        if pdf_process_executor is executor:
+            pdf_process_executor = make_pdf_process_executor()
+        raise
+    finally:
+        if cost is not None:
+            cost["jobs_running"] -= 1
+            if not cost["jobs_running"]:
+                cost["worker_wall"] += time.perf_counter() - cost["jobs_since"]
+    if cost is not None:
+        cost["worker_cpu"] += cpu_seconds
+    return result
+
 async def log_operation(user_id: str, operation: str, filename: str, 
                        input_format: str, output_format: str, 
                        file_size: int, success: bool = True):
@@ -370,10 +480,20 @@ async def log_operation(user_id: str, operation: str, filename: str,
             "success": success,
             "timestamp": datetime.now()
         }
+        cost = request_costs.get()
+        if cost is not None:
+            conversion_log.update(request_cost_seconds(cost))
         await log_conversion(conversion_log)
     except Exception as e:
         print(f"Failed to log operation: {e}")
 
+def request_cost_seconds(cost):
+    """Processing time and CPU-seconds of the request so far, from its cost record"""
+    processing_time = time.perf_counter() - cost["start"] - cost["queued"]
+    # Pool jobs report their CPU time; the rest of the request counts as one busy core
+    cpu_seconds = max(0.0, processing_time - cost["worker_wall"]) + cost["worker_cpu"]
+    return {"processing_time": round(processing_time, 3), "cpu_seconds": round(cpu_seconds, 3)}
+
 # Health check and database connection test
 
 
@@ -558,11 +678,470 @@ async def get_user_conversions_list(current_user = Depends(get_current_user_opti
     conversions = await get_user_conversions(current_user.id, limit)
     return {"conversions": conversions}
 
+# PDF page operation helpers (shared by the single-step endpoints and /api/pdf/pipeline)
+
+# Named colors accepted by the watermark and page number settings
+PDF_COLOR_MAP = {
+    'red': (1, 0, 0),
+    'blue': (0, 0, 1),
+    'green': (0, 1, 0),
+    'black': (0, 0, 0),
+    'gray': (0.5, 0.5, 0.5),
+    'grey': (0.5, 0.5, 0.5)
+}
+
+# Save options used by /api/pdf/compress and the compress pipeline step
+PDF_COMPRESS_SAVE_OPTIONS = {"garbage": 4, "deflate": True, "clean": True}
+
+def rotate_pdf_pages(pdf_document, rotation):
+    """Rotate every page clockwise by the given multiple of 90 degrees"""
+    if rotation % 90 != 0:
+        raise ValueError("Rotation must be a multiple of 90 degrees")
+
+    for page in pdf_document:
+        page.set_rotation((page.rotation + rotation) % 360)
+
+def crop_pdf_pages(pdf_document, settings):
+    """Shrink each page's crop box by the margins (in mm) given in the settings"""
+    margins = settings.get('margins', {'top': 0, 'right': 0, 'bottom': 0, 'left': 0})
+
+    for page in pdf_document:
+        # Margins are given as seen on screen, so crop the visible rectangle
+        rect = page.rect
+        visible_crop = fitz.Rect(
+            rect.x0 + margins.get('left', 0) * 2.834,  # mm to points
+            rect.y0 + margins.get('top', 0) * 2.834,
+            rect.x1 - margins.get('right', 0) * 2.834,
+            rect.y1 - margins.get('bottom', 0) * 2.834
+        )
+
+        # The crop box is set in unrotated coordinates relative to the media box
+        crop_rect = visible_crop * page.derotation_matrix
+        cropbox = page.cropbox
+        page.set_cropbox(fitz.Rect(
+            crop_rect.x0 + cropbox.x0,
+            crop_rect.y0 + cropbox.y0,
+            crop_rect.x1 + cropbox.x0,
+            crop_rect.y1 + cropbox.y0
+        ))
+
+def watermark_pdf_pages(pdf_document, settings):
+    """Insert a text watermark on every page"""
+    watermark_text = settings.get('text', 'WATERMARK')
+    position = settings.get('position', 'center')
+    font_size = settings.get('fontSize', 50)
+    color = settings.get('color', 'gray')
+    rotation = settings.get('rotation', 0)  # Make rotation configurable
+
+    # Convert color name to RGB
+    rgb_color = PDF_COLOR_MAP.get(color.lower(), (0.5, 0.5, 0.5))
+
+    for page in pdf_document:
+        # Get page dimensions
+        rect = page.rect
+
+        # Calculate position
+        if position == 'center':
+            x = rect.width / 2
+            y = rect.height / 2
+        elif position == 'top-left':
+            x = 50
+            y = 50
+        elif position == 'top-right':
+            x = rect.width - 200
+            y = 50
+        elif position == 'bottom-left':
+            x = 50
+            y = rect.height - 50
+        elif position == 'bottom-right':
+            x = rect.width - 200
+            y = rect.height - 50
+        else:
+            x = rect.width / 2
+            y = rect.height / 2
+
+        # Add watermark text
+        point = fitz.Point(x, y)
+
+        # Insert text with configurable rotation
+        try:
+            page.insert_text(
+                point,
+                watermark_text,
+                fontsize=font_size,
+                color=rgb_color,
+                rotate=rotation,  # Use configurable rotation
+                overlay=True
+            )
+        except Exception as text_error:
+            # If rotation fails, try without rotation
+            try:
+                page.insert_text(
+                    point,
+                    watermark_text,
+                    fontsize=font_size,
+                    color=rgb_color,
+                    overlay=True
+                )
+            except Exception as fallback_error:
+                raise HTTPException(status_code=500, detail=f"Text insertion failed: {str(fallback_error)}")
+
+def number_pdf_pages(pdf_document, settings):
+    """Insert a formatted page number on every page"""
+    position = settings.get('position', 'bottom-center')
+    font_size = settings.get('fontSize', 12)
+    color = settings.get('color', 'black')
+    start_number = settings.get('startPage', 1)
+    format_type = settings.get('format', 'number')
+
+    # Convert color name to RGB
+    rgb_color = PDF_COLOR_MAP.get(color.lower(), (0, 0, 0))
+
+    for page_num, page in enumerate(pdf_document):
+        # Get page dimensions
+        rect = page.rect
+
+        # Calculate position for page number
+        # PyMuPDF uses a coordinate system where (0,0) is at the top-left
+        # and y increases downward
+        if position == 'top-center':
+            x = rect.width / 2
+            y = 30
+        elif position == 'top-left':
+            x = 50
+            y = 30
+        elif position == 'top-right':
+            x = rect.width - 50
+            y = 30
+        elif position == 'bottom-center':
+            x = rect.width / 2
+            y = rect.height - 30
+        elif position == 'bottom-left':
+            x = 50
+            y = rect.height - 30
+        elif position == 'bottom-right':
+            x = rect.width - 50
+            y = rect.height - 30
+        else:
+            x = rect.width / 2
+            y = rect.height - 30
+
+        # Format page number text based on format type
+        page_number = start_number + page_num
+
+        if format_type == 'number':
+            page_text = str(page_number)
+        elif format_type == 'roman':
+            page_text = convert_to_roman(page_number).lower()
+        elif format_type == 'roman-upper':
+            page_text = convert_to_roman(page_number).upper()
+        elif format_type == 'letter':
+            page_text = convert_to_letter(page_number).lower()
+        elif format_type == 'letter-upper':
+            page_text = convert_to_letter(page_number).upper()
+        else:
+            page_text = str(page_number)
+
+        # Insert page number with error handling
+        try:
+            point = fitz.Point(x, y)
+            page.insert_text(
+                point,
+                page_text,
+                fontsize=font_size,
+                color=rgb_color,
+                overlay=True
+            )
+        except Exception as text_error:
+            # If text insertion fails, try with default settings
+            try:
+                point = fitz.Point(x, y)
+                page.insert_text(
+                    point,
+                    page_text,
+                    fontsize=12,
+                    color=(0, 0, 0),
+                    overlay=True
+                )
+            except Exception as fallback_error:
+                raise HTTPException(status_code=500, detail=f"Page number insertion failed: {str(fallback_error)}")
+
+# Saving edits: small edits to large files are appended as an incremental update
+INCREMENTAL_SAVE_MIN_BYTES = int(os.getenv("INCREMENTAL_SAVE_MIN_BYTES", str(4 * 1024 * 1024)))  # smaller files are rewritten compactly
+INCREMENTAL_SAVE_MAX_RATIO = 0.5  # an update estimated bigger than this share of the file is rewritten in full instead
+INCREMENTAL_OBJECT_OVERHEAD = 40  # object header, stream keywords and xref entry per written object
+
+def incremental_update_size(pdf_document, source):
+    """Bytes an incremental save would append, estimated without writing
+
+    Counts the new objects, plus page objects (and their indirect /Resources)
+    that differ from the file on disk, which is what page edits change.
+    """
+    with fitz.open(source) as original:
+        original_xrefs = original.xref_length()
+        size = 0
+        for xref in range(original_xrefs, pdf_document.xref_length()):
+            stream = pdf_document.xref_stream_raw(xref) or b""
+            size += len(pdf_document.xref_object(xref)) + len(stream) + INCREMENTAL_OBJECT_OVERHEAD
+        checked = set()
+        for page in pdf_document:
+            xrefs = [page.xref]
+            kind, value = pdf_document.xref_get_key(page.xref, "Resources")
+            if kind == "xref":
+                xrefs.append(int(value.split()[0]))
+            for xref in xrefs:
+                if xref in checked or xref >= original_xrefs:
+                    continue
+                checked.add(xref)
+                edited = pdf_document.xref_object(xref)
+                if edited != original.xref_object(xref):
+                    size += len(edited) + INCREMENTAL_OBJECT_OVERHEAD
+    return size
+
+def save_pdf_edit(pdf_document, source, target):
+    """Save a document opened from source; returns (output path, save mode, bytes written)
+
+    Large files get the changed and new objects appended to source in place,
+    leaving the original bytes untouched. Small files, files MuPDF had to
+    repair and edits estimated to rewrite most of the file (a watermark on
+    every page of a text-only document) are saved in full to target, so the
+    file is only ever written once.
+    """
+    original_size = os.path.getsize(source)
+    if (original_size >= INCREMENTAL_SAVE_MIN_BYTES and pdf_document.can_save_incrementally()
+            and incremental_update_size(pdf_document, source) <= original_size * INCREMENTAL_SAVE_MAX_RATIO):
+        pdf_document.save(source, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+        return source, "incremental", os.path.getsize(source) - original_size
+    pdf_document.save(target)
+    return target, "full", os.path.getsize(target)
+
+def edit_pdf_file(source, target, edit, *args):
+    """Open source, apply edit(pdf_document, *args) and save it with save_pdf_edit (blocking)
+
+    Returns (output path, save mode, bytes written, save seconds).
+    """
+    with fitz.open(source) as pdf_document:
+        edit(pdf_document, *args)
+        save_start = time.perf_counter()
+        output_path, save_mode, bytes_written = save_pdf_edit(pdf_document, source, target)
+        return output_path, save_mode, bytes_written, time.perf_counter() - save_start
+
+# Job cost estimation and routing
+# CPU-seconds and peak memory are predicted from preflight features with a
+# per-operation profile, then scaled by how far the profile was off for that
+# operation's recent runs in job_costs_collection (their cpu_seconds, which
+# counts every pool worker a job fans out to; recorded for every routed job,
+# signed in or not). Slow jobs wait for one of a few heavy slots so they cannot
+# starve interactive requests, and jobs over budget are refused before any
+# work starts.
+JOB_INTERACTIVE_SECONDS = float(os.getenv("JOB_INTERACTIVE_SECONDS", "2"))  # slower jobs take a heavy slot
+JOB_HEAVY_SLOTS = int(os.getenv("JOB_HEAVY_SLOTS", str(max(1, (os.cpu_count() or 2) // 2))))
+JOB_MAX_CPU_SECONDS = float(os.getenv("JOB_MAX_CPU_SECONDS", "600"))
+JOB_MAX_MEMORY_MB = float(os.getenv("JOB_MAX_MEMORY_MB", "3072"))
+JOB_COST_HISTORY = 200  # recent runs per operation used for calibration
+JOB_COST_MIN_SAMPLES = 10
+JOB_COST_CALIBRATION_TTL = 300
+JOB_COST_FACTOR_RANGE = (0.25, 8.0)
+
+# Seconds = base + page * pages + image_mp * embedded image megapixels
+#         + render_mp * megapixels rasterized at render_dpi ("render": which pages)
+# Memory MB = base_mb + input_copies * input size + page_mb * pages
+#           + image_mb * image megapixels + render_mb * largest rendered page megapixels
+JOB_COST_DEFAULTS = {
+    "base": 0.05, "page": 0.005, "image_mp": 0.0, "render": None, "render_dpi": 150, "render_mp": 0.0,
+    "base_mb": 60, "input_copies": 2, "page_mb": 0.02, "image_mb": 0.0, "render_mb": 0.0,
+}
+JOB_COST_PROFILES = {
+    "pdf_ocr": {"base": 0.3, "page": 0.01, "render": "untexted", "render_dpi": 144, "render_mp": 0.8, "render_mb": 12},
+    "pdf_to_word": {"base": 0.5, "page": 0.25, "image_mp": 0.05, "base_mb": 120, "page_mb": 1.5, "image_mb": 4},
+    "pdf_to_excel": {"base": 0.2, "page": 0.08, "base_mb": 80, "page_mb": 0.3},
+    "pdf_to_ppt": {"base": 0.3, "page": 0.02, "image_mp": 0.03, "base_mb": 80, "page_mb": 0.2, "image_mb": 4},
+    "pdf_to_html": {"base": 0.1, "page": 0.02, "image_mp": 0.02, "page_mb": 0.2, "image_mb": 1.5},
+    "pdf_to_images": {"base": 0.1, "render": "all", "render_mp": 0.06, "render_mb": 8},
+    "pdf_compress": {"base": 0.1, "page": 0.01, "image_mp": 0.08, "image_mb": 4},
+    "pdf_redact": {"base": 0.1, "page": 0.01, "image_mp": 0.02, "image_mb": 4},
+}
+
+heavy_job_slots = asyncio.Semaphore(JOB_HEAVY_SLOTS)
+heavy_job_stats = {"waiting": 0, "running": 0, "rejected": 0}
+job_cost_calibration = {}  # operation -> {"factor", "samples", "updated"}
+job_cost_refresh_tasks = {}  # operation -> calibration query in flight
+job_cost_record_tasks = set()  # background sample writes, referenced until they finish
+
+async def refresh_job_calibration(operation):
+    """Median actual/predicted CPU-seconds over the operation's recent runs"""
+    entry = dict(job_cost_calibration.get(operation) or {"factor": 1.0, "samples": 0})
+    try:
+        runs = await job_costs_collection.find(
+            {"operation": operation, "success": True, "model_seconds": {"$gt": 0}, "cpu_seconds": {"$gt": 0}},
+            {"cpu_seconds": 1, "model_seconds": 1}
+        ).sort("timestamp", -1).limit(JOB_COST_HISTORY).to_list(length=JOB_COST_HISTORY)
+        if len(runs) >= JOB_COST_MIN_SAMPLES:
+            ratios = sorted(run["cpu_seconds"] / run["model_seconds"] for run in runs)
+            low, high = JOB_COST_FACTOR_RANGE
+            entry = {"factor": min(high, max(low, ratios[len(ratios) // 2])), "samples": len(ratios)}
+    except Exception as e:
+        print(f"⚠️ Job cost calibration failed for {operation}: {e}")
+    entry["updated"] = time.time()
+    job_cost_calibration[operation] = entry
+
+def job_calibration(operation):
+    """Cached calibration for an operation; a stale one is refreshed in the background"""
+    entry = job_cost_calibration.get(operation)
+    stale = entry is None or time.time() - entry["updated"] > JOB_COST_CALIBRATION_TTL
+    if stale and operation not in job_cost_refresh_tasks:
+        task = asyncio.create_task(refresh_job_calibration(operation))
+        job_cost_refresh_tasks[operation] = task
+        task.add_done_callback(lambda _: job_cost_refresh_tasks.pop(operation, None))
+    return entry or {"factor": 1.0, "samples": 0}
+
+async def store_job_cost(sample):
+    try:
+        await job_costs_collection.insert_one(sample)
+    except Exception as e:
+        print(f"Failed to record job cost: {e}")
+
+def record_job_cost(estimate, success):
+    """Store the request's measured CPU-seconds next to its estimate for calibration
+
+    Written in the background so a slow or unreachable database never holds
+    up the response.
+    """
+    cost = request_costs.get()
+    if cost is None:
+        return
+    sample = {
+        "operation": estimate["operation"],
+        "success": success,
+        "model_seconds": estimate["model_seconds"],
+        "timestamp": datetime.now(),
+        **request_cost_seconds(cost)
+    }
+    task = asyncio.create_task(store_job_cost(sample))
+    job_cost_record_tasks.add(task)
+    task.add_done_callback(job_cost_record_tasks.discard)
+
+def option_number(options, name, default):
+    """Numeric request option, or default when missing or malformed"""
+    try:
+        return float(options.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+async def estimate_job_cost(operation, content, options=None):
+    """Predicted CPU-seconds, peak memory and pool for running operation on a PDF"""
+    if operation not in JOB_COST_PROFILES:
+        raise HTTPException(status_code=400, detail=f"No cost profile for '{operation}'. Available: {', '.join(sorted(JOB_COST_PROFILES))}")
+    profile = {**JOB_COST_DEFAULTS, **JOB_COST_PROFILES[operation]}
+    options = options or {}
+    report, _ = await preflight_pdf(content)
+    pages = report["pages"]
+
+    render = profile["render"]
+    if render == "untexted" and options.get("ocr_mode") == "force":
+        render = "all"
+    rendered = [page for page in pages if render == "all" or (render == "untexted" and not page["has_text"])]
+    dpi = option_number(options, "dpi", profile["render_dpi"])
+    render_megapixels = [page["width"] * page["height"] * (dpi / 72) ** 2 / 1e6 for page in rendered]
+
+    model_seconds = (profile["base"] + profile["page"] * len(pages)
+                     + profile["image_mp"] * report.get("image_megapixels", 0)
+                     + profile["render_mp"] * sum(render_megapixels))
+    peak_memory_mb = (profile["base_mb"] + profile["input_copies"] * len(content) / 2**20
+                      + profile["page_mb"] * len(pages)
+                      + profile["image_mb"] * report.get("image_megapixels", 0)
+                      + profile["render_mb"] * max(render_megapixels, default=0))
+    calibration = job_calibration(operation)
+    cpu_seconds = model_seconds * calibration["factor"]
+
+    reasons = []
+    if cpu_seconds > JOB_MAX_CPU_SECONDS:
+        reasons.append(f"~{cpu_seconds:.0f} CPU-seconds is over the {JOB_MAX_CPU_SECONDS:.0f} s budget")
+    if peak_memory_mb > JOB_MAX_MEMORY_MB:
+        reasons.append(f"~{peak_memory_mb:.0f} MB peak memory is over the {JOB_MAX_MEMORY_MB:.0f} MB budget")
+    return {
+        "operation": operation,
+        "page_count": report["page_count"],
+        "scanned_pages": report.get("scanned_pages", 0),
+        "rendered_pages": len(rendered),
+        "render_dpi": dpi if rendered else None,
+        "rendered_megapixels": round(sum(render_megapixels), 1),
+        "image_megapixels": report.get("image_megapixels", 0),
+        "model_seconds": round(model_seconds, 3),
+        "calibration_factor": round(calibration["factor"], 3),
+        "calibration_samples": calibration["samples"],
+        "cpu_seconds": round(cpu_seconds, 3),
+        "peak_memory_mb": round(peak_memory_mb, 1),
+        "pool": "heavy" if cpu_seconds > JOB_INTERACTIVE_SECONDS else "interactive",
+        "accepted": not reasons,
+        "reasons": reasons,
+    }
+
+def route_job(operation):
+    """Endpoint dependency: estimate the uploaded PDF's job, refuse it if over
+    budget, and hold a heavy slot for the whole request if it is slow
+
+    Once the endpoint is done, its measured cost is recorded for calibration.
+    """
+    async def admit_job(request: Request, file: UploadFile = File(...)):
+        content = await file.read()
+        await file.seek(0)
+        form = await request.form()
+        options = {**request.query_params, **{name: value for name, value in form.items() if isinstance(value, str)}}
+        try:
+            estimate = await estimate_job_cost(operation, content, options)
+        except (fitz.FileDataError, RuntimeError):
+            # Not a readable PDF; the endpoint reports that itself
+            yield None
+            return
+        if not estimate["accepted"]:
+            heavy_job_stats["rejected"] += 1
+            raise HTTPException(status_code=413, detail=f"Job refused: {'; '.join(estimate['reasons'])}")
+
+        cost = request_costs.get()
+        heavy = estimate["pool"] == "heavy"
+        if heavy:
+            wait_start = time.perf_counter()
+            heavy_job_stats["waiting"] += 1
+            try:
+                await heavy_job_slots.acquire()
+            finally:
+                heavy_job_stats["waiting"] -= 1
+            if cost is not None:
+                cost["queued"] = time.perf_counter() - wait_start
+            heavy_job_stats["running"] += 1
+
+        success = False
+        try:
+            yield estimate
+            success = True
+        finally:
+            if heavy:
+                heavy_job_stats["running"] -= 1
+                heavy_job_slots.release()
+            record_job_cost(estimate, success)
+    return admit_job
+
 # PDF Conversion Endpoints with MongoDB logging
 
+# pdf-to-word: pages are parsed in up to this many pool processes per request
+PDF_TO_WORD_MAX_PROCESSES = int(os.getenv("PDF_TO_WORD_MAX_PROCESSES", "4"))
+PDF_TO_WORD_PAGES_PER_PROCESS = 8  # smaller documents are parsed in one job
+
 @app.post("/api/pdf/to-word")
-async def pdf_to_word(file: UploadFile = File(...), current_user = Depends(get_current_user_optional)):
-    """Convert PDF to Word document"""
+async def pdf_to_word(
+    file: UploadFile = File(...),
+    pages: Optional[str] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    current_user = Depends(get_current_user_optional),
+    job = Depends(route_job("pdf_to_word"))
+):
+    """Convert PDF to Word document
+
+    Convert only some pages with pages ("1,3,5-7") or a start/end range
+    (1-based, inclusive). Long documents are parsed in parallel processes.
+    """
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
@@ -585,31 +1164,44 @@ async def pdf_to_word(file: UploadFile = File(...), current_user = Depends(get_c
         
         with open(temp_pdf, "wb") as buffer:
             buffer.write(content)
-        
-        # Verify the PDF file was written correctly
-        if not os.path.exists(temp_pdf) or os.path.getsize(temp_pdf) == 0:
-            raise HTTPException(status_code=500, detail="Failed to save PDF file")
-        
-        # Convert PDF to DOCX with better error handling
+
+        with fitz.open(temp_pdf) as pdf_document:
+            if pdf_document.needs_pass:
+                raise HTTPException(status_code=400, detail="Password-protected PDFs are not supported")
+            page_indexes = parse_page_selection(len(pdf_document), pages, start, end)
+
+        # Parse page runs in parallel, then write one DOCX from the merged results
+        # (pdf2docx has no cross-page pass to lose, see pdf_workers.parse_docx_pages)
+        timings = []
         try:
+            chunks = split_pages(page_indexes, min(PDF_TO_WORD_MAX_PROCESSES, PDF_WORKER_PROCESSES), PDF_TO_WORD_PAGES_PER_PROCESS)
+            if len(chunks) == 1:
+                # Not worth a process hop
+                results = [await asyncio.get_running_loop().run_in_executor(None, pdf_workers.parse_docx_pages, temp_pdf, chunks[0])]
+            else:
+                results = await asyncio.gather(*(run_pdf_job(pdf_workers.parse_docx_pages, temp_pdf, chunk) for chunk in chunks))
+            timings.append(("parse", max(result[1] for result in results)))
+            timings.append(("layout", max(result[2] for result in results)))
+
+            step_start = time.perf_counter()
             cv = Converter(temp_pdf)
-            cv.convert(temp_docx)
+            cv.load_pages(pages=page_indexes)
+            for stored_pages, _, _ in results:
+                cv.restore(stored_pages)
+            cv.make_docx(temp_docx, **cv.default_settings)
             cv.close()
+            timings.append(("write", time.perf_counter() - step_start))
+        except HTTPException:
+            raise
         except Exception as conv_error:
             raise HTTPException(status_code=500, detail=f"PDF conversion failed: {str(conv_error)}")
         
-        # Verify the output file was created and has content
-        if not os.path.exists(temp_docx) or os.path.getsize(temp_docx) == 0:
-            raise HTTPException(status_code=500, detail="Conversion produced empty output file")
-        
-        # Validate the DOCX file format
+        # Structural check of the output: a DOCX package with a main document part
         try:
-            from docx import Document
-            doc = Document(temp_docx)
-            # Check if document has any content
-            if len(doc.paragraphs) == 0 and len(doc.tables) == 0:
-                raise HTTPException(status_code=500, detail="Converted document has no content")
-        except Exception as doc_error:
+            with zipfile.ZipFile(temp_docx) as docx_package:
+                if docx_package.getinfo("word/document.xml").file_size == 0:
+                    raise HTTPException(status_code=500, detail="Converted document has no content")
+        except (zipfile.BadZipFile, KeyError) as doc_error:
             raise HTTPException(status_code=500, detail=f"Invalid DOCX output: {str(doc_error)}")
         
         # Log the operation
@@ -636,7 +1228,8 @@ async def pdf_to_word(file: UploadFile = File(...), current_user = Depends(get_c
             filename=f"{file.filename.rsplit('.', 1)[0]}.docx",
             headers={
                 "Content-Disposition": f"attachment; filename=\"{file.filename.rsplit('.', 1)[0]}.docx\"",
-                "Content-Type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                "Content-Type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                "Server-Timing": format_server_timing(timings)
             }
         )
     
@@ -657,7 +1250,7 @@ async def pdf_to_word(file: UploadFile = File(...), current_user = Depends(get_c
         # It will be cleaned up by the system later
 
 @app.post("/api/pdf/to-images")
-async def pdf_to_images(file: UploadFile = File(...), format: str = "png", dpi: int = 150, current_user = Depends(get_current_user_optional)):
+async def pdf_to_images(file: UploadFile = File(...), format: str = "png", dpi: int = 150, current_user = Depends(get_current_user_optional), job = Depends(route_job("pdf_to_images"))):
     """Convert PDF pages to images"""
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
@@ -903,7 +1496,7 @@ async def split_pdf(file: UploadFile = File(...), pages_per_file: int = 1, curre
         raise HTTPException(status_code=500, detail=f"Split failed: {str(e)}")
 
 @app.post("/api/pdf/compress")
-async def compress_pdf(file: UploadFile = File(...), quality: int = 50, current_user = Depends(get_current_user_optional)):
+async def compress_pdf(file: UploadFile = File(...), quality: int = 50, current_user = Depends(get_current_user_optional), job = Depends(route_job("pdf_compress"))):
     """Compress PDF file"""
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
@@ -921,7 +1514,7 @@ async def compress_pdf(file: UploadFile = File(...), quality: int = 50, current_
         
         # Compress PDF using PyMuPDF
         pdf_document = fitz.open(temp_pdf)
-        pdf_document.save(temp_output, garbage=4, deflate=True, clean=True)
+        pdf_document.save(temp_output, **PDF_COMPRESS_SAVE_OPTIONS)
         pdf_document.close()
         
         # Get compressed file size
@@ -956,6 +1549,66 @@ async def compress_pdf(file: UploadFile = File(...), quality: int = 50, current_
 
 # Additional PDF Processing Endpoints
 
+# Password protection: MuPDF encrypts while writing objects, so no page tree rebuild
+PDF_ENCRYPTION_LEVELS = {
+    "40-bit": fitz.PDF_ENCRYPT_RC4_40,
+    "128-bit": fitz.PDF_ENCRYPT_RC4_128,
+    "rc4-128": fitz.PDF_ENCRYPT_RC4_128,
+    "aes-128": fitz.PDF_ENCRYPT_AES_128,
+    "256-bit": fitz.PDF_ENCRYPT_AES_256,
+    "aes-256": fitz.PDF_ENCRYPT_AES_256,
+}
+PDF_PERMISSION_FLAGS = {
+    "printing": fitz.PDF_PERM_PRINT | fitz.PDF_PERM_PRINT_HQ,
+    "copying": fitz.PDF_PERM_COPY,
+    "editing": fitz.PDF_PERM_MODIFY,
+    "commenting": fitz.PDF_PERM_ANNOTATE,
+    "formFilling": fitz.PDF_PERM_FORM,
+    "pageExtraction": fitz.PDF_PERM_ASSEMBLE,
+    "accessibility": fitz.PDF_PERM_ACCESSIBILITY,
+}
+
+def pdf_permission_flags(permissions):
+    """Permission bits from {"printing": true, ...}; permissions not mentioned stay allowed"""
+    flags = 0
+    for name, flag in PDF_PERMISSION_FLAGS.items():
+        if permissions.get(name, True):
+            flags |= flag
+    return flags
+
+PDF_ENCRYPTION_NAMES = {
+    fitz.PDF_ENCRYPT_RC4_40: "RC4-40",
+    fitz.PDF_ENCRYPT_RC4_128: "RC4-128",
+    fitz.PDF_ENCRYPT_AES_128: "AES-128",
+    fitz.PDF_ENCRYPT_AES_256: "AES-256",
+}
+
+def encrypt_pdf(source, target, user_password, owner_password, encryption, permissions):
+    """Write source to target encrypted with the given fitz.PDF_ENCRYPT_* method and permission bits"""
+    with fitz.open(source) as pdf_document:
+        if pdf_document.needs_pass:
+            raise HTTPException(status_code=400, detail="PDF is already password-protected. Unlock it first.")
+        pdf_document.save(
+            target,
+            encryption=encryption,
+            user_pw=user_password,
+            owner_pw=owner_password,
+            permissions=permissions
+        )
+
+def decrypt_pdf(source, target, password):
+    """Write source to target without encryption or permission restrictions
+
+    Returns False if the file was not encrypted; it is left unwritten then.
+    """
+    with fitz.open(source) as pdf_document:
+        if not pdf_document.is_encrypted:
+            return False
+        if pdf_document.needs_pass and not pdf_document.authenticate(password):
+            raise HTTPException(status_code=400, detail="Incorrect password")
+        pdf_document.save(target, encryption=fitz.PDF_ENCRYPT_NONE)
+    return True
+
 @app.post("/api/pdf/protect")
 async def protect_pdf(
     file: UploadFile = File(...), 
@@ -965,9 +1618,23 @@ async def protect_pdf(
     permissions: str = Form("{}"),
     current_user = Depends(get_current_user_optional)
 ):
-    """Protect PDF with password and permissions"""
+    """Protect PDF with password and permissions
+
+    encryption_level: 40-bit, 128-bit (RC4), aes-128 or 256-bit (AES).
+    Without an owner password a random one is set, so the permissions hold
+    for anyone opening the file with the user password.
+    """
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    encryption = PDF_ENCRYPTION_LEVELS.get(encryption_level.lower())
+    if encryption is None:
+        raise HTTPException(status_code=400, detail=f"encryption_level must be one of: {', '.join(PDF_ENCRYPTION_LEVELS)}")
+    try:
+        permission_settings = json.loads(permissions) if permissions else {}
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid permissions format")
+    if not isinstance(permission_settings, dict):
+        raise HTTPException(status_code=400, detail="Invalid permissions format")
     
     temp_pdf = create_temp_file(".pdf")
     temp_output = create_temp_file(".pdf")
@@ -979,18 +1646,12 @@ async def protect_pdf(
         with open(temp_pdf, "wb") as buffer:
             buffer.write(content)
         
-        # Use PyPDF2 for password protection
-        pdf_reader = PyPDF2.PdfReader(temp_pdf)
-        pdf_writer = PyPDF2.PdfWriter()
-        
-        for page in pdf_reader.pages:
-            pdf_writer.add_page(page)
-        
-        # Apply password protection
-        pdf_writer.encrypt(user_password, owner_password or user_password)
-        
-        with open(temp_output, "wb") as output_file:
-            pdf_writer.write(output_file)
+        start_time = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(
+            None, encrypt_pdf, temp_pdf, temp_output, user_password,
+            owner_password or secrets.token_urlsafe(24), encryption, pdf_permission_flags(permission_settings)
+        )
+        elapsed = time.perf_counter() - start_time
         
         cleanup_file(temp_pdf)
         
@@ -1004,9 +1665,15 @@ async def protect_pdf(
         return FileResponse(
             temp_output,
             media_type="application/pdf",
-            filename=f"protected_{file.filename}"
+            filename=f"protected_{file.filename}",
+            headers={"Server-Timing": format_server_timing([("encrypt", elapsed)]), "X-Encryption": PDF_ENCRYPTION_NAMES[encryption]}
         )
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        cleanup_file(temp_pdf)
+        cleanup_file(temp_output)
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -1037,21 +1704,14 @@ async def unlock_pdf(
         with open(temp_pdf, "wb") as buffer:
             buffer.write(content)
         
-        # Try to decrypt PDF
-        pdf_reader = PyPDF2.PdfReader(temp_pdf)
-        
-        if pdf_reader.is_encrypted:
-            if not pdf_reader.decrypt(password):
-                raise HTTPException(status_code=400, detail="Incorrect password")
-        
-        pdf_writer = PyPDF2.PdfWriter()
-        for page in pdf_reader.pages:
-            pdf_writer.add_page(page)
-        
-        with open(temp_output, "wb") as output_file:
-            pdf_writer.write(output_file)
-        
-        cleanup_file(temp_pdf)
+        # Decrypt PDF; an unencrypted file is returned as it is
+        start_time = time.perf_counter()
+        if await asyncio.get_running_loop().run_in_executor(None, decrypt_pdf, temp_pdf, temp_output, password):
+            cleanup_file(temp_pdf)
+        else:
+            cleanup_file(temp_output)
+            temp_output = temp_pdf
+        elapsed = time.perf_counter() - start_time
         
         # Log the operation
         if current_user:
@@ -1064,9 +1724,15 @@ async def unlock_pdf(
         return FileResponse(
             temp_output,
             media_type="application/pdf",
-            filename=f"unlocked_{file.filename}"
+            filename=f"unlocked_{file.filename}",
+            headers={"Server-Timing": format_server_timing([("decrypt", elapsed)])}
         )
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        cleanup_file(temp_pdf)
+        cleanup_file(temp_output)
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -1099,17 +1765,11 @@ async def rotate_pdf(
             buffer.write(content)
         
         # Rotate PDF pages
-        pdf_reader = PyPDF2.PdfReader(temp_pdf)
-        pdf_writer = PyPDF2.PdfWriter()
-        
-        for page in pdf_reader.pages:
-            rotated_page = page.rotate(rotation)
-            pdf_writer.add_page(rotated_page)
-        
-        with open(temp_output, "wb") as output_file:
-            pdf_writer.write(output_file)
+        output_path, save_mode, bytes_written, save_seconds = await asyncio.get_running_loop().run_in_executor(
+            None, edit_pdf_file, temp_pdf, temp_output, rotate_pdf_pages, rotation
+        )
         
-        cleanup_file(temp_pdf)
+        cleanup_file(temp_output if output_path == temp_pdf else temp_pdf)
         
         # Log the operation
         if current_user:
@@ -1120,9 +1780,14 @@ async def rotate_pdf(
             )
         
         return FileResponse(
-            temp_output,
+            output_path,
             media_type="application/pdf",
-            filename=f"rotated_{file.filename}"
+            filename=f"rotated_{file.filename}",
+            headers={
+                "Server-Timing": format_server_timing([("save", save_seconds)]),
+                "X-Save-Mode": save_mode,
+                "X-Bytes-Written": str(bytes_written)
+            }
         )
     
     except Exception as e:
@@ -1136,14 +1801,74 @@ async def rotate_pdf(
         cleanup_file(temp_output)
         raise HTTPException(status_code=500, detail=f"Rotation failed: {str(e)}")
 
+# pdf-to-excel: tables found page-parallel, streamed to a write-only workbook, CSV or NDJSON
+PDF_TABLE_FORMATS = {
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+    "csv": ("text/csv", ".csv"),
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+}
+PDF_TABLE_LAYOUTS = ["blocks", "sheets"]
+PDF_TABLE_PAGES_PER_JOB = 16
+MAX_EXCEL_TABLE_SHEETS = 250  # each write-only sheet keeps a temp file open until the save
+
+# Spreadsheets evaluate cells starting with these as formulas when the file is opened
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def is_formula_text(value):
+    """Whether a cell would be read as a formula; plain numbers such as -5 are not"""
+    if not isinstance(value, str) or not value.startswith(FORMULA_PREFIXES):
+        return False
+    try:
+        float(value)
+        return False
+    except ValueError:
+        return True
+
+def csv_row(row):
+    """CSV row with formula-like text prefixed by ', which spreadsheets show as text"""
+    return ["'" + value if is_formula_text(value) else value for value in row]
+
+def excel_row(sheet, row):
+    """Row for a write-only sheet; formula-like text stays text"""
+    cells = []
+    for value in row:
+        if is_formula_text(value):
+            value = WriteOnlyCell(sheet, value=value)
+            value.data_type = "s"
+        cells.append(value)
+    return cells
+
 @app.post("/api/pdf/to-excel")
-async def pdf_to_excel(file: UploadFile = File(...), current_user = Depends(get_current_user_optional)):
-    """Convert PDF to Excel (basic table extraction)"""
+async def pdf_to_excel(
+    file: UploadFile = File(...),
+    format: str = "xlsx",
+    layout: str = "blocks",
+    pages: Optional[str] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    current_user = Depends(get_current_user_optional),
+    job = Depends(route_job("pdf_to_excel"))
+):
+    """Convert PDF tables to Excel, CSV or NDJSON
+
+    xlsx puts every table on one sheet, one block after another (layout
+    "blocks"), or each on its own sheet ("sheets"); text of pages without
+    tables goes to a "Text" sheet. CSV and NDJSON rows carry the page and
+    table number. Pages are processed a window at a time and streamed to
+    disk, so memory stays flat however long the PDF is.
+    """
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    output_format = format.lower()
+    if output_format not in PDF_TABLE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {list(PDF_TABLE_FORMATS)}")
+    if layout not in PDF_TABLE_LAYOUTS:
+        raise HTTPException(status_code=400, detail=f"Layout must be one of: {PDF_TABLE_LAYOUTS}")
+    media_type, extension = PDF_TABLE_FORMATS[output_format]
     
     temp_pdf = create_temp_file(".pdf")
-    temp_excel = create_temp_file(".xlsx")
+    temp_output = create_temp_file(extension)
+    output = None
     
     try:
         content = await file.read()
@@ -1151,58 +1876,180 @@ async def pdf_to_excel(file: UploadFile = File(...), current_user = Depends(get_
         
         with open(temp_pdf, "wb") as buffer:
             buffer.write(content)
-        
-        # Extract text from PDF
-        pdf_document = fitz.open(temp_pdf)
-        
-        # Create Excel workbook
-        workbook = openpyxl.Workbook()
-        worksheet = workbook.active
-        worksheet.title = "PDF Content"
-        
-        row = 1
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            text = page.get_text()
-            
-            # Simple text to Excel conversion
-            lines = text.split('\n')
-            for line in lines:
-                if line.strip():
-                    worksheet.cell(row=row, column=1, value=line.strip())
-                    row += 1
-        
-        pdf_document.close()
-        workbook.save(temp_excel)
+
+        with fitz.open(temp_pdf) as pdf_document:
+            page_indexes = parse_page_selection(len(pdf_document), pages, start, end)
+
+        if output_format == "xlsx":
+            workbook = openpyxl.Workbook(write_only=True)
+            sheets = {}
+        else:
+            output = open(temp_output, "w", newline="", encoding="utf-8")
+            csv_writer = csv.writer(output)
+        table_count = 0
+
+        def write_page(page_index, tables, lines):
+            nonlocal table_count
+            for table_number, rows in enumerate(tables, start=1):
+                table_count += 1
+                if output_format == "csv":
+                    csv_writer.writerows([page_index + 1, table_number, *csv_row(row)] for row in rows)
+                elif output_format == "ndjson":
+                    output.writelines(
+                        json.dumps({"page": page_index + 1, "table": table_number, "cells": row}, ensure_ascii=False) + "\n"
+                        for row in rows
+                    )
+                elif layout == "sheets":
+                    if table_count > MAX_EXCEL_TABLE_SHEETS:
+                        raise HTTPException(status_code=400, detail=f"More than {MAX_EXCEL_TABLE_SHEETS} tables; use layout=blocks")
+                    sheet = workbook.create_sheet(f"Page {page_index + 1} Table {table_number}")
+                    for row in rows:
+                        sheet.append(excel_row(sheet, row))
+                else:
+                    if "Tables" not in sheets:
+                        sheets["Tables"] = workbook.create_sheet("Tables")
+                    sheet = sheets["Tables"]
+                    if table_count > 1:
+                        sheet.append([])
+                    sheet.append([f"Page {page_index + 1}, table {table_number}"])
+                    for row in rows:
+                        sheet.append(excel_row(sheet, row))
+            if lines:
+                if "Text" not in sheets:
+                    sheets["Text"] = workbook.create_sheet("Text")
+                    sheets["Text"].append(["Page", "Text"])
+                for line in lines:
+                    sheets["Text"].append(excel_row(sheets["Text"], [page_index + 1, line]))
+
+        # One window of page runs in flight at a time, written in page order
+        timings = []
+        extract_time = 0.0
+        write_time = 0.0
+        chunks = split_pages(page_indexes, -(-len(page_indexes) // PDF_TABLE_PAGES_PER_JOB), PDF_TABLE_PAGES_PER_JOB)
+        with_text = output_format == "xlsx"
+        for window_start in range(0, len(chunks), PDF_WORKER_PROCESSES):
+            window = chunks[window_start:window_start + PDF_WORKER_PROCESSES]
+            step_start = time.perf_counter()
+            if len(chunks) == 1:
+                # Not worth a process hop
+                results = [await asyncio.get_running_loop().run_in_executor(
+                    None, pdf_workers.extract_page_tables, temp_pdf, window[0], with_text
+                )]
+            else:
+                results = await asyncio.gather(*(
+                    run_pdf_job(pdf_workers.extract_page_tables, temp_pdf, chunk, with_text) for chunk in window
+                ))
+            extract_time += time.perf_counter() - step_start
+
+            step_start = time.perf_counter()
+            for chunk_results in results:
+                for page_index, tables, lines in chunk_results:
+                    write_page(page_index, tables, lines)
+            write_time += time.perf_counter() - step_start
+            del results
+
+        step_start = time.perf_counter()
+        if output_format == "xlsx":
+            if not workbook.worksheets:
+                workbook.create_sheet("Tables")
+            workbook.save(temp_output)
+        else:
+            output.close()
+        timings.extend([("extract", extract_time), ("write", write_time + time.perf_counter() - step_start)])
         cleanup_file(temp_pdf)
         
         # Log the operation
         if current_user:
             await log_operation(
                 current_user.id, "pdf_to_excel", file.filename, 
-                "pdf", "xlsx", file_size, True
+                "pdf", output_format, file_size, True
         
             )
         
         return FileResponse(
-            temp_excel,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            filename=f"{file.filename.rsplit('.', 1)[0]}.xlsx"
+            temp_output,
+            media_type=media_type,
+            filename=f"{file.filename.rsplit('.', 1)[0]}{extension}",
+            headers={"Server-Timing": format_server_timing(timings), "X-Table-Count": str(table_count)}
         )
     
+    except HTTPException:
+        if output:
+            output.close()
+        cleanup_file(temp_pdf)
+        cleanup_file(temp_output)
+        raise
     except Exception as e:
+        if output:
+            output.close()
         if current_user:
             await log_operation(
                 current_user.id, "pdf_to_excel", file.filename, 
-                "pdf", "xlsx", 0, False
+                "pdf", output_format, 0, False
         
             )
         cleanup_file(temp_pdf)
-        cleanup_file(temp_excel)
+        cleanup_file(temp_output)
         raise HTTPException(status_code=500, detail=f"Excel conversion failed: {str(e)}")
 
+# pdf-to-ppt: page text and images are prepared page-parallel, slides are assembled in order
+PDF_SLIDE_PAGES_PER_JOB = 16
+PDF_SLIDE_IMAGES_PER_PAGE = 2
+
+def add_pdf_slide(prs, page_index, spans, image_payloads, filename, page_count):
+    """Add the slide for one prepared PDF page"""
+    if page_index == 0:
+        # Title slide for first page
+        slide = prs.slides.add_slide(prs.slide_layouts[0])
+        slide.shapes.title.text = f"PDF Document - {filename}"
+        slide.placeholders[1].text = f"Converted from PDF • {page_count} pages"
+    else:
+        # Blank layout for better control
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+
+        # Add title
+        title_shape = slide.shapes.add_textbox(
+            Inches(0.5), Inches(0.3), Inches(9), Inches(0.8)
+        )
+        title_p = title_shape.text_frame.paragraphs[0]
+        title_p.text = f"Page {page_index + 1}"
+        title_p.font.size = Pt(24)
+        title_p.font.bold = True
+        title_p.font.color.rgb = RGBColor(0, 51, 102)  # Dark blue
+
+        # Add content with better formatting
+        content_shape = slide.shapes.add_textbox(
+            Inches(0.5), Inches(1.3), Inches(9), Inches(6)
+        )
+        content_frame = content_shape.text_frame
+        content_frame.word_wrap = True
+        for text, size, flags in spans:
+            p = content_frame.add_paragraph()
+            p.text = text
+            p.font.size = Pt(max(12, min(size, 16)))
+
+            # Apply formatting based on font properties
+            if flags & 2**4:  # Bold
+                p.font.bold = True
+            if flags & 2**1:  # Italic
+                p.font.italic = True
+
+            # Color based on font size (headings vs content)
+            if size > 14:
+                p.font.color.rgb = RGBColor(0, 51, 102)  # Dark blue for headings
+            else:
+                p.font.color.rgb = RGBColor(51, 51, 51)  # Dark gray for content
+
+    # python-pptx stores identical image bytes once, so a repeated logo costs one part
+    for img_index, payload in enumerate(image_payloads):
+        slide.shapes.add_picture(
+            io.BytesIO(payload),
+            Inches(6 + (img_index * 1.5)), Inches(2 + (img_index * 1.5)),
+            Inches(2.5), Inches(2)
+        )
+
 @app.post("/api/pdf/to-ppt")
-async def pdf_to_ppt(file: UploadFile = File(...), current_user = Depends(get_current_user_optional)):
+async def pdf_to_ppt(file: UploadFile = File(...), current_user = Depends(get_current_user_optional), job = Depends(route_job("pdf_to_ppt"))):
     """Convert PDF to PowerPoint (basic conversion)"""
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
@@ -1216,111 +2063,34 @@ async def pdf_to_ppt(file: UploadFile = File(...), current_user = Depends(get_cu
         
         with open(temp_pdf, "wb") as buffer:
             buffer.write(content)
-        
-        # Extract content from PDF
-        pdf_document = fitz.open(temp_pdf)
-        
-        # Create PowerPoint presentation
+
+        with fitz.open(temp_pdf) as pdf_document:
+            page_count = len(pdf_document)
+
+        # Text and image payloads for every page, prepared in parallel
+        timings = []
+        step_start = time.perf_counter()
+        page_indexes = list(range(page_count))
+        chunks = split_pages(page_indexes, -(-page_count // PDF_SLIDE_PAGES_PER_JOB), PDF_SLIDE_PAGES_PER_JOB)
+        if len(chunks) == 1:
+            # Not worth a process hop
+            results = [await asyncio.get_running_loop().run_in_executor(
+                None, pdf_workers.prepare_slide_pages, temp_pdf, chunks[0], PDF_SLIDE_IMAGES_PER_PAGE
+            )]
+        else:
+            results = await asyncio.gather(*(
+                run_pdf_job(pdf_workers.prepare_slide_pages, temp_pdf, chunk, PDF_SLIDE_IMAGES_PER_PAGE) for chunk in chunks
+            ))
+        timings.append(("prepare", time.perf_counter() - step_start))
+
+        # Assemble the slides in page order
+        step_start = time.perf_counter()
         prs = Presentation()
-        
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            
-            # Extract text with formatting
-            text_dict = page.get_text("dict")
-            text = page.get_text()
-            
-            # Create slide with better layout
-            if page_num == 0:
-                slide_layout = prs.slide_layouts[0]  # Title slide for first page
-            else:
-                slide_layout = prs.slide_layouts[6]  # Blank layout for better control
-            
-            slide = prs.slides.add_slide(slide_layout)
-            
-            if page_num == 0:
-                # Title slide
-                title = slide.shapes.title
-                subtitle = slide.placeholders[1]
-                title.text = f"PDF Document - {file.filename}"
-                subtitle.text = f"Converted from PDF • {len(pdf_document)} pages"
-            else:
-                # Content slide
-                # Add title
-                title_shape = slide.shapes.add_textbox(
-                    Inches(0.5), Inches(0.3), Inches(9), Inches(0.8)
-                )
-                title_frame = title_shape.text_frame
-                title_p = title_frame.paragraphs[0]
-                title_p.text = f"Page {page_num + 1}"
-                title_p.font.size = Pt(24)
-                title_p.font.bold = True
-                title_p.font.color.rgb = RGBColor(0, 51, 102)  # Dark blue
-                
-                # Add content with better formatting
-                content_shape = slide.shapes.add_textbox(
-                    Inches(0.5), Inches(1.3), Inches(9), Inches(6)
-                )
-                content_frame = content_shape.text_frame
-                content_frame.word_wrap = True
-                
-                # Process text blocks with formatting
-                if text_dict.get('blocks'):
-                    for block in text_dict['blocks']:
-                        if 'lines' in block:
-                            for line in block['lines']:
-                                for span in line.get('spans', []):
-                                    span_text = span.get('text', '').strip()
-                                    if span_text:
-                                        p = content_frame.add_paragraph()
-                                        p.text = span_text
-                                        p.font.size = Pt(max(12, min(span.get('size', 12), 16)))
-                                        
-                                        # Apply formatting based on font properties
-                                        if span.get('flags', 0) & 2**4:  # Bold
-                                            p.font.bold = True
-                                        if span.get('flags', 0) & 2**1:  # Italic
-                                            p.font.italic = True
-                                        
-                                        # Color based on font size (headings vs content)
-                                        if span.get('size', 12) > 14:
-                                            p.font.color.rgb = RGBColor(0, 51, 102)  # Dark blue for headings
-                                        else:
-                                            p.font.color.rgb = RGBColor(51, 51, 51)  # Dark gray for content
-                else:
-                    # Fallback to plain text
-                    p = content_frame.paragraphs[0]
-                    p.text = text[:1000] + "..." if len(text) > 1000 else text
-                    p.font.size = Pt(12)
-                    p.font.color.rgb = RGBColor(51, 51, 51)
-            
-            # Extract and add images if present
-            image_list = page.get_images()
-            if image_list:
-                for img_index, img in enumerate(image_list[:2]):  # Limit to 2 images per slide
-                    try:
-                        xref = img[0]
-                        pix = fitz.Pixmap(pdf_document, xref)
-                        
-                        if pix.n - pix.alpha < 4:  # GRAY or RGB
-                            img_data = pix.tobytes("png")
-                            img_stream = io.BytesIO(img_data)
-                            
-                            # Add image to slide
-                            left = Inches(6 + (img_index * 1.5))
-                            top = Inches(2 + (img_index * 1.5))
-                            width = Inches(2.5)
-                            height = Inches(2)
-                            
-                            slide.shapes.add_picture(img_stream, left, top, width, height)
-                        
-                        pix = None
-                    except Exception as img_error:
-                        print(f"Could not extract image {img_index} from page {page_num}: {img_error}")
-                        continue
-        
-        pdf_document.close()
+        for pages, images in results:
+            for page_index, spans, xrefs in pages:
+                add_pdf_slide(prs, page_index, spans, [images[xref] for xref in xrefs], file.filename, page_count)
         prs.save(temp_ppt)
+        timings.append(("assemble", time.perf_counter() - step_start))
         cleanup_file(temp_pdf)
         
         # Log the operation
@@ -1334,7 +2104,8 @@ async def pdf_to_ppt(file: UploadFile = File(...), current_user = Depends(get_cu
         return FileResponse(
             temp_ppt,
             media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-            filename=f"{file.filename.rsplit('.', 1)[0]}.pptx"
+            filename=f"{file.filename.rsplit('.', 1)[0]}.pptx",
+            headers={"Server-Timing": format_server_timing(timings)}
         )
     
     except Exception as e:
@@ -1348,69 +2119,156 @@ async def pdf_to_ppt(file: UploadFile = File(...), current_user = Depends(get_cu
         cleanup_file(temp_ppt)
         raise HTTPException(status_code=500, detail=f"PowerPoint conversion failed: {str(e)}")
 
+# pdf-to-html: MuPDF renders pages in parallel; results stream out or are fetched a page at a time
+PDF_HTML_PAGES_PER_JOB = 16
+PDF_HTML_DOCUMENT_DIR = Path(tempfile.gettempdir()) / "pdf-html-documents"
+PDF_HTML_DOCUMENT_TTL = int(os.getenv("PDF_HTML_DOCUMENT_TTL", "900"))  # seconds after upload a document stays fetchable by page
+PDF_HTML_OUTPUT_FORMATS = ["complete", "content-only", "structured"]
+PDF_HTML_CSS_FRAMEWORKS = {
+    "bootstrap": '<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">',
+    "tailwind": '<script src="https://cdn.tailwindcss.com"></script>',
+    "custom": "",
+    "none": "",
+}
+PDF_HTML_PAGE_CSS = """.pdf-page { margin-bottom: 2rem; padding: 2rem; border: 1px solid #ddd; overflow-x: auto; }
+.page-number { color: #666; font-size: 0.9em; }"""
+PDF_HTML_LAYOUT_CSS = """.pdf-page > div { position: relative; margin: 0 auto; }
+.pdf-page > div > p { position: absolute; margin: 0; white-space: pre; }
+.pdf-page > div > img { position: absolute; }"""
+
+def expire_html_documents():
+    """Delete stored documents, and their owner records, PDF_HTML_DOCUMENT_TTL seconds after upload"""
+    now = time.time()
+    for stored in PDF_HTML_DOCUMENT_DIR.glob("*"):
+        try:
+            if now - stored.stat().st_mtime > PDF_HTML_DOCUMENT_TTL:
+                stored.unlink()
+        except OSError:
+            pass
+
+def store_html_document(content, owner=None):
+    """Keep an uploaded PDF for per-page fetches; returns its id
+
+    The id is a random token that only the uploader is given, and documents
+    uploaded by a signed-in user can only be fetched by that user. Every
+    upload gets its own copy, deleted once it expires.
+    """
+    PDF_HTML_DOCUMENT_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    expire_html_documents()
+    document_id = secrets.token_hex(16)
+    path = PDF_HTML_DOCUMENT_DIR / f"{document_id}.pdf"
+    # The owner record goes first: a document without one is never served
+    path.with_suffix(".owner").write_text(str(owner.id) if owner else "")
+    path.write_bytes(content)
+    return document_id
+
+def html_document_path(document_id, user=None):
+    """Path of a stored PDF, or 404 if the id is malformed, expired or another user's"""
+    not_found = HTTPException(status_code=404, detail="Document not found or expired; upload it again")
+    if not re.fullmatch(r"[0-9a-f]{32}", document_id):
+        raise not_found
+    expire_html_documents()
+    path = PDF_HTML_DOCUMENT_DIR / f"{document_id}.pdf"
+    try:
+        owner = path.with_suffix(".owner").read_text()
+    except OSError:
+        raise not_found
+    if not path.exists() or (owner and (user is None or str(user.id) != owner)):
+        raise not_found
+    return path
+
+def pdf_html_css(preserve_layout):
+    """Stylesheet for the generated pages"""
+    return PDF_HTML_PAGE_CSS + ("\n" + PDF_HTML_LAYOUT_CSS if preserve_layout else "")
+
+def pdf_html_section(page_index, page_html):
+    """One page wrapped in its section"""
+    return (f'<section class="pdf-page" id="page-{page_index + 1}" data-page="{page_index + 1}">\n'
+            f'<h2 class="page-number">Page {page_index + 1}</h2>\n{page_html}</section>\n')
+
+def pdf_html_head(filename, page_count, output_format, css_framework, css):
+    """Everything before the first page section"""
+    if output_format == "content-only":
+        return ""
+    title = html_lib.escape(filename)
+    head = (f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1.0">\n<title>{title}</title>\n'
+            f'{PDF_HTML_CSS_FRAMEWORKS[css_framework]}\n')
+    if css:
+        head += f"<style>\n{css}\n</style>\n"
+    head += f'</head>\n<body>\n<div class="container">\n<h1 class="my-4">PDF Content: {title}</h1>\n'
+    if output_format == "structured":
+        links = "".join(f'<li><a href="#page-{number}">Page {number}</a></li>' for number in range(1, page_count + 1))
+        head += f'<nav class="pdf-contents"><ol>{links}</ol></nav>\n'
+    return head
+
+def pdf_html_tail(output_format):
+    """Everything after the last page section"""
+    return "" if output_format == "content-only" else "</div>\n</body>\n</html>\n"
+
+async def iter_html_pages(pdf_path, page_indexes, preserve_layout, with_images):
+    """Yield (page index, html, element count) in page order, one window of page runs at a time"""
+    chunks = split_pages(page_indexes, -(-len(page_indexes) // PDF_HTML_PAGES_PER_JOB), PDF_HTML_PAGES_PER_JOB)
+    if len(chunks) == 1:
+        # Not worth a process hop
+        for result in await asyncio.get_running_loop().run_in_executor(
+            None, pdf_workers.render_html_pages, pdf_path, chunks[0], preserve_layout, with_images
+        ):
+            yield result
+        return
+    for window_start in range(0, len(chunks), PDF_WORKER_PROCESSES):
+        window = chunks[window_start:window_start + PDF_WORKER_PROCESSES]
+        results = await asyncio.gather(*(
+            run_pdf_job(pdf_workers.render_html_pages, pdf_path, chunk, preserve_layout, with_images) for chunk in window
+        ))
+        for chunk_results in results:
+            for result in chunk_results:
+                yield result
+
 @app.post("/api/pdf/to-html")
 async def pdf_to_html(
     file: UploadFile = File(...), 
     options: str = Form("{}"),
     output_format: str = Form("complete"),
     css_framework: str = Form("bootstrap"),
-    current_user = Depends(get_current_user_optional)
+    stream: bool = Form(False),
+    current_user = Depends(get_current_user_optional),
+    job = Depends(route_job("pdf_to_html"))
 ):
-    """Convert PDF to HTML"""
+    """Convert PDF to HTML
+
+    options.preserveLayout keeps positions, fonts and colours (MuPDF "html")
+    instead of semantic flow ("xhtml"); options.extractImages embeds images;
+    options.includeCSS adds the page stylesheet. With stream set, the HTML
+    is sent as a chunked response while pages render; otherwise the JSON
+    result carries a document_id for GET /api/pdf/to-html/{document_id}/{page}.
+    """
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-    
-    temp_pdf = create_temp_file(".pdf")
+    if output_format not in PDF_HTML_OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"output_format must be one of: {PDF_HTML_OUTPUT_FORMATS}")
+    if css_framework not in PDF_HTML_CSS_FRAMEWORKS:
+        raise HTTPException(status_code=400, detail=f"css_framework must be one of: {list(PDF_HTML_CSS_FRAMEWORKS)}")
     
     try:
         content = await file.read()
         file_size = len(content)
-        
-        with open(temp_pdf, "wb") as buffer:
-            buffer.write(content)
-        
-        # Extract content from PDF
-        pdf_document = fitz.open(temp_pdf)
-        
-        html_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{file.filename}</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        .pdf-page {{ margin-bottom: 2rem; padding: 2rem; border: 1px solid #ddd; }}
-        .page-number {{ color: #666; font-size: 0.9em; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1 class="my-4">PDF Content: {file.filename}</h1>
-"""
-        
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            text = page.get_text()
-            
-            html_content += f"""
-        <div class="pdf-page">
-            <h2 class="page-number">Page {page_num + 1}</h2>
-            <div class="content">
-                {text.replace(chr(10), '<br>')}
-            </div>
-        </div>
-"""
-        
-        html_content += """
-    </div>
-</body>
-</html>
-"""
-        
-        pdf_document.close()
-        cleanup_file(temp_pdf)
-        
+        html_options = json.loads(options) if options else {}
+        preserve_layout = bool(html_options.get('preserveLayout', True))
+        with_images = bool(html_options.get('extractImages', True))
+        css = pdf_html_css(preserve_layout) if html_options.get('includeCSS', True) else ""
+
+        start_time = time.perf_counter()
+        document_id = store_html_document(content, current_user)
+        pdf_path = html_document_path(document_id, current_user)
+        try:
+            with fitz.open(pdf_path) as pdf_document:
+                page_count = len(pdf_document)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid PDF file")
+        page_indexes = list(range(page_count))
+        head = pdf_html_head(file.filename, page_count, output_format, css_framework, css)
+
         # Log the operation
         if current_user:
             await log_operation(
@@ -1418,16 +2276,45 @@ async def pdf_to_html(
                 "pdf", "html", file_size, True
         
             )
+
+        if stream:
+            async def stream_html():
+                yield head
+                element_count = 0
+                async for page_index, page_html, elements in iter_html_pages(pdf_path, page_indexes, preserve_layout, with_images):
+                    element_count += elements
+                    yield pdf_html_section(page_index, page_html)
+                yield pdf_html_tail(output_format)
+                # Headers are gone by now, so the metrics close the document
+                yield (f"<!-- pages: {page_count}, elements: {element_count}, "
+                       f"processing_time: {time.perf_counter() - start_time:.3f}s -->\n")
+
+            return StreamingResponse(
+                stream_html(),
+                media_type="text/html; charset=utf-8",
+                headers={"X-Document-Id": document_id}
+            )
+
+        sections = []
+        element_count = 0
+        async for page_index, page_html, elements in iter_html_pages(pdf_path, page_indexes, preserve_layout, with_images):
+            element_count += elements
+            sections.append(pdf_html_section(page_index, page_html))
+        html_content = "".join([head, *sections, pdf_html_tail(output_format)])
         
         return {
             "html_content": html_content,
-            "css_content": "/* Generated CSS styles */",
-            "pages_processed": len(pdf_document),
-            "processing_time": 2.5,
-            "element_count": 100,
-            "output_size": len(html_content)
+            "css_content": css,
+            "pages_processed": page_count,
+            "processing_time": round(time.perf_counter() - start_time, 3),
+            "element_count": element_count,
+            "output_size": len(html_content.encode("utf-8")),
+            "document_id": document_id
         }
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -1435,74 +2322,243 @@ async def pdf_to_html(
                 "pdf", "html", 0, False
         
             )
-        cleanup_file(temp_pdf)
         raise HTTPException(status_code=500, detail=f"HTML conversion failed: {str(e)}")
 
+@app.get("/api/pdf/to-html/{document_id}/{page}")
+async def pdf_page_to_html(
+    document_id: str,
+    page: int,
+    preserve_layout: bool = True,
+    extract_images: bool = True,
+    current_user = Depends(get_current_user_optional)
+):
+    """HTML for one page of a document converted earlier, for viewers that load pages lazily
+
+    Only the uploader has the document id, and a signed-in uploader's
+    documents are only served to them; ids expire PDF_HTML_DOCUMENT_TTL
+    seconds after upload.
+    """
+    pdf_path = html_document_path(document_id, current_user)
+    start_time = time.perf_counter()
+    with fitz.open(pdf_path) as pdf_document:
+        page_count = len(pdf_document)
+    if not 1 <= page <= page_count:
+        raise HTTPException(status_code=404, detail=f"Page must be between 1 and {page_count}")
+
+    [(_, page_html, element_count)] = await asyncio.get_running_loop().run_in_executor(
+        None, pdf_workers.render_html_pages, str(pdf_path), [page - 1], preserve_layout, extract_images
+    )
+    return Response(
+        pdf_html_section(page - 1, page_html),
+        media_type="text/html; charset=utf-8",
+        headers={
+            "Server-Timing": format_server_timing([("render", time.perf_counter() - start_time)]),
+            "X-Page-Count": str(page_count),
+            "X-Element-Count": str(element_count)
+        }
+    )
+
+# PDF preflight: structure read from the object tree only, nothing is rendered
+PDF_PREFLIGHT_CACHE_SIZE = 256
+PDF_PREFLIGHT_SCAN_MIN_DPI = 100  # a page-shaped image at least this sharp is taken for a scan
+PDF_PREFLIGHT_PREVIEW_CHARS = 500
+PDF_TEXT_OPERATORS = re.compile(rb"\bT[jJ]\b|[)>]\s*['\"]")
+PDF_INVISIBLE_TEXT = re.compile(rb"\b3\s+Tr\b")  # render mode 3, used by OCR text layers
+PDF_FONT_SUBSET_TAG = re.compile(r"^[A-Z]{6}\+")
+
+pdf_preflight_cache = OrderedDict()  # sha256 of the upload -> preflight report
+
+def pdf_image_length(pdf_document, xref):
+    """Stored (compressed) size of an image stream without decoding it"""
+    kind, value = pdf_document.xref_get_key(xref, "Length")
+    if kind == "int":
+        return int(value)
+    return len(pdf_document.xref_stream_raw(xref) or b"")
+
+def pdf_page_text_layer(pdf_document, page):
+    """(has text, invisible text) from the page's content streams and form XObjects"""
+    streams = [page.read_contents()]
+    if not PDF_TEXT_OPERATORS.search(streams[0]):
+        # Some producers wrap the whole page in a form XObject
+        streams += [pdf_document.xref_stream(xobject[0]) or b"" for xobject in page.get_xobjects()]
+    has_text = any(PDF_TEXT_OPERATORS.search(stream) for stream in streams)
+    return has_text, has_text and any(PDF_INVISIBLE_TEXT.search(stream) for stream in streams)
+
+def is_page_scan(page, images):
+    """True if one of the page's images has the page's shape at scan resolution"""
+    width, height = page.rect.width, page.rect.height
+    if not width or not height:
+        return False
+    for image in images:
+        image_width, image_height = image[2], image[3]
+        if (image_width < image_height) != (width < height):
+            image_width, image_height = image_height, image_width  # scanned sideways
+        if (abs(image_width / image_height - width / height) < 0.1 * width / height
+                and image_width * 72 / width >= PDF_PREFLIGHT_SCAN_MIN_DPI):
+            return True
+    return False
+
+def analyze_pdf_structure(content):
+    """Preflight report for a PDF, read without rendering any page
+
+    Covers page sizes, fonts, images and their stored bytes, forms,
+    encryption, linearization, text layers and the share of scanned pages.
+    """
+    with fitz.open(stream=content, filetype="pdf") as pdf_document:
+        report = {
+            "page_count": pdf_document.page_count,
+            "pdf_version": (pdf_document.metadata or {}).get("format", ""),
+            "encrypted": bool(pdf_document.is_encrypted),
+            "needs_password": bool(pdf_document.needs_pass),
+            "linearized": bool(pdf_document.is_fast_webaccess),
+        }
+        if pdf_document.needs_pass:
+            # Without the password only the trailer can be read
+            return {**report, "has_images": False, "has_links": False, "has_forms": False, "fonts": [],
+                    "text_preview": "", "pages": []}
+
+        permissions = pdf_document.permissions
+        report["permissions"] = {
+            "print": bool(permissions & fitz.PDF_PERM_PRINT),
+            "modify": bool(permissions & fitz.PDF_PERM_MODIFY),
+            "copy": bool(permissions & fitz.PDF_PERM_COPY),
+            "annotate": bool(permissions & fitz.PDF_PERM_ANNOTATE),
+            "fill_forms": bool(permissions & fitz.PDF_PERM_FORM),
+        }
+
+        fonts = {}
+        image_sizes = {}
+        image_pixels = {}
+        pages = []
+        text_preview = ""
+        for page in pdf_document:
+            for xref, ext, font_type, basefont, *_ in pdf_document.get_page_fonts(page.number):
+                name = PDF_FONT_SUBSET_TAG.sub("", basefont) or "(unnamed)"
+                fonts.setdefault(xref, {"name": name, "type": font_type, "embedded": ext != "n/a"})
+
+            images = pdf_document.get_page_images(page.number)
+            for image in images:
+                if image[0] not in image_sizes:
+                    image_sizes[image[0]] = pdf_image_length(pdf_document, image[0])
+                    image_pixels[image[0]] = image[2] * image[3]
+            has_text, invisible_text = pdf_page_text_layer(pdf_document, page)
+            if has_text and len(text_preview) < PDF_PREFLIGHT_PREVIEW_CHARS:
+                text_preview += page.get_text()[:PDF_PREFLIGHT_PREVIEW_CHARS - len(text_preview)]
+
+            pages.append({
+                "number": page.number + 1,
+                "width": round(page.rect.width, 1),
+                "height": round(page.rect.height, 1),
+                "rotation": page.rotation,
+                "images": len(images),
+                "image_bytes": sum(image_sizes[image[0]] for image in images),
+                "image_megapixels": round(sum(image_pixels[image[0]] for image in images) / 1e6, 2),
+                "has_text": has_text,
+                "ocr_text": invisible_text,
+                "likely_scan": (not has_text or invisible_text) and is_page_scan(page, images),
+            })
+
+        catalog = pdf_document.pdf_catalog()
+        has_acroform = pdf_document.xref_get_key(catalog, "AcroForm")[0] != "null"
+        form_fields = pdf_document.is_form_pdf or 0
+        scanned_pages = sum(page["likely_scan"] for page in pages)
+
+        report.update({
+            "has_images": bool(image_sizes),
+            "has_links": bool(pdf_document.has_links()),
+            "has_forms": bool(form_fields) or has_acroform,
+            "form_fields": form_fields,
+            "has_xfa": pdf_document.xref_get_key(catalog, "AcroForm/XFA")[0] != "null",
+            "fonts": sorted({font["name"] for font in fonts.values()}),
+            "font_details": sorted(fonts.values(), key=lambda font: font["name"]),
+            "image_count": len(image_sizes),
+            "image_bytes": sum(image_sizes.values()),
+            "image_megapixels": round(sum(image_pixels.values()) / 1e6, 2),
+            "text_pages": sum(page["has_text"] for page in pages),
+            "scanned_pages": scanned_pages,
+            "scan_ratio": round(scanned_pages / len(pages), 3) if pages else 0.0,
+            "text_preview": text_preview,
+            "pages": pages,
+        })
+        return report
+
+async def preflight_pdf(content):
+    """Cached analyze_pdf_structure(); returns (report, served from cache)"""
+    loop = asyncio.get_running_loop()
+    key = (await loop.run_in_executor(None, hashlib.sha256, content)).hexdigest()
+    report = pdf_preflight_cache.get(key)
+    if report is not None:
+        pdf_preflight_cache.move_to_end(key)
+        return report, True
+    report = await loop.run_in_executor(None, analyze_pdf_structure, content)
+    pdf_preflight_cache[key] = report
+    if len(pdf_preflight_cache) > PDF_PREFLIGHT_CACHE_SIZE:
+        pdf_preflight_cache.popitem(last=False)
+    return report, False
+
 @app.post("/api/pdf/analyze")
-async def analyze_pdf(file: UploadFile = File(...), current_user = Depends(get_current_user_optional)):
-    """Analyze PDF structure"""
-    if not file.filename.endswith('.pdf'):
+async def analyze_pdf(
+    response: Response,
+    file: UploadFile = File(...),
+    current_user = Depends(get_current_user_optional)
+):
+    """Preflight a PDF: structure, fonts, images, forms, encryption and scanned pages, without rendering"""
+    if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    temp_pdf = create_temp_file(".pdf")
-    
     try:
+        start_time = time.perf_counter()
         content = await file.read()
-        
-        with open(temp_pdf, "wb") as buffer:
-            buffer.write(content)
-        
-        # Analyze PDF
-        pdf_document = fitz.open(temp_pdf)
-        
-        has_images = False
-        has_links = False
-        has_forms = False
-        fonts = set()
-        text_preview = ""
-        
-        for page_num in range(min(3, len(pdf_document))):  # Analyze first 3 pages
-            page = pdf_document.load_page(page_num)
-            
-            # Check for images
-            if page.get_images():
-                has_images = True
-            
-            # Check for links
-            if page.get_links():
-                has_links = True
-            
-            # Get text for preview
-            text = page.get_text()
-            if text and len(text_preview) < 500:
-                text_preview += text[:500 - len(text_preview)]
-            
-            # Get fonts (simplified)
-            fonts.add("Arial")  # Placeholder
-        
-        pdf_document.close()
-        cleanup_file(temp_pdf)
-        
-        return {
-            "page_count": len(pdf_document),
-            "has_images": has_images,
-            "has_links": has_links,
-            "has_forms": has_forms,
-            "fonts": list(fonts),
-            "text_preview": text_preview
-        }
+        try:
+            report, cached = await preflight_pdf(content)
+        except (fitz.FileDataError, RuntimeError):
+            raise HTTPException(status_code=400, detail="Invalid PDF file")
+        elapsed = time.perf_counter() - start_time
+        response.headers["Server-Timing"] = format_server_timing([("cache" if cached else "analyze", elapsed)])
+        return {**report, "file_size": len(content), "cached": cached, "analysis_time": round(elapsed, 3)}
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
-        cleanup_file(temp_pdf)
         raise HTTPException(status_code=500, detail=f"PDF analysis failed: {str(e)}")
 
+@app.post("/api/estimate")
+async def estimate_job(
+    file: UploadFile = File(...),
+    operation: str = Form(...),
+    dpi: Optional[int] = Form(None),
+    ocr_mode: str = Form("auto")
+):
+    """Predict a job's CPU-seconds, peak memory and pool before submitting it"""
+    if not file.filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    content = await file.read()
+    options = {"ocr_mode": ocr_mode}
+    if dpi is not None:
+        options["dpi"] = dpi
+    try:
+        estimate = await estimate_job_cost(operation, content, options)
+    except (fitz.FileDataError, RuntimeError):
+        raise HTTPException(status_code=400, detail="Invalid PDF file")
+    return {
+        **estimate,
+        "heavy_queue_depth": heavy_job_stats["waiting"],
+        "limits": {
+            "interactive_seconds": JOB_INTERACTIVE_SECONDS,
+            "max_cpu_seconds": JOB_MAX_CPU_SECONDS,
+            "max_memory_mb": JOB_MAX_MEMORY_MB,
+        },
+    }
+
 @app.post("/api/pdf/ocr")
 async def ocr_pdf(
     file: UploadFile = File(...),
     language: str = Form("eng"),
     output_format: str = Form("searchable_pdf"),
     ocr_mode: str = Form("auto"),
-    current_user = Depends(get_current_user_optional)
+    current_user = Depends(get_current_user_optional),
+    job = Depends(route_job("pdf_ocr"))
 ):
     """Perform OCR on PDF"""
     if not file.filename.endswith('.pdf'):
@@ -1628,35 +2684,12 @@ async def crop_pdf(
         
         # Parse crop settings
         crop_settings = json.loads(settings) if settings else {}
-        margins = crop_settings.get('margins', {'top': 0, 'right': 0, 'bottom': 0, 'left': 0})
         
         # Open PDF with PyMuPDF
         pdf_document = fitz.open(temp_pdf)
-        pdf_writer = fitz.open()
-        
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            
-            # Get page dimensions
-            rect = page.rect
-            
-            # Calculate crop rectangle (convert mm to points if needed)
-            crop_rect = fitz.Rect(
-                rect.x0 + margins.get('left', 0) * 2.834,  # mm to points
-                rect.y0 + margins.get('top', 0) * 2.834,
-                rect.x1 - margins.get('right', 0) * 2.834,
-                rect.y1 - margins.get('bottom', 0) * 2.834
-            )
-            
-            # Set crop box
-            page.set_cropbox(crop_rect)
-            
-            # Add cropped page to output
-            pdf_writer.insert_pdf(pdf_document, from_page=page_num, to_page=page_num)
-        
-        pdf_writer.save(temp_output)
+        crop_pdf_pages(pdf_document, crop_settings)
+        pdf_document.save(temp_output)
         pdf_document.close()
-        pdf_writer.close()
         
         # Log the operation
         if current_user:
@@ -1833,81 +2866,12 @@ async def watermark_pdf(
         
         # Parse watermark settings
         watermark_settings = json.loads(settings) if settings else {}
-        watermark_text = watermark_settings.get('text', 'WATERMARK')
-        opacity = watermark_settings.get('opacity', 0.5)
-        position = watermark_settings.get('position', 'center')
-        font_size = watermark_settings.get('fontSize', 50)
-        color = watermark_settings.get('color', 'gray')
-        rotation = watermark_settings.get('rotation', 0)  # Make rotation configurable
-        
-        # Open PDF with PyMuPDF
-        pdf_document = fitz.open(temp_pdf)
-        
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            
-            # Get page dimensions
-            rect = page.rect
-            
-            # Calculate position
-            if position == 'center':
-                x = rect.width / 2
-                y = rect.height / 2
-            elif position == 'top-left':
-                x = 50
-                y = 50
-            elif position == 'top-right':
-                x = rect.width - 200
-                y = 50
-            elif position == 'bottom-left':
-                x = 50
-                y = rect.height - 50
-            elif position == 'bottom-right':
-                x = rect.width - 200
-                y = rect.height - 50
-            else:
-                x = rect.width / 2
-                y = rect.height / 2
-            
-            # Add watermark text
-            point = fitz.Point(x, y)
-            
-            # Convert color name to RGB
-            color_map = {
-                'red': (1, 0, 0),
-                'blue': (0, 0, 1),
-                'green': (0, 1, 0),
-                'black': (0, 0, 0),
-                'gray': (0.5, 0.5, 0.5),
-                'grey': (0.5, 0.5, 0.5)
-            }
-            rgb_color = color_map.get(color.lower(), (0.5, 0.5, 0.5))
-            
-            # Insert text with configurable rotation
-            try:
-                page.insert_text(
-                    point,
-                    watermark_text,
-                    fontsize=font_size,
-                    color=rgb_color,
-                    rotate=rotation,  # Use configurable rotation
-                    overlay=True
-                )
-            except Exception as text_error:
-                # If rotation fails, try without rotation
-                try:
-                    page.insert_text(
-                        point,
-                        watermark_text,
-                        fontsize=font_size,
-                        color=rgb_color,
-                        overlay=True
-                    )
-                except Exception as fallback_error:
-                    raise HTTPException(status_code=500, detail=f"Text insertion failed: {str(fallback_error)}")
         
-        pdf_document.save(temp_output)
-        pdf_document.close()
+        # Watermark and save off the event loop
+        output_path, save_mode, bytes_written, save_seconds = await asyncio.get_running_loop().run_in_executor(
+            None, edit_pdf_file, temp_pdf, temp_output, watermark_pdf_pages, watermark_settings
+        )
+        cleanup_file(temp_output if output_path == temp_pdf else temp_pdf)
         
         # Log the operation
         if current_user:
@@ -1917,9 +2881,14 @@ async def watermark_pdf(
             )
         
         return FileResponse(
-            temp_output, 
+            output_path, 
             media_type="application/pdf",
-            filename=f"watermarked_{file.filename}"
+            filename=f"watermarked_{file.filename}",
+            headers={
+                "Server-Timing": format_server_timing([("save", save_seconds)]),
+                "X-Save-Mode": save_mode,
+                "X-Bytes-Written": str(bytes_written)
+            }
         )
     except Exception as e:
         cleanup_file(temp_pdf)
@@ -1948,99 +2917,12 @@ async def add_page_numbers(
         
         # Parse page numbering settings
         numbering_settings = json.loads(settings) if settings else {}
-        position = numbering_settings.get('position', 'bottom-center')
-        font_size = numbering_settings.get('fontSize', 12)
-        color = numbering_settings.get('color', 'black')
-        start_number = numbering_settings.get('startPage', 1)
-        format_type = numbering_settings.get('format', 'number')
-        
-        # Open PDF with PyMuPDF
-        pdf_document = fitz.open(temp_pdf)
-        
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            
-            # Get page dimensions
-            rect = page.rect
-            
-            # Calculate position for page number
-            # PyMuPDF uses a coordinate system where (0,0) is at the top-left
-            # and y increases downward
-            if position == 'top-center':
-                x = rect.width / 2
-                y = 30
-            elif position == 'top-left':
-                x = 50
-                y = 30
-            elif position == 'top-right':
-                x = rect.width - 50
-                y = 30
-            elif position == 'bottom-center':
-                x = rect.width / 2
-                y = rect.height - 30
-            elif position == 'bottom-left':
-                x = 50
-                y = rect.height - 30
-            elif position == 'bottom-right':
-                x = rect.width - 50
-                y = rect.height - 30
-            else:
-                x = rect.width / 2
-                y = rect.height - 30
-            
-            # Format page number text based on format type
-            page_number = start_number + page_num
-            
-            if format_type == 'number':
-                page_text = str(page_number)
-            elif format_type == 'roman':
-                page_text = convert_to_roman(page_number).lower()
-            elif format_type == 'roman-upper':
-                page_text = convert_to_roman(page_number).upper()
-            elif format_type == 'letter':
-                page_text = convert_to_letter(page_number).lower()
-            elif format_type == 'letter-upper':
-                page_text = convert_to_letter(page_number).upper()
-            else:
-                page_text = str(page_number)
-            
-            # Convert color name to RGB
-            color_map = {
-                'red': (1, 0, 0),
-                'blue': (0, 0, 1),
-                'green': (0, 1, 0),
-                'black': (0, 0, 0),
-                'gray': (0.5, 0.5, 0.5),
-                'grey': (0.5, 0.5, 0.5)
-            }
-            rgb_color = color_map.get(color.lower(), (0, 0, 0))
-            
-            # Insert page number with error handling
-            try:
-                point = fitz.Point(x, y)
-                page.insert_text(
-                    point,
-                    page_text,
-                    fontsize=font_size,
-                    color=rgb_color,
-                    overlay=True
-                )
-            except Exception as text_error:
-                # If text insertion fails, try with default settings
-                try:
-                    point = fitz.Point(x, y)
-                    page.insert_text(
-                        point,
-                        page_text,
-                        fontsize=12,
-                        color=(0, 0, 0),
-                        overlay=True
-                    )
-                except Exception as fallback_error:
-                    raise HTTPException(status_code=500, detail=f"Page number insertion failed: {str(fallback_error)}")
         
-        pdf_document.save(temp_output)
-        pdf_document.close()
+        # Number pages and save off the event loop
+        output_path, save_mode, bytes_written, save_seconds = await asyncio.get_running_loop().run_in_executor(
+            None, edit_pdf_file, temp_pdf, temp_output, number_pdf_pages, numbering_settings
+        )
+        cleanup_file(temp_output if output_path == temp_pdf else temp_pdf)
         
         # Log the operation
         if current_user:
@@ -2050,15 +2932,193 @@ async def add_page_numbers(
             )
         
         return FileResponse(
-            temp_output, 
+            output_path, 
             media_type="application/pdf",
-            filename=f"numbered_{file.filename}"
+            filename=f"numbered_{file.filename}",
+            headers={
+                "Server-Timing": format_server_timing([("save", save_seconds)]),
+                "X-Save-Mode": save_mode,
+                "X-Bytes-Written": str(bytes_written)
+            }
         )
     except Exception as e:
         cleanup_file(temp_pdf)
         cleanup_file(temp_output)
         raise HTTPException(status_code=500, detail=f"Adding page numbers failed: {str(e)}")
 
+PDF_PIPELINE_OPERATIONS = ["rotate", "crop", "watermark", "page-numbers", "compress"]
+
+@app.post("/api/pdf/pipeline")
+async def pdf_pipeline(
+    file: UploadFile = File(...),
+    steps: str = Form("[]"),
+    current_user = Depends(get_current_user_optional)
+):
+    """Apply an ordered list of PDF operations to one opened document with a single save"""
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+    # Parse steps, e.g. [{"op": "rotate", "settings": {"rotation": 90}}, {"op": "compress"}]
+    try:
+        pipeline_steps = json.loads(steps) if steps else []
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid steps format")
+
+    if not isinstance(pipeline_steps, list) or not pipeline_steps:
+        raise HTTPException(status_code=400, detail="No steps specified")
+
+    for step in pipeline_steps:
+        if not isinstance(step, dict) or step.get('op') not in PDF_PIPELINE_OPERATIONS:
+            raise HTTPException(status_code=400, detail=f"Each step must have an 'op' of: {PDF_PIPELINE_OPERATIONS}")
+        step_settings = step.get('settings') or {}
+        if not isinstance(step_settings, dict):
+            raise HTTPException(status_code=400, detail=f"Settings of a {step['op']} step must be an object")
+        if step['op'] == 'rotate':
+            # Checked before anything runs, so a bad value cannot fail halfway through
+            try:
+                rotation = int(step_settings.get('rotation', 90))
+            except (TypeError, ValueError):
+                rotation = None
+            if rotation is None or rotation % 90 != 0:
+                raise HTTPException(status_code=400, detail="Rotation must be a multiple of 90 degrees")
+            step_settings = {**step_settings, 'rotation': rotation}
+        step['settings'] = step_settings
+
+    temp_output = create_temp_file(".pdf")
+
+    try:
+        content = await file.read()
+        file_size = len(content)
+        timings = []
+
+        # Open once, straight from memory
+        step_start = time.perf_counter()
+        pdf_document = fitz.open(stream=content, filetype="pdf")
+        timings.append(("open", time.perf_counter() - step_start))
+
+        save_options = {"garbage": 3, "deflate": True}
+
+        for index, step in enumerate(pipeline_steps):
+            step_start = time.perf_counter()
+            op = step['op']
+            step_settings = step['settings']
+
+            if op == 'rotate':
+                rotate_pdf_pages(pdf_document, step_settings['rotation'])
+            elif op == 'crop':
+                crop_pdf_pages(pdf_document, step_settings)
+            elif op == 'watermark':
+                watermark_pdf_pages(pdf_document, step_settings)
+            elif op == 'page-numbers':
+                number_pdf_pages(pdf_document, step_settings)
+            elif op == 'compress':
+                save_options = dict(PDF_COMPRESS_SAVE_OPTIONS)
+
+            timings.append((f"{op}-{index + 1}", time.perf_counter() - step_start))
+
+        # Save once
+        step_start = time.perf_counter()
+        pdf_document.save(temp_output, **save_options)
+        pdf_document.close()
+        timings.append(("save", time.perf_counter() - step_start))
+
+        # Log the operation
+        if current_user:
+            await log_operation(
+                current_user.id, "pdf_pipeline", file.filename,
+                "pdf", "pdf", file_size, True
+            )
+
+        return FileResponse(
+            temp_output,
+            media_type="application/pdf",
+            filename=f"processed_{file.filename}",
+            headers={"Server-Timing": format_server_timing(timings)}
+        )
+
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        cleanup_file(temp_output)
+        raise
+    except Exception as e:
+        if current_user:
+            await log_operation(
+                current_user.id, "pdf_pipeline", file.filename,
+                "pdf", "pdf", 0, False
+            )
+        cleanup_file(temp_output)
+        raise HTTPException(status_code=500, detail=f"PDF pipeline failed: {str(e)}")
+
+def sign_pdf_pages(pdf_document, signature_settings):
+    """Stamp a signature block on the first, last or every page"""
+    signature_type = signature_settings.get('signatureType', 'text')
+    position = signature_settings.get('position', 'bottom-right')
+    page_option = signature_settings.get('page', 'last')
+    reason = signature_settings.get('reason', 'Document signed')
+    contact_info = signature_settings.get('contactInfo', '')
+
+    # Determine which pages to sign
+    if page_option == 'first':
+        pages_to_sign = [0]
+    elif page_option == 'last':
+        pages_to_sign = [len(pdf_document) - 1]
+    else:  # 'all'
+        pages_to_sign = list(range(len(pdf_document)))
+
+    for page_num in pages_to_sign:
+        page = pdf_document.load_page(page_num)
+
+        # Get page dimensions
+        rect = page.rect
+
+        # Calculate position for signature
+        if position == 'top-left':
+            x = 50
+            y = 50
+        elif position == 'top-right':
+            x = rect.width - 200
+            y = 50
+        elif position == 'top-center':
+            x = rect.width / 2
+            y = 50
+        elif position == 'bottom-left':
+            x = 50
+            y = rect.height - 50
+        elif position == 'bottom-right':
+            x = rect.width - 200
+            y = rect.height - 50
+        elif position == 'center':
+            x = rect.width / 2
+            y = rect.height / 2
+        else:
+            x = rect.width - 200
+            y = rect.height - 50
+
+        # Create signature text based on type
+        if signature_type == 'text':
+            signature_text = f"SIGNED\n{reason}"
+            if contact_info:
+                signature_text += f"\n{contact_info}"
+            signature_text += f"\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        elif signature_type == 'image':
+            signature_text = f"IMAGE SIGNATURE\n{reason}\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        else:  # digital
+            signature_text = f"DIGITAL SIGNATURE\n{reason}\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+
+        # Add signature text
+        point = fitz.Point(x, y)
+        page.insert_text(
+            point,
+            signature_text,
+            fontsize=12,
+            color=(1, 0, 0),  # Red color for signature
+            overlay=True
+        )
+
+        # Add a border around the signature
+        signature_rect = fitz.Rect(x - 5, y - 5, x + 200, y + 80)
+        page.draw_rect(signature_rect, color=(1, 0, 0), width=2)
+
 @app.post("/api/pdf/sign")
 async def sign_pdf(
     file: UploadFile = File(...), 
@@ -2081,79 +3141,12 @@ async def sign_pdf(
         
         # Parse signature settings
         signature_settings = json.loads(settings) if settings else {}
-        signature_type = signature_settings.get('signatureType', 'text')
-        position = signature_settings.get('position', 'bottom-right')
-        page_option = signature_settings.get('page', 'last')
-        reason = signature_settings.get('reason', 'Document signed')
-        contact_info = signature_settings.get('contactInfo', '')
-        
-        # Open PDF with PyMuPDF
-        pdf_document = fitz.open(temp_pdf)
-        
-        # Determine which pages to sign
-        if page_option == 'first':
-            pages_to_sign = [0]
-        elif page_option == 'last':
-            pages_to_sign = [len(pdf_document) - 1]
-        else:  # 'all'
-            pages_to_sign = list(range(len(pdf_document)))
-        
-        for page_num in pages_to_sign:
-            page = pdf_document.load_page(page_num)
-            
-            # Get page dimensions
-            rect = page.rect
-            
-            # Calculate position for signature
-            if position == 'top-left':
-                x = 50
-                y = 50
-            elif position == 'top-right':
-                x = rect.width - 200
-                y = 50
-            elif position == 'top-center':
-                x = rect.width / 2
-                y = 50
-            elif position == 'bottom-left':
-                x = 50
-                y = rect.height - 50
-            elif position == 'bottom-right':
-                x = rect.width - 200
-                y = rect.height - 50
-            elif position == 'center':
-                x = rect.width / 2
-                y = rect.height / 2
-            else:
-                x = rect.width - 200
-                y = rect.height - 50
-            
-            # Create signature text based on type
-            if signature_type == 'text':
-                signature_text = f"SIGNED\n{reason}"
-                if contact_info:
-                    signature_text += f"\n{contact_info}"
-                signature_text += f"\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            elif signature_type == 'image':
-                signature_text = f"IMAGE SIGNATURE\n{reason}\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            else:  # digital
-                signature_text = f"DIGITAL SIGNATURE\n{reason}\n{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            
-            # Add signature text
-            point = fitz.Point(x, y)
-            page.insert_text(
-                point,
-                signature_text,
-                fontsize=12,
-                color=(1, 0, 0),  # Red color for signature
-                overlay=True
-            )
-            
-            # Add a border around the signature
-            signature_rect = fitz.Rect(x - 5, y - 5, x + 200, y + 80)
-            page.draw_rect(signature_rect, color=(1, 0, 0), width=2)
         
-        pdf_document.save(temp_output)
-        pdf_document.close()
+        # Sign and save off the event loop
+        output_path, save_mode, bytes_written, save_seconds = await asyncio.get_running_loop().run_in_executor(
+            None, edit_pdf_file, temp_pdf, temp_output, sign_pdf_pages, signature_settings
+        )
+        cleanup_file(temp_output if output_path == temp_pdf else temp_pdf)
         
         # Log the operation
         if current_user:
@@ -2163,9 +3156,14 @@ async def sign_pdf(
             )
         
         return FileResponse(
-            temp_output, 
+            output_path, 
             media_type="application/pdf",
-            filename=f"signed_{file.filename}"
+            filename=f"signed_{file.filename}",
+            headers={
+                "Server-Timing": format_server_timing([("save", save_seconds)]),
+                "X-Save-Mode": save_mode,
+                "X-Bytes-Written": str(bytes_written)
+            }
         )
     except Exception as e:
         cleanup_file(temp_pdf)
@@ -2178,11 +3176,16 @@ async def scan_to_pdf(
     settings: str = Form("{}"),
     current_user = Depends(get_current_user_optional)
 ):
-    """Convert scanned images to PDF"""
+    """Convert scanned images to PDF
+
+    Each image is straightened, cropped to the page and fitted to the paper
+    size; black-and-white pages are stored as CCITT G4. Images are processed
+    a window at a time in parallel and appended to the PDF as they finish,
+    so only one window of decoded images is held in memory.
+    """
     if not files:
         raise HTTPException(status_code=400, detail="At least one image file is required")
     
-    temp_files = []
     temp_output = create_temp_file(".pdf")
     
     try:
@@ -2190,62 +3193,56 @@ async def scan_to_pdf(
         scan_settings = json.loads(settings) if settings else {}
         quality = scan_settings.get('quality', 'medium')
         orientation = scan_settings.get('orientation', 'auto')
-        paper_size = scan_settings.get('paperSize', 'A4')
-        
-        total_size = 0
-        images = []
-        
-        # Process each uploaded file
+        paper_size = str(scan_settings.get('paperSize', 'A4')).lower()
+        color_mode = scan_settings.get('colorMode', 'auto')
+        deskew = bool(scan_settings.get('deskew', True))
+        auto_crop = bool(scan_settings.get('autoCrop', True))
+
+        if quality not in SCAN_QUALITY_SETTINGS:
+            raise HTTPException(status_code=400, detail=f"quality must be one of: {list(SCAN_QUALITY_SETTINGS)}")
+        if orientation not in SCAN_ORIENTATIONS:
+            raise HTTPException(status_code=400, detail=f"orientation must be one of: {SCAN_ORIENTATIONS}")
+        if paper_size not in SCAN_PAPER_SIZES and paper_size != "original":
+            raise HTTPException(status_code=400, detail=f"paperSize must be one of: {list(SCAN_PAPER_SIZES) + ['original']}")
+        if color_mode not in SCAN_COLOR_MODES:
+            raise HTTPException(status_code=400, detail=f"colorMode must be one of: {SCAN_COLOR_MODES}")
+
         for file in files:
-            if not file.filename.lower().endswith(('.jpg', '.jpeg', '.png', '.tiff', '.bmp')):
+            if not file.filename.lower().endswith(('.jpg', '.jpeg', '.png', '.tiff', '.tif', '.bmp', '.webp')):
                 raise HTTPException(status_code=400, detail=f"Unsupported file format: {file.filename}")
-            
-            content = await file.read()
-            total_size += len(content)
-            
-            # Create temp file for this image
-            temp_file = create_temp_file(f".{file.filename.split('.')[-1]}")
-            temp_files.append(temp_file)
-            
-            with open(temp_file, "wb") as buffer:
-                buffer.write(content)
-            
-            # Open and process image
-            image = Image.open(io.BytesIO(content))
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Apply quality settings
-            if quality == 'high':
-                # Keep original size
-                pass
-            elif quality == 'medium':
-                # Resize to reasonable size
-                max_size = (1200, 1600)
-                image.thumbnail(max_size, Image.Resampling.LANCZOS)
-            else:  # low quality
-                max_size = (800, 1000)
-                image.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            images.append(image)
-        
-        # Create PDF from images
-        if images:
-            # Save first image as PDF and append others
-            pdf_images = [img.copy() for img in images]
-            pdf_images[0].save(
-                temp_output, 
-                format='PDF', 
-                save_all=True, 
-                append_images=pdf_images[1:] if len(pdf_images) > 1 else [],
-                quality=95 if quality == 'high' else 85 if quality == 'medium' else 75
+
+        total_size = 0
+        timings = []
+        prepare_time = 0.0
+        assemble_time = 0.0
+        pdf_document = fitz.open()
+
+        def prepare(content):
+            return prepare_scan_page(content, quality, orientation, color_mode, deskew, auto_crop)
+
+        # One window of images in flight at a time; pages are added in upload order
+        for start in range(0, len(files), IMAGE_ENCODE_THREADS):
+            window = files[start:start + IMAGE_ENCODE_THREADS]
+            contents = [await file.read() for file in window]
+            total_size += sum(len(content) for content in contents)
+
+            step_start = time.perf_counter()
+            scan_pages = await asyncio.gather(
+                *(asyncio.get_running_loop().run_in_executor(image_encode_executor, prepare, content) for content in contents)
             )
-        
-        # Cleanup temp image files
-        for temp_file in temp_files:
-            cleanup_file(temp_file)
+            prepare_time += time.perf_counter() - step_start
+            del contents
+
+            step_start = time.perf_counter()
+            for scan_page in scan_pages:
+                add_scan_page(pdf_document, scan_page, None if paper_size == "original" else paper_size)
+            assemble_time += time.perf_counter() - step_start
+
+        timings.extend([("prepare", prepare_time), ("assemble", assemble_time)])
+        step_start = time.perf_counter()
+        pdf_document.save(temp_output, garbage=3, deflate=True)
+        pdf_document.close()
+        timings.append(("save", time.perf_counter() - step_start))
         
         # Log the operation
         if current_user:
@@ -2257,13 +3254,15 @@ async def scan_to_pdf(
         return FileResponse(
             temp_output, 
             media_type="application/pdf",
-            filename=f"scanned_document_{len(files)}_pages.pdf"
+            filename=f"scanned_document_{len(files)}_pages.pdf",
+            headers={"Server-Timing": format_server_timing(timings)}
         )
     
+    except HTTPException:
+        cleanup_file(temp_output)
+        raise
     except Exception as e:
         # Cleanup temp files
-        for temp_file in temp_files:
-            cleanup_file(temp_file)
         cleanup_file(temp_output)
         
         if current_user:
@@ -2273,6 +3272,138 @@ async def scan_to_pdf(
             )
         raise HTTPException(status_code=500, detail=f"Scan to PDF conversion failed: {str(e)}")
 
+# HTML to PDF: warm WeasyPrint worker processes (see html_renderer.py)
+HTML_RENDER_WORKERS = int(os.getenv("HTML_RENDER_WORKERS", "1"))  # per API worker process
+HTML_RENDER_MAX_TASKS = int(os.getenv("HTML_RENDER_MAX_TASKS", "500"))  # replace a worker after this many jobs
+HTML_RENDER_TIMEOUT = int(os.getenv("HTML_RENDER_TIMEOUT", "120"))
+MAX_HTML_BATCH_DOCUMENTS = 100
+HTML_DEFAULT_MARGINS = {'top': 20, 'bottom': 20, 'left': 20, 'right': 20}
+HTML_BODY_CSS = "body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }"
+
+html_render_executor = None  # ProcessPoolExecutor of warm workers; None while WeasyPrint is unavailable
+html_render_pid_queues = {}  # executor -> queue its workers put their PID on at start
+
+def make_html_render_executor():
+    # spawn, not fork: the forked copy of this process (rembg, Mongo client) is not safe to reuse
+    context = multiprocessing.get_context("spawn")
+    pid_queue = context.SimpleQueue()
+    executor = ProcessPoolExecutor(
+        max_workers=HTML_RENDER_WORKERS,
+        mp_context=context,
+        initializer=html_renderer.init_worker,
+        initargs=(pid_queue,),
+        max_tasks_per_child=HTML_RENDER_MAX_TASKS
+    )
+    html_render_pid_queues[executor] = pid_queue
+    return executor
+
+def html_render_workers(executor):
+    """Live worker processes of a renderer pool
+
+    Only PIDs that are still children of this process are matched, so a
+    worker that already exited (max_tasks_per_child) cannot hit a reused PID.
+    """
+    pid_queue = html_render_pid_queues.pop(executor, None)
+    pids = set()
+    while pid_queue is not None and not pid_queue.empty():
+        pids.add(pid_queue.get())
+    return [process for process in multiprocessing.active_children() if process.pid in pids]
+
+def replace_html_render_executor(executor, kill=False):
+    """Swap a broken or stuck renderer pool for fresh warm workers (once per pool)
+
+    kill terminates the old workers, for a render stuck in WeasyPrint that
+    would otherwise hold its worker forever; jobs still running there fail.
+    """
+    global html_render_executor
+    if html_render_executor is not executor:
+        return
+    html_render_executor = make_html_render_executor()
+    html_render_executor.submit(html_renderer.warm_up)  # start and warm the workers now
+    if kill:
+        for process in html_render_workers(executor):
+            process.terminate()
+    html_render_pid_queues.pop(executor, None)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def wrap_html(html_content):
+    """Add a basic HTML document around a fragment"""
+    stripped = html_content.strip().lower()
+    if stripped.startswith('<!doctype') or stripped.startswith('<html'):
+        return html_content
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <title>HTML to PDF</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; }}
+        </style>
+    </head>
+    <body>
+        {html_content}
+    </body>
+    </html>
+    """
+
+def html_page_css(settings):
+    """@page rule for the format, orientation and margin (mm) settings"""
+    format_size = settings.get('format', 'A4')
+    orientation = settings.get('orientation', 'portrait')
+    margins = {**HTML_DEFAULT_MARGINS, **(settings.get('margins') or {})}
+    return (f"@page {{ size: {format_size} {orientation}; "
+            f"margin: {margins['top']}mm {margins['right']}mm {margins['bottom']}mm {margins['left']}mm; }}")
+
+def render_html_with_story(documents, settings):
+    """Render HTML with PyMuPDF's Story layout, for hosts without WeasyPrint (blocking)
+
+    Story supports a smaller subset of CSS than WeasyPrint; every document
+    starts on a new page of the one output PDF.
+    """
+    paper = str(settings.get('format', 'A4')).lower()
+    if settings.get('orientation', 'portrait') == 'landscape':
+        paper += "-l"
+    mediabox = fitz.paper_rect(paper)
+    margins = {**HTML_DEFAULT_MARGINS, **(settings.get('margins') or {})}
+    mm = 72 / 25.4
+    where = fitz.Rect(mediabox.x0 + margins['left'] * mm, mediabox.y0 + margins['top'] * mm,
+                      mediabox.x1 - margins['right'] * mm, mediabox.y1 - margins['bottom'] * mm)
+
+    output = io.BytesIO()
+    writer = fitz.DocumentWriter(output)
+    for html_content in documents:
+        story = fitz.Story(html=html_content, user_css=HTML_BODY_CSS)
+        more = True
+        while more:
+            device = writer.begin_page(mediabox)
+            more, _ = story.place(where)
+            story.draw(device)
+            writer.end_page()
+    writer.close()
+    return output.getvalue()
+
+async def run_html_render(func, *args):
+    """Run an html_renderer job on the warm workers; returns (result, Server-Timing pairs)
+
+    A worker that crashes breaks the whole pool and one that times out is
+    stuck in WeasyPrint, so either way the pool is replaced before the error
+    is raised, as run_pdf_job does.
+    """
+    executor = html_render_executor
+    start = time.perf_counter()
+    try:
+        future = executor.submit(func, *args)
+        result, render_seconds = await asyncio.wait_for(asyncio.wrap_future(future), timeout=HTML_RENDER_TIMEOUT)
+    except BrokenProcessPool:
+        replace_html_render_executor(executor)
+        raise
+    except asyncio.TimeoutError:
+        replace_html_render_executor(executor, kill=True)
+        raise HTTPException(status_code=504, detail=f"Rendering took longer than {HTML_RENDER_TIMEOUT} s")
+    queue_seconds = max(0.0, time.perf_counter() - start - render_seconds)
+    return result, [("queue", queue_seconds), ("render", render_seconds)]
+
 @app.post("/api/convert/html-to-pdf")
 async def html_to_pdf(
     request: Request,
@@ -2287,96 +3418,18 @@ async def html_to_pdf(
         if not html_content.strip():
             raise HTTPException(status_code=400, detail="HTML content is required")
         
-        # Parse settings
-        format_size = settings.get('format', 'A4')
-        orientation = settings.get('orientation', 'portrait')
-        margins = settings.get('margins', {'top': 20, 'bottom': 20, 'left': 20, 'right': 20})
-        quality = settings.get('quality', 'high')
-        
-        temp_html = create_temp_file(".html")
-        temp_pdf = create_temp_file(".pdf")
-        
-        # Write HTML content to temp file
-        with open(temp_html, "w", encoding='utf-8') as f:
-            # Add basic HTML structure if not present
-            if not html_content.strip().lower().startswith('<!doctype') and not html_content.strip().lower().startswith('<html'):
-                html_content = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="UTF-8">
-                    <title>HTML to PDF</title>
-                    <style>
-                        body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; }}
-                    </style>
-                </head>
-                <body>
-                    {html_content}
-                </body>
-                </html>
-                """
-            f.write(html_content)
-        
-        # Convert HTML to PDF using weasyprint or reportlab
-        try:
-            # Try using weasyprint if available
-            import weasyprint
-            
-            # Configure CSS for PDF
-            css_string = f"""
-            @page {{
-                size: {format_size} {orientation};
-                margin: {margins['top']}mm {margins['right']}mm {margins['bottom']}mm {margins['left']}mm;
-            }}
-            body {{
-                font-family: Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-            }}
-            """
-            
-            css = weasyprint.CSS(string=css_string)
-            html_doc = weasyprint.HTML(filename=temp_html)
-            html_doc.write_pdf(temp_pdf, stylesheets=[css])
-            
-        except ImportError:
-            # Fallback to reportlab if weasyprint is not available
-            from reportlab.pdfgen import canvas
-            from reportlab.lib.pagesizes import letter, A4
-            from reportlab.lib.units import mm
-            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet
-            from reportlab.lib.enums import TA_LEFT
-            import html2text
-            
-            # Convert HTML to plain text
-            h = html2text.HTML2Text()
-            h.ignore_links = True
-            text_content = h.handle(html_content)
-            
-            # Create PDF with reportlab
-            doc = SimpleDocTemplate(
-                temp_pdf,
-                pagesize=A4 if format_size == 'A4' else letter,
-                rightMargin=margins['right']*mm,
-                leftMargin=margins['left']*mm,
-                topMargin=margins['top']*mm,
-                bottomMargin=margins['bottom']*mm
-            )
-            
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Add content as paragraphs
-            for line in text_content.split('\n'):
-                if line.strip():
-                    p = Paragraph(line, styles['Normal'])
-                    story.append(p)
-                    story.append(Spacer(1, 12))
-            
-            doc.build(story)
-        
-        cleanup_file(temp_html)
+        html_content = wrap_html(html_content)
+        stylesheets = [html_page_css(settings), HTML_BODY_CSS]
+        if body.get('css'):
+            stylesheets.append(body['css'])
+
+        # Render on a warm WeasyPrint worker, or with PyMuPDF if there is none
+        if html_render_executor is not None:
+            pdf_bytes, timings = await run_html_render(html_renderer.render_html, html_content, stylesheets)
+        else:
+            step_start = time.perf_counter()
+            pdf_bytes = await asyncio.get_running_loop().run_in_executor(None, render_html_with_story, [html_content], settings)
+            timings = [("render", time.perf_counter() - step_start)]
         
         # Log the operation
         if current_user:
@@ -2385,12 +3438,18 @@ async def html_to_pdf(
                 "html", "pdf", len(html_content), True
             )
         
-        return FileResponse(
-            temp_pdf, 
+        return StreamingResponse(
+            io.BytesIO(pdf_bytes),
             media_type="application/pdf",
-            filename="converted_document.pdf"
+            headers={
+                "Content-Disposition": "attachment; filename=converted_document.pdf",
+                "Server-Timing": format_server_timing(timings)
+            }
         )
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -2399,65 +3458,315 @@ async def html_to_pdf(
             )
         raise HTTPException(status_code=500, detail=f"HTML to PDF conversion failed: {str(e)}")
 
-@app.post("/api/convert/word-to-pdf")
-async def word_to_pdf(
-    file: UploadFile = File(...),
+@app.post("/api/convert/html-to-pdf/batch")
+async def html_to_pdf_batch(
+    request: Request,
     current_user = Depends(get_current_user_optional)
 ):
-    """Convert Word document to PDF"""
-    if not file.filename.endswith(('.docx', '.doc')):
-        raise HTTPException(status_code=400, detail="Only Word documents (.docx, .doc) are allowed")
-    
-    temp_docx = create_temp_file(".docx")
+    """Convert many HTML documents that share settings and CSS in one job
+
+    Body: {"documents": [{"name": ..., "html": ...}, ...], "settings": {...},
+    "css": "...", "merge": false}. Returns one merged PDF when merge is set,
+    otherwise a ZIP with a PDF per document.
+    """
+    try:
+        body = await request.json()
+        documents = body.get('documents') or []
+        settings = body.get('settings', {})
+        merge = bool(body.get('merge', False))
+
+        if not documents or len(documents) > MAX_HTML_BATCH_DOCUMENTS:
+            raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_HTML_BATCH_DOCUMENTS} documents are required")
+        if not all(isinstance(document, dict) and str(document.get('html', '')).strip() for document in documents):
+            raise HTTPException(status_code=400, detail="Every document needs HTML content")
+
+        html_documents = [wrap_html(document['html']) for document in documents]
+        stylesheets = [html_page_css(settings), HTML_BODY_CSS]
+        if body.get('css'):
+            stylesheets.append(body['css'])
+
+        if html_render_executor is not None:
+            pdfs, timings = await run_html_render(html_renderer.render_html_batch, html_documents, stylesheets, merge)
+        else:
+            step_start = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            if merge:
+                pdfs = [await loop.run_in_executor(None, render_html_with_story, html_documents, settings)]
+            else:
+                pdfs = [await loop.run_in_executor(None, render_html_with_story, [html], settings) for html in html_documents]
+            timings = [("render", time.perf_counter() - step_start)]
+
+        total_size = sum(len(html) for html in html_documents)
+        if current_user:
+            await log_operation(
+                current_user.id, "html_to_pdf_batch", f"{len(documents)}_documents",
+                "html", "pdf" if merge else "zip", total_size, True
+            )
+
+        headers = {"Server-Timing": format_server_timing(timings)}
+        if merge:
+            headers["Content-Disposition"] = "attachment; filename=converted_documents.pdf"
+            return StreamingResponse(io.BytesIO(pdfs[0]), media_type="application/pdf", headers=headers)
+
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for index, (document, pdf) in enumerate(zip(documents, pdfs)):
+                name = f"{str(document.get('name') or f'document_{index + 1}').rsplit('.', 1)[0]}.pdf"
+                if name in zip_file.namelist():
+                    name = f"{name[:-4]}_{index + 1}.pdf"
+                zip_file.writestr(name, pdf)
+        headers["Content-Disposition"] = "attachment; filename=converted_documents.zip"
+        return StreamingResponse(io.BytesIO(zip_buffer.getvalue()), media_type="application/zip", headers=headers)
+
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
+    except Exception as e:
+        if current_user:
+            await log_operation(
+                current_user.id, "html_to_pdf_batch", "html_documents",
+                "html", "pdf", 0, False
+            )
+        raise HTTPException(status_code=500, detail=f"HTML to PDF batch conversion failed: {str(e)}")
+
+# Office documents to PDF: a pool of warm headless LibreOffice processes
+# Each process listens on its own local pipe and is driven over UNO, so a
+# conversion skips the seconds-long LibreOffice start-up.
+OFFICE_BINARY = os.getenv("OFFICE_BINARY") or shutil.which("soffice") or shutil.which("libreoffice")
+OFFICE_POOL_SIZE = int(os.getenv("OFFICE_POOL_SIZE", "1"))  # per API worker process
+OFFICE_MAX_JOBS = int(os.getenv("OFFICE_MAX_JOBS", "200"))  # recycle a process after this many conversions
+OFFICE_MAX_RSS_MB = int(os.getenv("OFFICE_MAX_RSS_MB", "1024"))  # ... or once it has grown past this
+OFFICE_JOB_TIMEOUT = int(os.getenv("OFFICE_JOB_TIMEOUT", "120"))
+OFFICE_START_TIMEOUT = 60
+OFFICE_PDF_FILTERS = {"word": "writer_pdf_Export", "excel": "calc_pdf_Export", "ppt": "impress_pdf_Export"}
+OFFICE_EXTENSIONS = {
+    "word": (".docx", ".doc", ".odt", ".rtf"),
+    "excel": (".xlsx", ".xls", ".ods"),
+    "ppt": (".pptx", ".ppt", ".odp"),
+}
+
+office_executor = ThreadPoolExecutor(max_workers=max(1, OFFICE_POOL_SIZE))
+office_slots = []  # one dict per LibreOffice process
+office_idle_slots = None  # asyncio.Queue of slots ready for a job; None while the pool is disabled
+office_pool_stats = {"waiting": 0, "running": 0, "completed": 0, "failed": 0, "recycled": 0}
+office_release_tasks = set()  # background recycles, referenced until they finish
+
+def office_properties(**values):
+    """UNO PropertyValue tuple from keyword arguments"""
+    import uno
+    properties = []
+    for name, value in values.items():
+        prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+        prop.Name, prop.Value = name, value
+        properties.append(prop)
+    return tuple(properties)
+
+def start_office_process(slot):
+    """Launch a headless LibreOffice with a private profile and connect to it"""
+    import uno
+    slot["profile"] = tempfile.mkdtemp(prefix="office-profile-")
+    pipe_name = f"pixelcraft_office_{os.getpid()}_{slot['index']}"
+    slot["process"] = subprocess.Popen(
+        [OFFICE_BINARY, "--headless", "--invisible", "--nologo", "--norestore", "--nodefault", "--nolockcheck",
+         f"-env:UserInstallation={Path(slot['profile']).as_uri()}",
+         f"--accept=pipe,name={pipe_name};urp;StarOffice.ComponentContext"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    local_context = uno.getComponentContext()
+    resolver = local_context.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local_context)
+    deadline = time.monotonic() + OFFICE_START_TIMEOUT
+    while True:
+        try:
+            context = resolver.resolve(f"uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext")
+            break
+        except Exception:
+            if slot["process"].poll() is not None or time.monotonic() > deadline:
+                stop_office_process(slot)
+                raise RuntimeError("LibreOffice did not start")
+            time.sleep(0.25)
+    slot["desktop"] = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+    slot["jobs"] = 0
+    slot["healthy"] = True
+
+def stop_office_process(slot):
+    """Shut a LibreOffice process down and drop its profile
+
+    A healthy process is asked to exit; a failed or hung one would not answer
+    over UNO, so it is killed outright.
+    """
+    process = slot.get("process")
+    if process and process.poll() is None:
+        try:
+            if not slot.get("healthy"):
+                raise subprocess.TimeoutExpired(OFFICE_BINARY, 0)
+            slot["desktop"].terminate()
+            process.wait(timeout=10)
+        except Exception:
+            for pid in process_tree(process.pid):
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            process.wait()
+    slot["desktop"] = None
+    shutil.rmtree(slot.get("profile") or "", ignore_errors=True)
+
+def process_tree(pid):
+    """pid and all of its descendants (the soffice launcher forks soffice.bin)"""
+    pids = [pid]
+    for parent in pids:
+        try:
+            with open(f"/proc/{parent}/task/{parent}/children") as children:
+                pids.extend(int(child) for child in children.read().split())
+        except OSError:
+            pass
+    return pids
+
+def office_rss_mb(slot):
+    """Resident memory of a LibreOffice process tree, in MB"""
+    if slot.get("process") is None:
+        return 0.0
+    total_kb = 0
+    for pid in process_tree(slot["process"].pid):
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            pass
+    return total_kb / 1024
+
+def convert_with_office(slot, source, target, kind):
+    """Export one document to PDF through a pooled LibreOffice (blocking)"""
+    from com.sun.star.io import IOException
+
+    document = slot["desktop"].loadComponentFromURL(
+        Path(source).as_uri(), "_blank", 0, office_properties(Hidden=True, ReadOnly=True)
+    )
+    if document is None:
+        raise HTTPException(status_code=422, detail="LibreOffice could not open the document")
+    try:
+        document.storeToURL(Path(target).as_uri(), office_properties(FilterName=OFFICE_PDF_FILTERS[kind]))
+    except IOException as e:
+        raise HTTPException(status_code=422, detail=f"LibreOffice could not export the document: {e.Message}")
+    finally:
+        try:
+            document.close(True)
+        except Exception:
+            pass
+
+def recycle_office_slot(slot):
+    """Restart a slot's LibreOffice if it failed, wore out or grew too large (blocking)"""
+    if slot["healthy"] and slot["jobs"] < OFFICE_MAX_JOBS and office_rss_mb(slot) <= OFFICE_MAX_RSS_MB:
+        return
+    office_pool_stats["recycled"] += 1
+    stop_office_process(slot)
+    try:
+        start_office_process(slot)
+    except Exception as e:
+        print(f"⚠️ LibreOffice restart failed: {e}")
+        slot["healthy"] = False
+
+async def release_office_slot(slot):
+    """Recycle the slot if needed, then hand it to the next queued job"""
+    await asyncio.get_running_loop().run_in_executor(None, recycle_office_slot, slot)
+    office_idle_slots.put_nowait(slot)
+
+async def office_convert(source, target, kind):
+    """Convert source to a PDF at target on the next free LibreOffice; returns Server-Timing pairs
+
+    Waiting requests queue in arrival order. A process that errors or times
+    out is recycled before it takes another job.
+    """
+    if office_idle_slots is None:
+        raise HTTPException(status_code=503, detail="Office conversion is unavailable: LibreOffice is not installed")
+
+    wait_start = time.perf_counter()
+    office_pool_stats["waiting"] += 1
+    try:
+        slot = await office_idle_slots.get()
+    finally:
+        office_pool_stats["waiting"] -= 1
+    timings = [("queue", time.perf_counter() - wait_start)]
+
+    step_start = time.perf_counter()
+    office_pool_stats["running"] += 1
+    try:
+        if not slot["healthy"]:
+            raise RuntimeError("LibreOffice is not running")
+        await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(office_executor, convert_with_office, slot, source, target, kind),
+            timeout=OFFICE_JOB_TIMEOUT
+        )
+        slot["jobs"] += 1
+        office_pool_stats["completed"] += 1
+    except HTTPException:
+        # The document was bad, not the process
+        slot["jobs"] += 1
+        office_pool_stats["failed"] += 1
+        raise
+    except asyncio.TimeoutError:
+        slot["healthy"] = False
+        office_pool_stats["failed"] += 1
+        raise HTTPException(status_code=504, detail=f"Conversion took longer than {OFFICE_JOB_TIMEOUT} s")
+    except Exception:
+        slot["healthy"] = False
+        office_pool_stats["failed"] += 1
+        raise
+    finally:
+        office_pool_stats["running"] -= 1
+        # A restart takes seconds, so it runs after this response is on its way
+        task = asyncio.create_task(release_office_slot(slot))
+        office_release_tasks.add(task)
+        task.add_done_callback(office_release_tasks.discard)
+    timings.append(("convert", time.perf_counter() - step_start))
+    return timings
+
+def rebuild_docx_as_pdf(source, target):
+    """Text-only Word to PDF with python-docx and reportlab, for hosts without LibreOffice"""
+    from docx import Document
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    doc = Document(source)
+    pdf_doc = SimpleDocTemplate(target, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            style = styles['Heading1'] if paragraph.style.name.startswith('Heading') else styles['Normal']
+            story.append(Paragraph(paragraph.text, style))
+            story.append(Spacer(1, 12))
+    pdf_doc.build(story)
+
+async def office_to_pdf(file, kind, operation, current_user):
+    """Shared body of the Word, Excel and PowerPoint to PDF endpoints"""
+    extension = Path(file.filename).suffix.lower()
+    if extension not in OFFICE_EXTENSIONS[kind]:
+        raise HTTPException(status_code=400, detail=f"Only {', '.join(OFFICE_EXTENSIONS[kind])} files are allowed")
+
+    temp_input = create_temp_file(extension)
     temp_pdf = create_temp_file(".pdf")
-    
     try:
-        # Read file content for size calculation
         content = await file.read()
         file_size = len(content)
-        
-        with open(temp_docx, "wb") as buffer:
+        with open(temp_input, "wb") as buffer:
             buffer.write(content)
-        
-        # Convert Word to PDF using python-docx and reportlab
-        from docx import Document
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.units import inch
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        
-        # Read Word document
-        doc = Document(temp_docx)
-        
-        # Create PDF
-        pdf_doc = SimpleDocTemplate(temp_pdf, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Extract text from Word document
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                # Determine style based on paragraph formatting
-                if paragraph.style.name.startswith('Heading'):
-                    p = Paragraph(paragraph.text, styles['Heading1'])
-                else:
-                    p = Paragraph(paragraph.text, styles['Normal'])
-                story.append(p)
-                story.append(Spacer(1, 12))
-        
-        # Build PDF
-        pdf_doc.build(story)
-        
+
+        if office_idle_slots is None and extension == ".docx":
+            rebuild_docx_as_pdf(temp_input, temp_pdf)
+            timings = []
+        else:
+            timings = await office_convert(temp_input, temp_pdf, kind)
+
         # Log the operation
         if current_user:
             await log_operation(
-                current_user.id, "word_to_pdf", file.filename, 
-                "docx", "pdf", file_size, True
+                current_user.id, operation, file.filename,
+                extension.lstrip("."), "pdf", file_size, True
             )
-        
-        # Save file metadata (skip if no user)
-        if current_user:
             await save_file_metadata({
                 "user_id": current_user.id,
                 "filename": f"{file.filename.rsplit('.', 1)[0]}.pdf",
@@ -2466,37 +3775,153 @@ async def word_to_pdf(
                 "format": "pdf",
                 "upload_date": datetime.now()
             })
-        
+
         return FileResponse(
             temp_pdf,
             media_type="application/pdf",
-            filename=f"{file.filename.rsplit('.', 1)[0]}.pdf"
+            filename=f"{file.filename.rsplit('.', 1)[0]}.pdf",
+            headers={"Server-Timing": format_server_timing(timings), "X-Queue-Depth": str(office_pool_stats["waiting"])}
         )
-    
+
+    except HTTPException:
+        cleanup_file(temp_pdf)
+        raise
     except Exception as e:
-        # Log the operation
+        cleanup_file(temp_pdf)
         if current_user:
             await log_operation(
-                current_user.id, "word_to_pdf", file.filename, 
-                "docx", "pdf", 0, False
+                current_user.id, operation, file.filename,
+                extension.lstrip("."), "pdf", 0, False
             )
-        raise HTTPException(status_code=500, detail=f"Word to PDF conversion failed: {str(e)}")
-    
+        raise HTTPException(status_code=500, detail=f"{kind.capitalize()} to PDF conversion failed: {str(e)}")
+
     finally:
-        cleanup_file(temp_docx)
-        # Don't clean up temp_pdf here as it's being served
-        # It will be cleaned up by the system later
+        cleanup_file(temp_input)
+
+@app.post("/api/convert/word-to-pdf")
+async def word_to_pdf(
+    file: UploadFile = File(...),
+    current_user = Depends(get_current_user_optional)
+):
+    """Convert Word document to PDF"""
+    return await office_to_pdf(file, "word", "word_to_pdf", current_user)
+
+@app.post("/api/convert/excel-to-pdf")
+async def excel_to_pdf(
+    file: UploadFile = File(...),
+    current_user = Depends(get_current_user_optional)
+):
+    """Convert Excel workbook to PDF"""
+    return await office_to_pdf(file, "excel", "excel_to_pdf", current_user)
+
+@app.post("/api/convert/ppt-to-pdf")
+async def ppt_to_pdf(
+    file: UploadFile = File(...),
+    current_user = Depends(get_current_user_optional)
+):
+    """Convert PowerPoint presentation to PDF"""
+    return await office_to_pdf(file, "ppt", "ppt_to_pdf", current_user)
+
+# PII scanning: detectors, custom regex and keywords in one pass per page (see pii_scanner.py)
+PII_SCAN_PAGES_PER_JOB = 16
+
+def pii_detectors(pattern_types, custom_pattern, keywords=()):
+    """Detector names to run from the requested pattern types; 400 on unknown ones or a bad custom regex"""
+    detectors = []
+    for pattern_type in pattern_types:
+        if pattern_type == "all":
+            detectors += list(pii_scanner.DETECTORS)
+        elif pattern_type in pii_scanner.DETECTORS:
+            detectors.append(pattern_type)
+        elif pattern_type == "custom":
+            if not custom_pattern:
+                raise HTTPException(status_code=400, detail="custom_pattern is required for the custom pattern type")
+        else:
+            raise HTTPException(status_code=400, detail=f"Invalid pattern type '{pattern_type}'. Available: {', '.join(pii_scanner.DETECTORS)}, custom, all")
+    detectors = list(dict.fromkeys(detectors))
+    custom_pattern = custom_pattern if "custom" in pattern_types else None
+    try:
+        pii_scanner.PIIScanner(detectors, custom_pattern, keywords)
+    except re.error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid custom pattern: {e}")
+    return detectors, custom_pattern
+
+async def scan_pdf_pii(pdf_path, page_indexes, detectors, custom_pattern=None, keywords=(), whole_words=True):
+    """Scan pages for PII, page chunks in parallel; returns (page matches, stats) merged in page order"""
+    chunks = split_pages(page_indexes, -(-len(page_indexes) // PII_SCAN_PAGES_PER_JOB), PII_SCAN_PAGES_PER_JOB)
+    args = (detectors, custom_pattern, tuple(keywords), whole_words)
+    if len(chunks) == 1:
+        # Not worth a process hop
+        results = [await asyncio.get_running_loop().run_in_executor(
+            None, pdf_workers.scan_pii_pages, pdf_path, chunks[0], *args
+        )]
+    else:
+        results = await asyncio.gather(*(run_pdf_job(pdf_workers.scan_pii_pages, pdf_path, chunk, *args) for chunk in chunks))
+    pages = [entry for chunk_pages, _ in results for entry in chunk_pages]
+    stats = {name: sum(chunk_stats[name] for _, chunk_stats in results) for name in ("characters", "rejected", "seconds")}
+    return pages, stats
+
+# Redaction: explicit areas plus server-side search for terms and PII patterns
+REDACTION_IMAGE_MODES = {
+    "none": fitz.PDF_REDACT_IMAGE_NONE,  # leave images alone
+    "remove": fitz.PDF_REDACT_IMAGE_REMOVE,  # drop any image the redaction touches
+    "pixels": fitz.PDF_REDACT_IMAGE_PIXELS,  # blank only the covered pixels
+}
+REDACTION_VECTOR_MODES = {
+    "none": fitz.PDF_REDACT_LINE_ART_NONE,
+    "covered": fitz.PDF_REDACT_LINE_ART_REMOVE_IF_COVERED,  # drop drawings fully under a redaction
+    "touched": fitz.PDF_REDACT_LINE_ART_REMOVE_IF_TOUCHED,  # ... or overlapping one at all
+}
+def parse_redaction_list(value, name):
+    """Search terms or pattern types given as a JSON list or comma-separated text"""
+    value = value.strip()
+    if value.startswith("["):
+        try:
+            items = json.loads(value)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail=f"Invalid {name} format")
+    else:
+        items = value.split(",")
+    return list(dict.fromkeys(str(item).strip() for item in items if str(item).strip()))
+
+def apply_page_redactions(source, target, marks, fill, image_mode, vector_mode):
+    """Add each page's redaction annotations, apply them once per page and save
+
+    Saving with garbage collection drops the replaced content streams and
+    images, so the redacted text is not left in unreferenced objects.
+    """
+    with fitz.open(source) as pdf_document:
+        for page_index in sorted(marks):
+            page = pdf_document[page_index]
+            for rect in marks[page_index]:
+                page.add_redact_annot(rect, fill=fill)
+            page.apply_redactions(images=image_mode, graphics=vector_mode)
+        pdf_document.save(target, garbage=3, deflate=True)
 
 @app.post("/api/pdf/redact")
 async def redact_pdf(
     file: UploadFile = File(...), 
     redaction_areas: str = Form("[]"),
     redaction_color: str = Form("#000000"),
-    current_user = Depends(get_current_user_optional)
+    search_terms: str = Form(""),
+    pattern_types: str = Form(""),
+    custom_pattern: str = Form(""),
+    image_mode: str = Form("pixels"),
+    vector_mode: str = Form("covered"),
+    dry_run: bool = Form(False),
+    current_user = Depends(get_current_user_optional),
+    job = Depends(route_job("pdf_redact"))
 ):
-    """Redact sensitive information from PDF"""
+    """Redact areas, search terms and PII patterns (see pii_scanner.DETECTORS, or custom) across the whole PDF
+
+    dry_run returns the match report without redacting anything.
+    """
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    if image_mode not in REDACTION_IMAGE_MODES:
+        raise HTTPException(status_code=400, detail=f"image_mode must be one of: {', '.join(REDACTION_IMAGE_MODES)}")
+    if vector_mode not in REDACTION_VECTOR_MODES:
+        raise HTTPException(status_code=400, detail=f"vector_mode must be one of: {', '.join(REDACTION_VECTOR_MODES)}")
     
     temp_pdf = create_temp_file(".pdf")
     temp_output = create_temp_file(".pdf")
@@ -2508,14 +3933,17 @@ async def redact_pdf(
         with open(temp_pdf, "wb") as buffer:
             buffer.write(content)
         
-        # Parse redaction areas
+        # Parse redaction areas, terms and patterns
         try:
             areas = json.loads(redaction_areas) if redaction_areas else []
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid redaction areas format")
+        terms = parse_redaction_list(search_terms, "search terms")
+        detectors, custom_pattern = pii_detectors(parse_redaction_list(pattern_types, "pattern types"), custom_pattern, terms)
+        patterns = [*detectors, *(["custom"] if custom_pattern else [])]
         
-        if not areas:
-            raise HTTPException(status_code=400, detail="No redaction areas specified")
+        if not areas and not terms and not patterns:
+            raise HTTPException(status_code=400, detail="No redaction areas, search terms or patterns specified")
         
         # Open PDF with PyMuPDF
         try:
@@ -2532,51 +3960,64 @@ async def redact_pdf(
         if pdf_document.needs_pass:
             pdf_document.close()
             raise HTTPException(status_code=400, detail="PDF is password-protected. Please provide an unencrypted PDF.")
+        page_count = len(pdf_document)
+        pdf_document.close()
         
-        redacted_count = 0
-        
-        # Group areas by page
-        areas_by_page = {}
+        # Explicit areas, grouped by page
+        marks = {}
         for area in areas:
             page_num = area.get('page', 1) - 1  # Convert to 0-based indexing
-            if page_num not in areas_by_page:
-                areas_by_page[page_num] = []
-            areas_by_page[page_num].append(area)
-        
-        # Process each page
-        for page_num in range(len(pdf_document)):
-            if page_num in areas_by_page:
-                page = pdf_document.load_page(page_num)
-                
-                for area in areas_by_page[page_num]:
-                    # Create rectangle for redaction
-                    rect = fitz.Rect(
-                        area.get('x', 0),
-                        area.get('y', 0),
-                        area.get('x', 0) + area.get('width', 0),
-                        area.get('y', 0) + area.get('height', 0)
-                    )
-                    
-                    # Create redaction annotation
-                    redact_annot = page.add_redact_annot(rect)
-                    
-                    # Set redaction color
-                    try:
-                        color = redaction_color if redaction_color.startswith('#') else f"#{redaction_color}"
-                        redact_annot.set_colors(stroke=fitz.utils.getColor(color))
-                    except:
-                        # Fallback to black if color parsing fails
-                        redact_annot.set_colors(stroke=fitz.utils.getColor("black"))
-                    
-                    redact_annot.update()
-                    redacted_count += 1
-                
-                # Apply all redactions on this page
-                page.apply_redactions()
+            if 0 <= page_num < page_count:
+                marks.setdefault(page_num, []).append(fitz.Rect(
+                    area.get('x', 0),
+                    area.get('y', 0),
+                    area.get('x', 0) + area.get('width', 0),
+                    area.get('y', 0) + area.get('height', 0)
+                ))
+        
+        # Search every page for the terms and patterns, page chunks in parallel
+        timings = []
+        match_counts = {}
+        page_matches = {}
+        if terms or patterns:
+            step_start = time.perf_counter()
+            # Terms match anywhere in a word, like a viewer's search
+            results, _ = await scan_pdf_pii(temp_pdf, list(range(page_count)), detectors, custom_pattern, terms, whole_words=False)
+            term_names = {term.lower(): term for term in terms}
+            for page_index, matches in results:
+                for detector, match_text, rect in matches:
+                    source = term_names.get(match_text.lower(), match_text) if detector == "keyword" else detector
+                    marks.setdefault(page_index, []).append(fitz.Rect(rect))
+                    match_counts[source] = match_counts.get(source, 0) + 1
+                page_matches[page_index + 1] = len(matches)
+            timings.append(("search", time.perf_counter() - step_start))
+        redacted_count = sum(len(rects) for rects in marks.values())
+        
+        if dry_run:
+            cleanup_file(temp_pdf)
+            cleanup_file(temp_output)
+            return {
+                "redaction_count": redacted_count,
+                "pages_affected": sorted(page_index + 1 for page_index in marks),
+                "area_count": redacted_count - sum(match_counts.values()),
+                "match_counts": {source: match_counts.get(source, 0) for source in [*terms, *patterns]},
+                "page_matches": page_matches,
+            }
         
-        # Save redacted PDF
-        pdf_document.save(temp_output)
-        pdf_document.close()
+        # Redact and save
+        step_start = time.perf_counter()
+        color = redaction_color if redaction_color.startswith('#') else f"#{redaction_color}"
+        try:
+            fill = fitz.utils.getColor(color)
+        except Exception:
+            # Fallback to black if color parsing fails
+            fill = (0, 0, 0)
+        await asyncio.get_running_loop().run_in_executor(
+            None, apply_page_redactions, temp_pdf, temp_output, marks, fill,
+            REDACTION_IMAGE_MODES[image_mode], REDACTION_VECTOR_MODES[vector_mode]
+        )
+        timings.append(("redact", time.perf_counter() - step_start))
+        cleanup_file(temp_pdf)
         
         # Log the operation
         if current_user:
@@ -2589,9 +4030,18 @@ async def redact_pdf(
             temp_output, 
             media_type="application/pdf",
             filename=f"redacted_{file.filename}",
-            headers={"X-Redacted-Items": str(redacted_count)}
+            headers={
+                "Server-Timing": format_server_timing(timings),
+                "X-Redacted-Items": str(redacted_count),
+                "X-Redacted-Pages": str(len(marks))
+            }
         )
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        cleanup_file(temp_pdf)
+        cleanup_file(temp_output)
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -2682,10 +4132,17 @@ async def find_patterns_in_pdf(
     file: UploadFile = File(...),
     pattern_type: str = Form(...),
     custom_pattern: str = Form(""),
+    keywords: str = Form(""),
     page: int = Form(1),
+    pages: str = Form(""),
     current_user = Depends(get_current_user_optional)
 ):
-    """Find pattern matches in PDF and return their coordinates"""
+    """Find PII and pattern matches in PDF and return their coordinates
+
+    pattern_type is one detector, a comma-separated list or "all"; keywords
+    (JSON list or comma-separated) are matched as whole words. pages
+    ("1,3,5-7" or "all") scans more than the single page.
+    """
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
@@ -2713,45 +4170,46 @@ async def find_patterns_in_pdf(
         if pdf_document.needs_pass:
             pdf_document.close()
             raise HTTPException(status_code=400, detail="PDF is password-protected. Please provide an unencrypted PDF.")
+        page_count = len(pdf_document)
+        pdf_document.close()
         
-        if page < 1 or page > len(pdf_document):
+        if pages:
+            page_indexes = parse_page_selection(page_count, None if pages == "all" else pages)
+        elif page < 1 or page > page_count:
             raise HTTPException(status_code=400, detail="Invalid page number")
+        else:
+            page_indexes = [page - 1]  # PyMuPDF uses 0-based indexing
         
-        # Load the specified page
-        pdf_page = pdf_document.load_page(page - 1)  # PyMuPDF uses 0-based indexing
-        
-        # Define patterns
-        patterns = {
-            "email": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            "phone": r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
-            "ssn": r'\b\d{3}-\d{2}-\d{4}\b',
-            "custom": custom_pattern if custom_pattern else r'\b\d{3}-\d{2}-\d{4}\b'
-        }
-        
-        pattern = patterns.get(pattern_type)
-        if not pattern:
+        # Compile the detectors; "custom" without a pattern keeps the old SSN default
+        pattern_types = parse_redaction_list(pattern_type, "pattern types")
+        keyword_list = parse_redaction_list(keywords, "keywords")
+        detectors, custom_pattern = pii_detectors(
+            pattern_types, custom_pattern or pii_scanner.DETECTORS["ssn"][0], keyword_list
+        )
+        if not detectors and not custom_pattern and not keyword_list:
             raise HTTPException(status_code=400, detail="Invalid pattern type")
         
-        # Get page text
-        page_text = pdf_page.get_text()
+        # One scan of each page's text, page chunks in parallel
+        start_time = time.perf_counter()
+        results, stats = await scan_pdf_pii(temp_pdf, page_indexes, detectors, custom_pattern, keyword_list)
+        elapsed = time.perf_counter() - start_time
         
-        # Find pattern matches
         matches = []
-        for match in re.finditer(pattern, page_text, re.IGNORECASE):
-            match_text = match.group()
-            # Search for the matched text on the page to get coordinates
-            text_instances = pdf_page.search_for(match_text)
-            
-            for rect in text_instances:
+        detector_counts = dict.fromkeys([*detectors, *(["custom"] if custom_pattern else []), *(["keyword"] if keyword_list else [])], 0)
+        for page_index, page_matches in results:
+            for detector, match_text, rect in page_matches:
+                rect = fitz.Rect(rect)
                 matches.append({
                     "x": rect.x0,
                     "y": rect.y0,
                     "width": rect.width,
                     "height": rect.height,
-                    "text": match_text
+                    "text": match_text,
+                    "type": detector,
+                    "page": page_index + 1
                 })
-        
-        pdf_document.close()
+                detector_counts[detector] += 1
+        cleanup_file(temp_pdf)
         
         # Log the operation
         if current_user:
@@ -2760,8 +4218,22 @@ async def find_patterns_in_pdf(
                 "pdf", "json", file_size, True
             )
         
-        return {"matches": matches, "count": len(matches)}
+        return {
+            "matches": matches,
+            "count": len(matches),
+            "detector_counts": detector_counts,
+            "rejected_candidates": stats["rejected"],
+            "pages_scanned": len(page_indexes),
+            "characters_scanned": stats["characters"],
+            "scan_time": round(elapsed, 3),
+            "pages_per_second": round(len(page_indexes) / elapsed, 1) if elapsed else None,
+            "characters_per_second": round(stats["characters"] / stats["seconds"]) if stats["seconds"] else None
+        }
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        cleanup_file(temp_pdf)
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -2771,17 +4243,1024 @@ async def find_patterns_in_pdf(
         cleanup_file(temp_pdf)
         raise HTTPException(status_code=500, detail=f"Pattern search failed: {str(e)}")
 
-# Alias endpoint for PDF to image (singular) - redirect to plural
-@app.post("/api/pdf/to-image")
-async def pdf_to_image_alias(
-    file: UploadFile = File(...), 
-    format: str = "png", 
-    dpi: int = 150,
-    current_user = Depends(get_current_user_optional)
-):
-    """Alias for PDF to images conversion (redirects to to-images endpoint)"""
-    # Call the existing to-images endpoint
-    return await pdf_to_images(file, format, dpi, current_user)
+# Alias endpoint for PDF to image (singular) - redirect to plural
+@app.post("/api/pdf/to-image")
+async def pdf_to_image_alias(
+    file: UploadFile = File(...), 
+    format: str = "png", 
+    dpi: int = 150,
+    current_user = Depends(get_current_user_optional),
+    job = Depends(route_job("pdf_to_images"))
+):
+    """Alias for PDF to images conversion (redirects to to-images endpoint)"""
+    # Call the existing to-images endpoint
+    return await pdf_to_images(file, format, dpi, current_user, job)
+
+# Image processing helpers (shared by the single-step endpoints and /image/pipeline)
+
+# Pillow save format for each output format name accepted by the API
+IMAGE_SAVE_FORMATS = {
+    "png": "PNG",
+    "jpg": "JPEG",
+    "jpeg": "JPEG",
+    "webp": "WEBP",
+    "gif": "GIF",
+    "bmp": "BMP"
+}
+
+# Decompression bomb protection: uploads above this many pixels are rejected before decoding
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", "100000000"))
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+# Endpoints that process in strips (resize, enhance, watermark, convert) accept larger
+# scans; only open_image(max_pixels=...) goes past Pillow's process-wide limit.
+# Strips bound the working set, not the decoded source and output, which at 3-4 bytes
+# per pixel each come to 1.2-1.6 GB for one request at this default
+MAX_TILED_IMAGE_PIXELS = int(os.getenv("MAX_TILED_IMAGE_PIXELS", "200000000"))
+pillow_limit_lock = threading.Lock()
+
+# Images above this many pixels are processed in horizontal strips so the working
+# set stays at one strip instead of several full-size copies
+TILED_PROCESSING_PIXELS = int(os.getenv("TILED_PROCESSING_PIXELS", "40000000"))
+IMAGE_STRIP_ROWS = int(os.getenv("IMAGE_STRIP_ROWS", "256"))
+
+# Downscales keep this much headroom over the target before the final LANCZOS pass
+IMAGE_REDUCING_GAP = 2.0
+
+def open_image_header(content, max_pixels):
+    """Image.open with Pillow's pixel limit raised to max_pixels for this one call
+
+    Only the header is read; the limit goes back as soon as Image.open returns.
+    """
+    with pillow_limit_lock:
+        Image.MAX_IMAGE_PIXELS = max_pixels
+        try:
+            return Image.open(io.BytesIO(content))
+        finally:
+            Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+def open_image(content, target_size=None, maintain_aspect=False, max_pixels=MAX_IMAGE_PIXELS):
+    """Open uploaded image bytes, decoding JPEGs at reduced scale when only target_size is needed"""
+    too_large = HTTPException(status_code=413, detail=f"Image is too large. Maximum {max_pixels} pixels allowed.")
+    try:
+        # Image.open only reads the header, so the size is known before any decoding
+        image = Image.open(io.BytesIO(content))
+    except Image.DecompressionBombError:
+        if max_pixels <= MAX_IMAGE_PIXELS:
+            raise too_large
+        # Tiled endpoints allow more than the global limit: size-checked below
+        try:
+            image = open_image_header(content, max_pixels)
+        except Image.DecompressionBombError:
+            raise too_large
+    if image.width * image.height > max_pixels:
+        raise too_large
+
+    if target_size and image.format == "JPEG":
+        # DCT-domain scaling: libjpeg decodes directly at 1/2, 1/4 or 1/8 size
+        # as long as the result stays at least IMAGE_REDUCING_GAP times the target
+        if maintain_aspect:
+            target_size = fit_size(image.size, target_size)
+        target_width, target_height = target_size
+        image.draft(None, (int(target_width * IMAGE_REDUCING_GAP), int(target_height * IMAGE_REDUCING_GAP)))
+
+    return image
+
+def fit_size(size, box):
+    """Size that fits inside box while keeping the aspect ratio (never upscales)"""
+    scale = min(box[0] / size[0], box[1] / size[1], 1.0)
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+def needs_tiling(image):
+    """Whether an image is large enough to be processed strip by strip"""
+    return image.width * image.height > TILED_PROCESSING_PIXELS
+
+def image_strips(height, rows=None):
+    """Yield (top, bottom) row ranges covering an image of the given height"""
+    rows = rows or IMAGE_STRIP_ROWS
+    for top in range(0, height, rows):
+        yield top, min(top + rows, height)
+
+def convert_pil_image(image, mode):
+    """Convert image mode, strip by strip for large images
+
+    Dropping alpha flattens onto a white background, as JPEG output expects.
+    """
+    flatten = "A" in image.getbands() or (image.mode == "P" and "transparency" in image.info)
+    flatten = flatten and not mode.endswith("A")
+    if not needs_tiling(image):
+        if not flatten:
+            return image.convert(mode)
+        rgba = image.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background.convert(mode)
+
+    result = Image.new(mode, image.size, "white")
+    for top, bottom in image_strips(image.height):
+        strip = image.crop((0, top, image.width, bottom))
+        if flatten:
+            strip = strip.convert("RGBA")
+            result.paste(strip.convert(mode), (0, top), mask=strip.getchannel("A"))
+        else:
+            result.paste(strip.convert(mode), (0, top))
+    return result
+
+def resize_in_strips(image, size):
+    """LANCZOS resize computed one band of output rows at a time
+
+    Each band crops and resamples only the source rows under its filter support,
+    so the result matches a single resize() without Pillow's full-height
+    intermediate (or its full premultiplied copy for RGBA).
+    """
+    mode = image.mode
+    if mode in ("1", "P"):
+        mode = "RGBA" if "transparency" in image.info else "RGB"
+    width, height = size
+    scale_y = image.height / height
+    # LANCZOS reaches 3 source pixels, stretched by the scale factor when downscaling
+    support = 3 * max(scale_y, 1.0) + 1
+
+    result = Image.new(mode, size)
+    for top, bottom in image_strips(height):
+        source_top = max(0, int(top * scale_y - support))
+        source_bottom = min(image.height, int(bottom * scale_y + support) + 1)
+        rows = image.crop((0, source_top, image.width, source_bottom))
+        if rows.mode != mode:
+            rows = rows.convert(mode)
+        box = (0, top * scale_y - source_top, image.width, bottom * scale_y - source_top)
+        band = rows.resize((width, bottom - top), Image.Resampling.LANCZOS, box=box)
+        result.paste(band, (0, top))
+    return result
+
+def resize_pil_image(image, width, height, maintain_aspect=False):
+    """Resize an image, optionally keeping its aspect ratio"""
+    if needs_tiling(image):
+        size = fit_size(image.size, (width, height)) if maintain_aspect else (width, height)
+        return resize_in_strips(image, size)
+
+    if uses_opencv("resize", image):
+        size = fit_size(image.size, (width, height)) if maintain_aspect else (width, height)
+        return resize_opencv(image, size)
+
+    # reducing_gap lets Pillow box-reduce by an integer factor before the LANCZOS pass
+    if maintain_aspect:
+        image.thumbnail((width, height), Image.Resampling.LANCZOS, reducing_gap=IMAGE_REDUCING_GAP)
+        return image
+    return image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=IMAGE_REDUCING_GAP)
+
+# Luma weights of Pillow's RGB -> L conversion (ITU-R 601-2)
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+# Fraction of pixels clipped at each end of every channel by auto levels
+AUTO_LEVELS_CLIP = 0.005
+
+# Rows per block in the saturation pass (bounds the intermediate images)
+ENHANCE_BLOCK_ROWS = 64
+
+def build_enhance_luts(histogram, color_bands, brightness=1.0, contrast=1.0, auto_levels=False):
+    """Per-channel lookup tables that fuse auto levels, brightness and contrast
+
+    Everything is derived from one image histogram: the auto-levels bounds and
+    the mean luminance ImageEnhance.Contrast would measure after brightness.
+    The histogram may be None when neither contrast nor auto levels is requested.
+    """
+    levels = np.arange(256, dtype=np.float64)
+    luts = []
+    means = []
+
+    for band in range(color_bands):
+        lut = levels
+        if histogram is not None:
+            counts = np.asarray(histogram[band * 256:(band + 1) * 256], dtype=np.float64)
+            total = max(counts.sum(), 1)
+
+        if auto_levels:
+            cumulative = np.cumsum(counts)
+            low = int(np.searchsorted(cumulative, total * AUTO_LEVELS_CLIP, side='right'))
+            high = int(np.searchsorted(cumulative, total * (1 - AUTO_LEVELS_CLIP)))
+            if high > low:
+                lut = np.clip(np.round((levels - low) * 255.0 / (high - low)), 0, 255)
+
+        # Each ImageEnhance pass truncates and clips to 0-255, so do the same between stages
+        lut = np.clip(np.floor(lut * brightness), 0, 255)
+        luts.append(lut)
+        if histogram is not None:
+            means.append((counts * lut).sum() / total)
+
+    if contrast != 1.0:
+        if color_bands == 3:
+            mean = int(float(np.dot(means, LUMA_WEIGHTS)) + 0.5)
+        else:
+            mean = int(means[0] + 0.5)
+        luts = [np.clip(np.floor(mean + contrast * (lut - mean)), 0, 255) for lut in luts]
+
+    return [lut.astype(np.uint8) for lut in luts]
+
+def enhance_pil_image(image, brightness=1.0, contrast=1.0, saturation=1.0, auto_levels=False):
+    """Apply auto levels, brightness, contrast and saturation in one fused pass
+
+    Matches ImageEnhance.Brightness -> Contrast -> Color applied in sequence, but
+    reads the pixels once for the histogram and once for the transform (per-channel
+    LUT plus one luminance blend) instead of allocating full images for every pass.
+    Large images are transformed in place, strip by strip.
+    """
+    if brightness == 1.0 and contrast == 1.0 and saturation == 1.0 and not auto_levels:
+        return image
+
+    if image.mode not in ("L", "LA", "RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = convert_pil_image(image, "RGBA" if has_alpha else "RGB")
+
+    color_bands = 3 if image.mode.startswith("RGB") else 1
+    has_alpha = image.mode.endswith("A")
+    # The histogram is the only statistics pass, and only contrast and auto levels need it
+    histogram = image.histogram() if contrast != 1.0 or auto_levels else None
+    luts = build_enhance_luts(histogram, color_bands, brightness, contrast, auto_levels)
+
+    # Alpha passes through unchanged
+    point_table = [int(value) for lut in luts for value in lut]
+    if has_alpha:
+        point_table += list(range(256))
+
+    tiled = needs_tiling(image)
+    if saturation == 1.0 or color_bands == 1:
+        # Saturation has no effect on grayscale, so the LUT alone is the whole transform
+        if not tiled:
+            return image.point(point_table)
+        for top, bottom in image_strips(image.height):
+            box = (0, top, image.width, bottom)
+            image.paste(image.crop(box).point(point_table), box)
+        return image
+
+    # After the LUT, ImageEnhance.Color is linear: out = s * rgb + (1 - s) * luma(rgb),
+    # i.e. one 3x3 color matrix. Apply LUT + matrix one block of rows at a time so
+    # no full-size intermediate image is ever allocated.
+    blend = saturation * np.eye(3) + (1 - saturation) * np.outer(np.ones(3), LUMA_WEIGHTS)
+    matrix = tuple(float(value) for row in blend for value in (*row, 0.0))
+
+    result = image if tiled else Image.new(image.mode, image.size)
+    for top, bottom in image_strips(image.height, ENHANCE_BLOCK_ROWS):
+        block = image.crop((0, top, image.width, bottom)).point(point_table)
+        enhanced = block.convert("RGB").convert("RGB", matrix) if has_alpha else block.convert("RGB", matrix)
+        if has_alpha:
+            enhanced.putalpha(block.getchannel("A"))
+        result.paste(enhanced, (0, top))
+
+    return result
+
+# Watermark fonts: every .ttf/.otf in FONT_DIR is a family named after its file (e.g. "DejaVuSans-Bold")
+FONT_DIR = Path(os.getenv("FONT_DIR", Path(__file__).parent / "fonts"))
+DEFAULT_WATERMARK_FONT = os.getenv("WATERMARK_FONT", "DejaVuSans")
+WATERMARK_POSITIONS = ["top-left", "top-right", "bottom-left", "bottom-right", "center"]
+WATERMARK_PATTERNS = ["single", "tile"]
+WATERMARK_MIN_FONT_SIZE = 6  # explicit sizes run from this up to the image's longer side
+
+def find_fonts(font_dir):
+    """Map lowercase family names to the font files in font_dir"""
+    if not font_dir.is_dir():
+        return {}
+    return {
+        path.stem.lower(): path
+        for path in font_dir.iterdir()
+        if path.suffix.lower() in (".ttf", ".otf")
+    }
+
+WATERMARK_FONTS = find_fonts(FONT_DIR)
+
+@lru_cache(maxsize=128)
+def load_font(family, size):
+    """Load a font once per process, falling back to Pillow's built-in scalable font"""
+    path = WATERMARK_FONTS.get(family.lower())
+    if path is None:
+        return ImageFont.load_default(size)
+    return ImageFont.truetype(str(path), size)
+
+def render_text_mask(text, font, opacity):
+    """Render text into a tightly cropped 'L' coverage mask scaled by opacity"""
+    bbox = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text, font=font)
+    mask = Image.new("L", (max(1, bbox[2] - bbox[0]), max(1, bbox[3] - bbox[1])), 0)
+    ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), text, font=font, fill=int(255 * opacity))
+    return mask
+
+def watermark_pil_image(image, text, position="bottom-right", opacity=0.5,
+                        font_family=DEFAULT_WATERMARK_FONT, font_size=None, pattern="single"):
+    """Blend a semi-transparent white text watermark into the image, in place
+
+    Only the text patch is rendered and only its bounding region is blended, so a
+    single mark costs the same on any image size and nothing full-size is allocated.
+    The image keeps its mode, so the caller can keep the input format.
+    """
+    if image.mode not in ("L", "LA", "RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = convert_pil_image(image, "RGBA" if has_alpha else "RGB")
+
+    # Font size follows the image size unless given; a given size must fit the image
+    max_font_size = max(WATERMARK_MIN_FONT_SIZE, max(image.size))
+    if font_size is not None and not WATERMARK_MIN_FONT_SIZE <= font_size <= max_font_size:
+        raise HTTPException(status_code=400, detail=f"Font size must be between {WATERMARK_MIN_FONT_SIZE} and {max_font_size} for this image")
+    font = load_font(font_family, font_size or max(20, min(image.size) // 20))
+    mask = render_text_mask(text, font, opacity)
+    text_width, text_height = mask.size
+
+    if pattern == "tile":
+        # Staggered grid covering the whole image
+        step_x, step_y = text_width + 2 * text_height, 3 * text_height
+        origins = [
+            (x, y)
+            for row, y in enumerate(range(0, image.height, step_y))
+            for x in range(-(step_x // 2) * (row % 2), image.width, step_x)
+        ]
+    else:
+        margin = 20
+        positions = {
+            "top-left": (margin, margin),
+            "top-right": (image.width - text_width - margin, margin),
+            "bottom-left": (margin, image.height - text_height - margin),
+            "bottom-right": (image.width - text_width - margin, image.height - text_height - margin),
+            "center": ((image.width - text_width) // 2, (image.height - text_height) // 2)
+        }
+        origins = [positions.get(position, positions["bottom-right"])]
+
+    if image.mode == "RGBA":
+        # Proper "over" compositing for images that are themselves transparent
+        patch = Image.new("RGBA", mask.size, (255, 255, 255, 0))
+        patch.putalpha(mask)
+        for x, y in origins:
+            box = (x, y, x + text_width, y + text_height)
+            image.paste(Image.alpha_composite(image.crop(box), patch), box)
+    elif image.mode == "LA":
+        # Blend into the luminance band only; the mark must not change transparency
+        for x, y in origins:
+            box = (x, y, x + text_width, y + text_height)
+            luminance, alpha = image.crop(box).split()
+            luminance.paste(255, (0, 0), mask)
+            image.paste(Image.merge("LA", (luminance, alpha)), box)
+    else:
+        for origin in origins:
+            image.paste("white", origin, mask)
+
+    return image
+
+def encode_pil_image(image, format, quality=None, optimize=False, progressive=False):
+    """Encode an image to bytes, flattening transparency for formats without alpha"""
+    save_format = IMAGE_SAVE_FORMATS.get(format.lower(), format.upper())
+
+    # JPEG has no alpha channel - flatten onto a white background
+    if save_format == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+        image = convert_pil_image(image, "RGB")
+
+    if save_format in ("JPEG", "WEBP") and uses_opencv("encode", image):
+        return encode_opencv(image, save_format, quality, optimize, progressive)
+
+    save_kwargs = {}
+    if quality is not None:
+        save_kwargs["quality"] = quality
+    if optimize:
+        save_kwargs["optimize"] = True
+    if progressive:
+        save_kwargs["progressive"] = True
+
+    output = io.BytesIO()
+    image.save(output, format=save_format, **save_kwargs)
+    return output.getvalue()
+
+# Trial encodes of the compression search run here (Pillow's encoders release the GIL)
+IMAGE_ENCODE_THREADS = int(os.getenv("IMAGE_ENCODE_THREADS", str(min(8, os.cpu_count() or 4))))
+image_encode_executor = ThreadPoolExecutor(max_workers=IMAGE_ENCODE_THREADS)
+
+COMPRESS_FORMATS = ["JPEG", "WEBP", "PNG"]
+COMPRESS_QUALITY_RANGE = (10, 95)
+# Qualities probed in parallel per search round (one per thread; 1 is plain bisection)
+COMPRESS_SEARCH_WIDTH = IMAGE_ENCODE_THREADS
+# Full-size PNG is only tried when its proxy-based size estimate is within this factor
+COMPRESS_PNG_SLACK = 3
+
+# SSIM is measured on a proxy downscaled to this many pixels on its longest side
+SSIM_PROXY_SIZE = 1024
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+def compress_encode(image, format, quality=None):
+    """Encode for the compression engine: progressive optimized JPEG, WebP or lossless PNG"""
+    if format == "JPEG":
+        return encode_pil_image(image, "JPEG", quality=quality, optimize=True, progressive=True)
+    if format == "WEBP":
+        return encode_pil_image(image, "WEBP", quality=quality)
+    return encode_pil_image(image, "PNG", optimize=True)
+
+def ssim_luma(image):
+    """Luma plane as float64, with transparency flattened onto white"""
+    return np.asarray(convert_pil_image(image, "RGB").convert("L"), dtype=np.float64)
+
+def window_means(values, size=SSIM_WINDOW):
+    """Mean over every size x size window, via an integral image"""
+    integral = np.pad(values, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    sums = integral[size:, size:] - integral[:-size, size:] - integral[size:, :-size] + integral[:-size, :-size]
+    return sums / (size * size)
+
+def compute_ssim(reference, candidate):
+    """Mean structural similarity of two equally sized luma planes"""
+    mean_ref, mean_cand = window_means(reference), window_means(candidate)
+    var_ref = window_means(reference * reference) - mean_ref ** 2
+    var_cand = window_means(candidate * candidate) - mean_cand ** 2
+    covariance = window_means(reference * candidate) - mean_ref * mean_cand
+    ssim_map = ((2 * mean_ref * mean_cand + SSIM_C1) * (2 * covariance + SSIM_C2)) / (
+        (mean_ref ** 2 + mean_cand ** 2 + SSIM_C1) * (var_ref + var_cand + SSIM_C2)
+    )
+    return float(ssim_map.mean())
+
+def search_accepted_prefix(candidates, trial, accept):
+    """Last candidate of the accepted prefix and its trial result, or None
+
+    accept(trial(candidate)) must hold for a prefix of candidates and fail after it.
+    Each round tries COMPRESS_SEARCH_WIDTH evenly spaced candidates in parallel,
+    shrinking the range by that factor plus one instead of halving it.
+    """
+    best = None
+    low, high = 0, len(candidates) - 1
+    while low <= high:
+        count = min(COMPRESS_SEARCH_WIDTH, high - low + 1)
+        indexes = sorted({low + (high - low + 1) * (i + 1) // (count + 1) for i in range(count)})
+        results = image_encode_executor.map(lambda index: trial(candidates[index]), indexes)
+        for index, result in zip(indexes, results):
+            if not accept(result):
+                high = index - 1
+                break
+            best = (candidates[index], result)
+            low = index + 1
+    return best
+
+def search_compression(image, formats, target_bytes=None, target_ssim=None):
+    """Pick format and quality for a byte budget or a minimum SSIM
+
+    Lossy formats are searched over quality: the highest quality that fits
+    target_bytes, or the lowest that still reaches target_ssim (measured on a
+    downscaled proxy). Under a byte budget the candidate with the best SSIM wins,
+    under an SSIM target the smallest output wins. PNG is only encoded at full
+    size when the proxy suggests it can compete. Returns a dict with data,
+    format, quality, ssim and whether the target was met.
+    """
+    proxy = image.resize(fit_size(image.size, (SSIM_PROXY_SIZE, SSIM_PROXY_SIZE)), Image.Resampling.LANCZOS)
+    reference = ssim_luma(proxy)
+    pixel_ratio = (image.width * image.height) / (proxy.width * proxy.height)
+
+    def proxy_ssim(format, quality):
+        decoded = Image.open(io.BytesIO(compress_encode(proxy, format, quality)))
+        return compute_ssim(reference, ssim_luma(decoded))
+
+    png_estimate = len(compress_encode(proxy, "PNG")) * pixel_ratio if "PNG" in formats else None
+    png_future = None
+    if png_estimate and target_bytes and png_estimate <= target_bytes * COMPRESS_PNG_SLACK:
+        # Lossless PNG is one slow encode; overlap it with the lossy searches
+        png_future = image_encode_executor.submit(compress_encode, image, "PNG")
+
+    lowest, highest = COMPRESS_QUALITY_RANGE
+    qualities = list(range(lowest, highest + 1))
+    candidates = []
+
+    for format in formats:
+        if format == "PNG":
+            continue
+        if target_bytes:
+            # Byte counts don't scale predictably from the proxy, so these trials are full size
+            found = search_accepted_prefix(
+                qualities,
+                lambda quality: compress_encode(image, format, quality),
+                lambda data: len(data) <= target_bytes
+            )
+            if found:
+                quality, data = found
+                candidates.append({"format": format, "quality": quality, "data": data, "ssim": proxy_ssim(format, quality)})
+        else:
+            found = search_accepted_prefix(
+                qualities[::-1],
+                lambda quality: proxy_ssim(format, quality),
+                lambda score: score >= target_ssim
+            )
+            if found:
+                quality, score = found
+                candidates.append({"format": format, "quality": quality, "data": compress_encode(image, format, quality), "ssim": score})
+
+    png_data = png_future.result() if png_future else None
+    if png_estimate and not target_bytes:
+        smallest = min((len(candidate["data"]) for candidate in candidates), default=None)
+        if smallest is None or png_estimate <= smallest * COMPRESS_PNG_SLACK:
+            png_data = compress_encode(image, "PNG")
+    if png_data and (not target_bytes or len(png_data) <= target_bytes):
+        candidates.append({"format": "PNG", "quality": None, "data": png_data, "ssim": 1.0})
+
+    if candidates:
+        if target_bytes:
+            best = max(candidates, key=lambda candidate: (candidate["ssim"], -len(candidate["data"])))
+        else:
+            best = min(candidates, key=lambda candidate: len(candidate["data"]))
+        return dict(best, target_met=True)
+
+    # Target out of reach: fall back to the lowest (byte budget) or highest (SSIM) quality
+    quality = lowest if target_bytes else highest
+    fallbacks = [
+        {"format": format, "quality": quality, "data": compress_encode(image, format, quality)}
+        for format in formats if format != "PNG"
+    ]
+    if png_data or not fallbacks:
+        fallbacks.append({"format": "PNG", "quality": None, "data": png_data or compress_encode(image, "PNG")})
+    best = min(fallbacks, key=lambda candidate: len(candidate["data"]))
+    best["ssim"] = proxy_ssim(best["format"], best["quality"]) if best["format"] != "PNG" else 1.0
+    return dict(best, target_met=False)
+
+# Palette PNG: taken when adaptive quantization stays under this per-channel RMS error (0 disables)
+PNG_PALETTE_MAX_ERROR = float(os.getenv("PNG_PALETTE_MAX_ERROR", "2.0"))
+# zlib strategies tried in parallel, keeping the smallest result
+PNG_ZLIB_STRATEGIES = [zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED, zlib.Z_RLE]
+# Above this many bytes of raw pixels only the default strategy is tried
+PNG_STRATEGY_TRIAL_BYTES = 16_000_000
+
+def quantize_pil_image(image, colors=256, dither=False):
+    """Adaptive palette version of an RGB/RGBA/LA image, and the source it was built from
+
+    Octree quantization is used for alpha images (the only alpha-aware built-in method).
+    """
+    has_alpha = "A" in image.getbands()
+    source = image if image.mode in ("RGB", "RGBA") else image.convert("RGBA" if has_alpha else "RGB")
+    method = Image.Quantize.FASTOCTREE if has_alpha else Image.Quantize.MEDIANCUT
+    dither_mode = Image.Dither.FLOYDSTEINBERG if dither else Image.Dither.NONE
+    return source.quantize(colors, method=method, dither=dither_mode), source
+
+def palette_error(source, quantized):
+    """Worst per-channel RMS difference between an image and its palette version"""
+    difference = ImageChops.difference(source, quantized.convert(source.mode))
+    return max(ImageStat.Stat(difference).rms)
+
+def encode_png(image, dither=False, max_error=PNG_PALETTE_MAX_ERROR, parallel=True):
+    """Size-optimized PNG: palette when quantization is near-lossless, then the best zlib strategy
+
+    Flat graphics and screenshots quantize with (close to) no error and shrink
+    several times; photos exceed max_error and stay truecolor. Images large enough
+    to be processed in strips skip the palette trial, which needs several full-size
+    copies. Pass parallel=False when already running on image_encode_executor.
+    """
+    if max_error > 0 and image.mode in ("RGB", "RGBA", "LA") and not needs_tiling(image):
+        quantized, source = quantize_pil_image(image, dither=dither)
+        if palette_error(source, quantized) <= max_error:
+            image = quantized
+
+    def save_png(strategy):
+        output = io.BytesIO()
+        image.save(output, format="PNG", compress_level=9, compress_type=strategy)
+        return output.getvalue()
+
+    raw_bytes = image.width * image.height * len(image.getbands())
+    strategies = PNG_ZLIB_STRATEGIES if raw_bytes <= PNG_STRATEGY_TRIAL_BYTES else PNG_ZLIB_STRATEGIES[:1]
+    results = image_encode_executor.map(save_png, strategies) if parallel else map(save_png, strategies)
+    return min(results, key=len)
+
+# Imaging backend per operation: "pillow", "opencv" or "auto" (startup microbenchmark)
+IMAGE_BACKEND_SETTINGS = {
+    "resize": os.getenv("IMAGE_RESIZE_BACKEND", os.getenv("IMAGE_BACKEND", "auto")),
+    "encode": os.getenv("IMAGE_ENCODE_BACKEND", os.getenv("IMAGE_BACKEND", "auto"))
+}
+# A backend is only eligible when its output keeps at least this SSIM against the reference
+IMAGE_BACKEND_MIN_SSIM = float(os.getenv("IMAGE_BACKEND_MIN_SSIM", "0.95"))
+# Modes OpenCV handles directly; everything else (alpha, palette, 16-bit) stays on Pillow
+OPENCV_MODES = ("RGB", "L")
+
+# Resolved at startup by calibrate_image_backends()
+image_backends = {"resize": "pillow", "encode": "pillow"}
+image_backend_report = {}
+
+def uses_opencv(operation, image):
+    """Whether an operation on this image should run on the OpenCV backend"""
+    return image_backends.get(operation) == "opencv" and image.mode in OPENCV_MODES
+
+def resize_opencv(image, size):
+    """cv2.resize: area averaging for downscales, Lanczos for upscales"""
+    interpolation = cv2.INTER_AREA if size[0] <= image.width and size[1] <= image.height else cv2.INTER_LANCZOS4
+    return Image.fromarray(cv2.resize(np.asarray(image), size, interpolation=interpolation), image.mode)
+
+def encode_opencv(image, save_format, quality=None, optimize=False, progressive=False):
+    """cv2.imencode for JPEG/WebP with Pillow's default qualities"""
+    pixels = np.asarray(image)
+    if image.mode == "RGB":
+        pixels = cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR)
+    if save_format == "JPEG":
+        extension = ".jpg"
+        params = [
+            cv2.IMWRITE_JPEG_QUALITY, 75 if quality is None else quality,
+            cv2.IMWRITE_JPEG_OPTIMIZE, int(optimize),
+            cv2.IMWRITE_JPEG_PROGRESSIVE, int(progressive)
+        ]
+    else:
+        extension = ".webp"
+        params = [cv2.IMWRITE_WEBP_QUALITY, 80 if quality is None else min(quality, 100)]
+    ok, buffer = cv2.imencode(extension, pixels, params)
+    if not ok:
+        raise ValueError(f"OpenCV could not encode {save_format}")
+    return buffer.tobytes()
+
+def make_calibration_image(width=1600, height=1200):
+    """Deterministic photo-like test image: gradients, texture and hard edges"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, width, dtype=np.float32)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, np.newaxis]
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    for channel, (a, b) in enumerate([(150, 40), (60, 120), (90, 90)]):
+        texture = 25 * np.sin(x * (40 + 10 * channel)) * np.cos(y * 30) + rng.normal(0, 2, (height, width))
+        pixels[..., channel] = np.clip(a * x + b * y + 30 + texture, 0, 255)
+    pixels[height // 3:height // 2, width // 4:width // 2] = (240, 240, 240)
+    return Image.fromarray(pixels, "RGB")
+
+def time_best(func, repeats=3):
+    """Best wall time of func() and its last result"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def calibrate_image_backends():
+    """Pick the faster backend per "auto" operation among those meeting IMAGE_BACKEND_MIN_SSIM
+
+    Resize is checked against a Pillow LANCZOS reference and encode against the
+    source after a decode round trip, so both backends face the same tolerances.
+    """
+    sample = make_calibration_image()
+    target = (sample.width // 4, sample.height // 4)
+    reference = ssim_luma(sample.resize(target, Image.Resampling.LANCZOS))
+    source = ssim_luma(sample)
+
+    def encode_pillow():
+        output = io.BytesIO()
+        sample.save(output, format="JPEG", quality=85)
+        return output.getvalue()
+
+    trials = {
+        "resize": {
+            "pillow": lambda: sample.resize(target, Image.Resampling.LANCZOS, reducing_gap=IMAGE_REDUCING_GAP),
+            "opencv": lambda: resize_opencv(sample, target)
+        },
+        "encode": {
+            "pillow": encode_pillow,
+            "opencv": lambda: encode_opencv(sample, "JPEG", 85)
+        }
+    }
+
+    for operation, candidates in trials.items():
+        setting = IMAGE_BACKEND_SETTINGS[operation]
+        if setting in ("pillow", "opencv"):
+            image_backends[operation] = setting
+            image_backend_report[operation] = {"backend": setting, "source": "config"}
+            continue
+
+        results = {}
+        for name, run in candidates.items():
+            try:
+                seconds, output = time_best(run)
+                if operation == "resize":
+                    score = compute_ssim(reference, ssim_luma(output))
+                else:
+                    score = compute_ssim(source, ssim_luma(Image.open(io.BytesIO(output))))
+                results[name] = {"seconds": round(seconds, 4), "ssim": round(score, 4), "eligible": score >= IMAGE_BACKEND_MIN_SSIM}
+            except Exception as e:
+                results[name] = {"error": str(e), "eligible": False}
+
+        eligible = [name for name, result in results.items() if result["eligible"]]
+        choice = min(eligible, key=lambda name: results[name]["seconds"]) if eligible else "pillow"
+        image_backends[operation] = choice
+        image_backend_report[operation] = {"backend": choice, "source": "benchmark", "results": results}
+
+    return image_backend_report
+
+# Animated GIF/WebP: frames are decoded in order and transformed this many at a time in parallel
+ANIMATED_FORMATS = ("GIF", "WEBP")
+ANIMATION_WINDOW_FRAMES = int(os.getenv("ANIMATION_WINDOW_FRAMES", "16"))
+# GIF frames share a 255-color palette; the last index is kept for transparency
+GIF_TRANSPARENT_INDEX = 255
+GIF_PALETTE_SAMPLE_WIDTH = 256
+GIF_PALETTE_SAMPLE_FRAMES = 32  # frames sampled evenly across the animation for its palette
+
+def is_animated(image):
+    """Whether an image has more than one frame"""
+    return getattr(image, "n_frames", 1) > 1
+
+def iter_animation_windows(image):
+    """Decode frames in order, yielding lists of (RGBA frame, duration, disposal)"""
+    window = []
+    for index in range(image.n_frames):
+        image.seek(index)
+        window.append((image.convert("RGBA"), image.info.get("duration", 100), getattr(image, "disposal_method", 0)))
+        if len(window) == ANIMATION_WINDOW_FRAMES:
+            yield window
+            window = []
+    if window:
+        yield window
+
+def sample_animation_frames(image, count=GIF_PALETTE_SAMPLE_FRAMES):
+    """Evenly spaced frames from the whole animation, downscaled for palette building
+
+    Every frame is decoded (later frames composite onto earlier ones), but only
+    one window is full size at a time and only the samples are kept.
+    """
+    step = -(-image.n_frames // count)
+    samples = []
+    index = 0
+    for window in iter_animation_windows(image):
+        for frame, _, _ in window:
+            if index % step == 0:
+                samples.append(frame.resize(fit_size(frame.size, (GIF_PALETTE_SAMPLE_WIDTH, GIF_PALETTE_SAMPLE_WIDTH))))
+            index += 1
+    return samples
+
+def build_shared_palette(frames):
+    """One adaptive palette for a set of frames, from downscaled copies stacked vertically"""
+    samples = [
+        frame.convert("RGB").resize(fit_size(frame.size, (GIF_PALETTE_SAMPLE_WIDTH, GIF_PALETTE_SAMPLE_WIDTH)))
+        for frame in frames
+    ]
+    montage = Image.new("RGB", (max(sample.width for sample in samples), sum(sample.height for sample in samples)))
+    top = 0
+    for sample in samples:
+        montage.paste(sample, (0, top))
+        top += sample.height
+    return montage.quantize(GIF_TRANSPARENT_INDEX, method=Image.Quantize.MEDIANCUT)
+
+def quantize_to_palette(frame, palette):
+    """Map an RGBA frame onto the shared palette; transparent pixels get GIF_TRANSPARENT_INDEX"""
+    quantized = frame.convert("RGB").quantize(palette=palette, dither=Image.Dither.NONE)
+    colors = palette.getpalette()[:GIF_TRANSPARENT_INDEX * 3]
+    quantized.putpalette(colors + [0] * (768 - len(colors)))
+    transparent = frame.getchannel("A").point(lambda alpha: 255 if alpha < 128 else 0)
+    if transparent.getbbox():
+        quantized.paste(GIF_TRANSPARENT_INDEX, mask=transparent)
+        quantized.info["transparency"] = GIF_TRANSPARENT_INDEX
+    return quantized
+
+def transform_animation(image, transform, save_format, quality=None):
+    """Re-encode an animated GIF/WebP with transform applied to every frame
+
+    Only one window of full-size decoded frames is alive at a time; each window is
+    transformed in parallel. Durations, disposal and the loop count are kept. GIF
+    output uses one palette built from frames sampled across the whole animation,
+    so colors stay stable and frames are held as 1 byte per pixel until Pillow
+    writes the file. Transforms only resize, so the palette is sampled from the
+    source frames.
+    """
+    if image.width * image.height * image.n_frames > MAX_TILED_IMAGE_PIXELS:
+        raise HTTPException(status_code=413, detail=f"Animation is too large. Maximum {MAX_TILED_IMAGE_PIXELS} pixels across all frames allowed.")
+
+    frames, durations, disposals = [], [], []
+    palette = build_shared_palette(sample_animation_frames(image)) if save_format == "GIF" else None
+    for window in iter_animation_windows(image):
+        transformed = list(image_encode_executor.map(transform, [frame for frame, _, _ in window]))
+        if save_format == "GIF":
+            transformed = list(image_encode_executor.map(lambda frame: quantize_to_palette(frame, palette), transformed))
+        frames.extend(transformed)
+        durations.extend(duration for _, duration, _ in window)
+        disposals.extend(disposal for _, _, disposal in window)
+
+    save_kwargs = {"save_all": True, "append_images": frames[1:], "duration": durations, "loop": image.info.get("loop", 0)}
+    if save_format == "GIF":
+        save_kwargs.update(disposal=disposals, optimize=True)
+    elif quality is not None:
+        save_kwargs["quality"] = quality
+
+    output = io.BytesIO()
+    frames[0].save(output, format=save_format, **save_kwargs)
+    return output.getvalue()
+
+# Image formats MuPDF embeds from the original bytes (JPEG stays DCT-encoded, untouched)
+PDF_PASSTHROUGH_IMAGE_FORMATS = {"JPEG": ("RGB", "L"), "PNG": ("RGB", "RGBA", "L", "LA", "P", "1")}
+
+def add_image_page(pdf_document, content):
+    """Append a page sized to the image (1 px = 1 pt) showing the uploaded image
+
+    JPEG and PNG bytes are embedded as they are, without decoding, so JPEGs keep
+    their exact quality. Other formats are decoded and stored losslessly as PNG;
+    CMYK JPEGs are already lossy and become high-quality RGB JPEGs.
+    """
+    image = open_image(content)  # header only - nothing is decoded yet
+    width, height = image.size
+    if image.mode not in PDF_PASSTHROUGH_IMAGE_FORMATS.get(image.format, ()):
+        if image.format == "JPEG":
+            content = encode_pil_image(convert_pil_image(image, "RGB"), "JPEG", quality=95)
+        else:
+            has_alpha = "A" in image.getbands() or "transparency" in image.info
+            content = encode_pil_image(convert_pil_image(image, "RGBA" if has_alpha else "RGB"), "PNG")
+    image.close()
+
+    page = pdf_document.new_page(width=width, height=height)
+    page.insert_image(page.rect, stream=content)
+
+# Scan-to-PDF pipeline: page outline, deskew and colour analysis run on a downscaled copy
+SCAN_PAPER_SIZES = {  # portrait width x height in points
+    "a3": (841.89, 1190.55),
+    "a4": (595.28, 841.89),
+    "a5": (419.53, 595.28),
+    "letter": (612, 792),
+    "legal": (612, 1008),
+}
+SCAN_QUALITY_SETTINGS = {  # max pixel size, JPEG quality
+    "high": (None, 95),
+    "medium": ((1200, 1600), 85),
+    "low": ((800, 1000), 75),
+}
+SCAN_ORIENTATIONS = ["auto", "portrait", "landscape"]
+SCAN_COLOR_MODES = ["auto", "color", "grayscale", "bw"]
+SCAN_ANALYSIS_WIDTH = 800
+SCAN_MIN_PAGE_AREA = 0.2  # a detected page outline must cover this much of the photo
+SCAN_MAX_PAGE_AREA = 0.95  # ... and less than this, or there is nothing to crop
+SCAN_MIN_PAGE_SOLIDITY = 0.9  # share of its bounding box a non-quadrilateral page fills
+SCAN_MIN_PAGE_CONTRAST = 50  # grey levels between paper and background
+SCAN_DESKEW_MAX_ANGLE = 5.0
+SCAN_DESKEW_STEP = 0.25
+SCAN_DESKEW_MIN_GAIN = 1.05  # profile sharpness gain required before rotating
+SCAN_DESKEW_BLANK_ROW = 0.02  # row ink, relative to the fullest row, that counts as blank
+SCAN_DESKEW_MIN_LINE_GAPS = 0.1  # share of blank rows within the text block
+SCAN_BW_MAX_CHROMA = 12  # mean max-min channel spread of a colourless page
+SCAN_BW_MAX_MIDTONES = 0.06  # fraction of pixels neither ink nor paper
+
+def order_corners(points):
+    """Order four (x, y) points as top-left, top-right, bottom-right, bottom-left"""
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.float32([points[np.argmin(sums)], points[np.argmin(diffs)],
+                       points[np.argmax(sums)], points[np.argmax(diffs)]])
+
+def find_page_outline(gray):
+    """Corners of the bright sheet of paper in a photo, or None if it fills the frame
+
+    A four-sided outline is returned as found (for perspective correction); a
+    near-rectangular one falls back to its bounding box (a plain border crop).
+    Irregular or low-contrast bright regions are image content, not paper.
+    """
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, paper = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    paper = cv2.morphologyEx(paper, cv2.MORPH_CLOSE, np.ones((9, 9), np.uint8))
+    contours, _ = cv2.findContours(paper, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    outline = max(contours, key=cv2.contourArea)
+    area = cv2.contourArea(outline) / gray.size
+    if not SCAN_MIN_PAGE_AREA <= area <= SCAN_MAX_PAGE_AREA:
+        return None
+    # Paper stands out from the table or scanner lid; a split photo does not
+    if cv2.mean(gray, paper)[0] - cv2.mean(gray, ~paper)[0] < SCAN_MIN_PAGE_CONTRAST:
+        return None
+
+    approx = cv2.approxPolyDP(outline, 0.02 * cv2.arcLength(outline, True), True)
+    if len(approx) == 4 and cv2.isContourConvex(approx):
+        return order_corners(approx.reshape(4, 2).astype(np.float32))
+    x, y, w, h = cv2.boundingRect(outline)
+    if cv2.contourArea(outline) < SCAN_MIN_PAGE_SOLIDITY * w * h:
+        return None
+    return np.float32([[x, y], [x + w, y], [x + w, y + h], [x, y + h]])
+
+def warp_page(pixels, corners):
+    """Map the quadrilateral at corners onto an upright rectangle"""
+    top_left, top_right, bottom_right, bottom_left = corners
+    width = int(max(np.linalg.norm(top_right - top_left), np.linalg.norm(bottom_right - bottom_left)))
+    height = int(max(np.linalg.norm(bottom_left - top_left), np.linalg.norm(bottom_right - top_right)))
+    target = np.float32([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]])
+    matrix = cv2.getPerspectiveTransform(corners, target)
+    return cv2.warpPerspective(pixels, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+def estimate_skew(gray):
+    """Rotation (degrees) that makes text lines horizontal, from projection profiles
+
+    Rows of ink give the sharpest row-sum profile when they are level. Only
+    pages whose level profile has blank rows between the lines count as text;
+    photos and blank pages are left alone.
+    """
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if cv2.countNonZero(ink) < 0.001 * ink.size:
+        return 0.0
+    height, width = ink.shape
+    center = (width / 2, height / 2)
+
+    def row_profile(angle):
+        matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+        rotated = cv2.warpAffine(ink, matrix, (width, height), flags=cv2.INTER_NEAREST)
+        return rotated.sum(axis=1, dtype=np.float64)
+
+    angles = np.arange(-SCAN_DESKEW_MAX_ANGLE, SCAN_DESKEW_MAX_ANGLE + SCAN_DESKEW_STEP / 2, SCAN_DESKEW_STEP)
+    profiles = [row_profile(angle) for angle in angles]
+    scores = [np.var(profile) for profile in profiles]
+    best = int(np.argmax(scores))
+    if scores[best] < np.var(row_profile(0.0)) * SCAN_DESKEW_MIN_GAIN:
+        return 0.0
+
+    # Line spacing: blank rows between the first and last inked row
+    profile = profiles[best]
+    inked = np.flatnonzero(profile > SCAN_DESKEW_BLANK_ROW * profile.max())
+    body = profile[inked[0]:inked[-1] + 1]
+    if np.mean(body <= SCAN_DESKEW_BLANK_ROW * profile.max()) < SCAN_DESKEW_MIN_LINE_GAPS:
+        return 0.0
+    return float(angles[best])
+
+def looks_black_and_white(pixels):
+    """True for colourless pages that are almost all paper or ink (text, line art)"""
+    chroma = pixels.max(axis=2).astype(np.int16) - pixels.min(axis=2)
+    if chroma.mean() > SCAN_BW_MAX_CHROMA:
+        return False
+    gray = cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # Midtones that are not anti-aliased stroke edges
+    midtones = cv2.inRange(gray, 64, 192) & ~cv2.dilate(ink, np.ones((3, 3), np.uint8))
+    return cv2.countNonZero(midtones) < SCAN_BW_MAX_MIDTONES * gray.size
+
+def binarize_scan(gray):
+    """Adaptive threshold that tolerates uneven lighting; 0 = ink, 255 = paper"""
+    block = max(15, (min(gray.shape) // 40) | 1)
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 10)
+
+def encode_ccitt_g4(bilevel):
+    """Raw CCITT Group 4 data for a 0/255 array, or None if libtiff split it into strips"""
+    output = io.BytesIO()
+    Image.fromarray(bilevel).convert("1", dither=Image.Dither.NONE).save(
+        output, format="TIFF", compression="group4", strip_size=bilevel.size
+    )
+    tiff = Image.open(output)
+    offsets, byte_counts = tiff.tag_v2.get(273), tiff.tag_v2.get(279)
+    if len(offsets) != 1:
+        return None
+    return output.getvalue()[offsets[0]:offsets[0] + byte_counts[0]]
+
+def prepare_scan_page(content, quality, orientation, color_mode, deskew, auto_crop):
+    """Decode and clean up one scanned image
+
+    Returns (kind, width, height, data): kind "g4" is raw CCITT G4 for a
+    bilevel page, "jpeg" is a complete JPEG file.
+    """
+    max_size, jpeg_quality = SCAN_QUALITY_SETTINGS[quality]
+    image = ImageOps.exif_transpose(open_image(content, max_size, maintain_aspect=True))
+    if max_size:
+        image = resize_pil_image(image, max_size[0], max_size[1], maintain_aspect=True)
+    pixels = np.asarray(convert_pil_image(image, "RGB"))
+    image.close()
+
+    if auto_crop or deskew:
+        height, width = pixels.shape[:2]
+        scale = min(1.0, SCAN_ANALYSIS_WIDTH / width)
+        preview = cv2.resize(cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY), None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        corners = find_page_outline(preview) if auto_crop else None
+        if corners is not None:
+            pixels = warp_page(pixels, corners / scale)
+            preview = warp_page(preview, corners)
+        angle = estimate_skew(preview) if deskew else 0.0
+        if angle:
+            height, width = pixels.shape[:2]
+            matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+            pixels = cv2.warpAffine(pixels, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+    height, width = pixels.shape[:2]
+    if (orientation == "portrait" and width > height) or (orientation == "landscape" and height > width):
+        pixels = cv2.rotate(pixels, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        height, width = width, height
+
+    if color_mode == "bw" or (color_mode == "auto" and looks_black_and_white(pixels)):
+        data = encode_ccitt_g4(binarize_scan(cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY)))
+        if data is not None:
+            return "g4", width, height, data
+        color_mode = "grayscale"
+    page = Image.fromarray(cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY) if color_mode == "grayscale" else pixels)
+    return "jpeg", width, height, encode_pil_image(page, "JPEG", quality=jpeg_quality)
+
+def add_scan_page(pdf_document, scan_page, paper_size):
+    """Append a prepared scan page, centred and scaled to fit the paper size
+
+    Without a paper size the page takes the image size (1 px = 1 pt).
+    G4 data has no container MuPDF can read without re-encoding, so it is
+    written as a CCITTFax image object directly.
+    """
+    kind, width, height, data = scan_page
+    if paper_size is None:
+        page_width, page_height = width, height
+    else:
+        page_width, page_height = SCAN_PAPER_SIZES[paper_size]
+        if width > height:
+            page_width, page_height = page_height, page_width
+    page = pdf_document.new_page(width=page_width, height=page_height)
+
+    scale = min(page_width / width, page_height / height)
+    left = (page_width - width * scale) / 2
+    top = (page_height - height * scale) / 2
+    rect = fitz.Rect(left, top, left + width * scale, top + height * scale)
+
+    if kind == "jpeg":
+        page.insert_image(rect, stream=data)
+        return
+    xref = pdf_document.get_new_xref()
+    pdf_document.update_object(xref, "<<>>")
+    pdf_document.update_stream(xref, data, new=True, compress=False)
+    # Pillow's bilevel TIFFs store ink as 1 bits
+    pdf_document.update_object(xref, (
+        f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+        f"/ColorSpace /DeviceGray /BitsPerComponent 1 /Filter /CCITTFaxDecode "
+        f"/DecodeParms << /K -1 /Columns {width} /Rows {height} /BlackIs1 true >> /Length {len(data)} >>"
+    ))
+    page.insert_image(rect, xref=xref)
 
 # Image Processing Endpoints
 
@@ -2798,19 +5277,20 @@ async def convert_image(file: UploadFile = File(...), format: str = "png", quali
         file_size = len(content)
         
         # Open and convert image
-        image = Image.open(io.BytesIO(content))
+        image = open_image(content, max_pixels=MAX_TILED_IMAGE_PIXELS)
         original_format = image.format or "UNKNOWN"
         
-        # Convert RGBA to RGB for JPEG
-        if format.lower() in ["jpg", "jpeg"] and image.mode == "RGBA":
-            background = Image.new("RGB", image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[-1])
-            image = background
-        
-        # Save to BytesIO
-        output = io.BytesIO()
-        image.save(output, format=format.upper(), quality=quality)
-        output.seek(0)
+        # Save to BytesIO (RGBA is flattened to RGB for JPEG, PNG is size-optimized)
+        save_format = IMAGE_SAVE_FORMATS[format.lower()]
+        if is_animated(image) and save_format in ANIMATED_FORMATS:
+            # Keep every frame, not just the first (default executor: frames fan out onto image_encode_executor)
+            output = io.BytesIO(await asyncio.get_running_loop().run_in_executor(
+                None, transform_animation, image, lambda frame: frame, save_format, quality
+            ))
+        elif format.lower() == "png":
+            output = io.BytesIO(encode_png(image))
+        else:
+            output = io.BytesIO(encode_pil_image(image, format, quality=quality))
         
         filename = f"{file.filename.rsplit('.', 1)[0]}.{format}"
         media_type = f"image/{format}"
@@ -2824,14 +5304,15 @@ async def convert_image(file: UploadFile = File(...), format: str = "png", quali
             )
         
         # Save file metadata
-        await save_file_metadata({
-            "user_id": current_user.id,
-            "filename": filename,
-            "original_name": file.filename,
-            "file_size": file_size,
-            "format": format,
-            "upload_date": datetime.now()
-        })
+        if current_user:
+            await save_file_metadata({
+                "user_id": current_user.id,
+                "filename": filename,
+                "original_name": file.filename,
+                "file_size": file_size,
+                "format": format,
+                "upload_date": datetime.now()
+            })
         
         return StreamingResponse(
             output,
@@ -2839,6 +5320,9 @@ async def convert_image(file: UploadFile = File(...), format: str = "png", quali
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -2862,18 +5346,22 @@ async def resize_image(
         content = await file.read()
         file_size = len(content)
         
-        image = Image.open(io.BytesIO(content))
+        image = open_image(content, (width, height), maintain_aspect, max_pixels=MAX_TILED_IMAGE_PIXELS)
         original_format = image.format or "UNKNOWN"
         
-        if maintain_aspect:
-            image.thumbnail((width, height), Image.Resampling.LANCZOS)
+        if is_animated(image) and original_format in ANIMATED_FORMATS:
+            # Resize every frame, keeping timing and disposal
+            format = original_format
+            output = io.BytesIO(await asyncio.get_running_loop().run_in_executor(
+                None, transform_animation, image, lambda frame: resize_pil_image(frame, width, height, maintain_aspect), format
+            ))
         else:
-            image = image.resize((width, height), Image.Resampling.LANCZOS)
-        
-        output = io.BytesIO()
-        format = image.format or "PNG"
-        image.save(output, format=format)
-        output.seek(0)
+            image = resize_pil_image(image, width, height, maintain_aspect)
+            
+            output = io.BytesIO()
+            format = image.format or "PNG"
+            image.save(output, format=format)
+            output.seek(0)
         
         # Log the operation
         if current_user:
@@ -2889,6 +5377,9 @@ async def resize_image(
             headers={"Content-Disposition": f"attachment; filename=resized_{file.filename}"}
         )
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -2904,6 +5395,7 @@ async def enhance_image(
     brightness: float = Form(1.0),
     contrast: float = Form(1.0),
     saturation: float = Form(1.0),
+    auto_levels: bool = Form(False),
     current_user = Depends(get_current_user_optional)
 ):
     """Enhance image brightness, contrast, and saturation"""
@@ -2912,21 +5404,11 @@ async def enhance_image(
         content = await file.read()
         file_size = len(content)
         
-        image = Image.open(io.BytesIO(content))
+        image = open_image(content, max_pixels=MAX_TILED_IMAGE_PIXELS)
         original_format = image.format or "UNKNOWN"
         
         # Apply enhancements
-        if brightness != 1.0:
-            enhancer = ImageEnhance.Brightness(image)
-            image = enhancer.enhance(brightness)
-        
-        if contrast != 1.0:
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(contrast)
-        
-        if saturation != 1.0:
-            enhancer = ImageEnhance.Color(image)
-            image = enhancer.enhance(saturation)
+        image = enhance_pil_image(image, brightness, contrast, saturation, auto_levels)
         
         output = io.BytesIO()
         format = image.format or "PNG"
@@ -2947,6 +5429,9 @@ async def enhance_image(
             headers={"Content-Disposition": f"attachment; filename=enhanced_{file.filename}"}
         )
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -2964,8 +5449,8 @@ async def remove_background(file: UploadFile = File(...), current_user = Depends
         content = await file.read()
         file_size = len(content)
         
-        # Remove background
-        output_data = remove(content)
+        # Remove background (rembg takes and returns a PIL image, saving a PNG round trip)
+        output_data = encode_png(remove(open_image(content)))
         
         filename = f"no_bg_{file.filename.rsplit('.', 1)[0]}.png"
         
@@ -2983,6 +5468,9 @@ async def remove_background(file: UploadFile = File(...), current_user = Depends
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -2993,41 +5481,92 @@ async def remove_background(file: UploadFile = File(...), current_user = Depends
         raise HTTPException(status_code=500, detail=f"Background removal failed: {str(e)}")
 
 @app.post("/image/compress")
-async def compress_image(file: UploadFile = File(...), quality: int = Form(85), current_user = Depends(get_current_user_optional)):
-    """Compress image to reduce file size"""
+async def compress_image(
+    file: UploadFile = File(...),
+    quality: int = Form(85),
+    target_bytes: int = Form(0),
+    target_ssim: float = Form(0.0),
+    formats: str = Form("jpeg,webp,png"),
+    current_user = Depends(get_current_user_optional)
+):
+    """Compress image to reduce file size
+
+    Without a target this is a fixed-quality JPEG encode. With target_bytes or
+    target_ssim the engine searches quality and picks among the given formats.
+    """
+    if target_bytes and target_ssim:
+        raise HTTPException(status_code=400, detail="Specify either target_bytes or target_ssim, not both")
+    if target_bytes < 0:
+        raise HTTPException(status_code=400, detail="target_bytes must be positive")
+    if target_ssim and not 0 < target_ssim <= 1:
+        raise HTTPException(status_code=400, detail="target_ssim must be between 0 and 1")
+
+    candidate_formats = []
+    for name in formats.split(","):
+        name = name.strip().lower()
+        if IMAGE_SAVE_FORMATS.get(name) not in COMPRESS_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Formats must be among: {[f.lower() for f in COMPRESS_FORMATS]}")
+        if IMAGE_SAVE_FORMATS[name] not in candidate_formats:
+            candidate_formats.append(IMAGE_SAVE_FORMATS[name])
+
     try:
         # Read file content for size calculation
         content = await file.read()
         original_size = len(content)
         
-        image = Image.open(io.BytesIO(content))
+        image = open_image(content)
         original_format = image.format or "UNKNOWN"
         
-        # Convert to RGB if necessary
-        if image.mode in ("RGBA", "P"):
-            image = image.convert("RGB")
-        
-        output = io.BytesIO()
-        image.save(output, format="JPEG", quality=quality, optimize=True)
-        output.seek(0)
+        if target_bytes or target_ssim:
+            # JPEG would flatten transparency, so it only competes for opaque images
+            has_alpha = "A" in image.getbands() or "transparency" in image.info
+            if has_alpha and len(candidate_formats) > 1 and "JPEG" in candidate_formats:
+                candidate_formats.remove("JPEG")
+            # Not image_encode_executor: the search fans its trial encodes out onto it
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, search_compression, image, candidate_formats, target_bytes or None, target_ssim or None
+            )
+        else:
+            # Convert to RGB if necessary
+            if image.mode in ("RGBA", "P"):
+                image = image.convert("RGB")
+            result = {
+                "format": "JPEG", "quality": quality, "ssim": None, "target_met": True,
+                "data": encode_pil_image(image, "JPEG", quality=quality, optimize=True)
+            }
         
-        compressed_size = len(output.getvalue())
-        filename = f"compressed_{file.filename.rsplit('.', 1)[0]}.jpg"
+        output = io.BytesIO(result["data"])
+        compressed_size = len(result["data"])
+        extension = "jpg" if result["format"] == "JPEG" else result["format"].lower()
+        filename = f"compressed_{file.filename.rsplit('.', 1)[0]}.{extension}"
+        
+        headers = {
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Compression-Format": extension,
+            "X-Compression-Quality": str(result["quality"]) if result["quality"] is not None else "lossless",
+            "X-Compression-Ratio": f"{original_size / max(compressed_size, 1):.2f}",
+            "X-Compression-Target-Met": str(result["target_met"]).lower()
+        }
+        if result["ssim"] is not None:
+            headers["X-Compression-SSIM"] = f"{result['ssim']:.4f}"
         
         # Log the operation
         if current_user:
             await log_operation(
                 current_user.id, "image_compress", file.filename, 
-                original_format.lower(), "jpg", original_size, True
+                original_format.lower(), extension, original_size, True
         
             )
         
         return StreamingResponse(
             output,
-            media_type="image/jpeg",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+            media_type=f"image/{'jpeg' if result['format'] == 'JPEG' else extension}",
+            headers=headers
         )
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -3043,75 +5582,53 @@ async def add_watermark(
     text: str = Form(...),
     position: str = Form("bottom-right"),
     opacity: float = Form(0.5),
+    font_family: str = Form(DEFAULT_WATERMARK_FONT),
+    font_size: int = Form(0),
+    pattern: str = Form("single"),
     current_user = Depends(get_current_user_optional)
 ):
     """Add text watermark to image"""
+    if pattern not in WATERMARK_PATTERNS:
+        raise HTTPException(status_code=400, detail=f"Pattern must be one of: {WATERMARK_PATTERNS}")
+
     try:
         # Read file content for size calculation
         content = await file.read()
         file_size = len(content)
         
-        image = Image.open(io.BytesIO(content))
+        image = open_image(content, max_pixels=MAX_TILED_IMAGE_PIXELS)
         original_format = image.format or "UNKNOWN"
         
         # Create watermark
-        watermark = Image.new("RGBA", image.size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(watermark)
-        
-        # Calculate font size based on image size
-        font_size = max(20, min(image.size) // 20)
-        try:
-            font = ImageFont.truetype("arial.ttf", font_size)
-        except:
-            font = ImageFont.load_default()
-        
-        # Get text dimensions
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        
-        # Calculate position
-        margin = 20
-        positions = {
-            "top-left": (margin, margin),
-            "top-right": (image.width - text_width - margin, margin),
-            "bottom-left": (margin, image.height - text_height - margin),
-            "bottom-right": (image.width - text_width - margin, image.height - text_height - margin),
-            "center": ((image.width - text_width) // 2, (image.height - text_height) // 2)
-        }
-        
-        pos = positions.get(position, positions["bottom-right"])
-        
-        # Draw text with opacity
-        text_color = (255, 255, 255, int(255 * opacity))
-        draw.text(pos, text, font=font, fill=text_color)
-        
-        # Composite watermark onto image
-        if image.mode != "RGBA":
-            image = image.convert("RGBA")
+        watermarked = watermark_pil_image(image, text, position, opacity, font_family, font_size or None, pattern)
         
-        watermarked = Image.alpha_composite(image, watermark)
-        
-        output = io.BytesIO()
-        watermarked.save(output, format="PNG")
-        output.seek(0)
+        # Keep the input format (a watermarked JPEG stays a JPEG)
+        format = original_format if original_format in IMAGE_SAVE_FORMATS.values() else "PNG"
+        if format == "PNG":
+            output = io.BytesIO(encode_png(watermarked))
+        else:
+            output = io.BytesIO(encode_pil_image(watermarked, format, quality=95))
         
-        filename = f"watermarked_{file.filename.rsplit('.', 1)[0]}.png"
+        extension = "jpg" if format == "JPEG" else format.lower()
+        filename = f"watermarked_{file.filename.rsplit('.', 1)[0]}.{extension}"
         
         # Log the operation
         if current_user:
             await log_operation(
                 current_user.id, "image_watermark", file.filename, 
-                original_format.lower(), "png", file_size, True
+                original_format.lower(), extension, file_size, True
         
             )
         
         return StreamingResponse(
             output,
-            media_type="image/png",
+            media_type=f"image/{'jpeg' if format == 'JPEG' else format.lower()}",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -3121,6 +5638,307 @@ async def add_watermark(
             )
         raise HTTPException(status_code=500, detail=f"Watermark failed: {str(e)}")
 
+IMAGE_PIPELINE_OPERATIONS = ["resize", "enhance", "watermark", "compress", "convert"]
+
+def step_value(step, name, default, cast, minimum=None, maximum=None):
+    """A pipeline step parameter cast and range-checked, or a 400 naming it"""
+    value = step.get(name, default)
+    if value is None:
+        return None
+    try:
+        if cast is bool:
+            if isinstance(value, str) and value.strip().lower() in ("true", "1", "yes", "on", "false", "0", "no", "off"):
+                return value.strip().lower() in ("true", "1", "yes", "on")
+            if value in (True, False):
+                return bool(value)
+            raise ValueError(value)
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid '{name}' for {step['op']}: {step.get(name)!r}")
+    if minimum is not None and value < minimum:
+        raise HTTPException(status_code=400, detail=f"'{name}' for {step['op']} must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise HTTPException(status_code=400, detail=f"'{name}' for {step['op']} must be at most {maximum}")
+    return value
+
+def parse_image_pipeline_step(step):
+    """Validate one /image/pipeline step up front; returns its parameters with defaults applied"""
+    if not isinstance(step, dict) or step.get('op') not in IMAGE_PIPELINE_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"Each operation must have an 'op' of: {IMAGE_PIPELINE_OPERATIONS}")
+    op = step['op']
+    if op == 'resize':
+        return {
+            'op': op,
+            'width': step_value(step, 'width', None, int, 1, 100000),
+            'height': step_value(step, 'height', None, int, 1, 100000),
+            'maintain_aspect': step_value(step, 'maintain_aspect', False, bool)
+        }
+    if op == 'enhance':
+        return {
+            'op': op,
+            'brightness': step_value(step, 'brightness', 1.0, float, 0, 10),
+            'contrast': step_value(step, 'contrast', 1.0, float, 0, 10),
+            'saturation': step_value(step, 'saturation', 1.0, float, 0, 10),
+            'auto_levels': step_value(step, 'auto_levels', False, bool)
+        }
+    if op == 'watermark':
+        parsed = {
+            'op': op,
+            'text': str(step.get('text', '')),
+            'position': str(step.get('position', 'bottom-right')),
+            'opacity': step_value(step, 'opacity', 0.5, float, 0, 1),
+            'font_family': str(step.get('font_family', DEFAULT_WATERMARK_FONT)),
+            'font_size': step_value(step, 'font_size', 0, int, 0),
+            'pattern': str(step.get('pattern', 'single'))
+        }
+        if parsed['position'] not in WATERMARK_POSITIONS:
+            raise HTTPException(status_code=400, detail=f"Position must be one of: {WATERMARK_POSITIONS}")
+        if parsed['pattern'] not in WATERMARK_PATTERNS:
+            raise HTTPException(status_code=400, detail=f"Pattern must be one of: {WATERMARK_PATTERNS}")
+        return parsed
+    if op == 'compress':
+        return {'op': op, 'quality': step_value(step, 'quality', 85, int, 1, 100)}
+    format = str(step.get('format', 'png')).lower()
+    if format not in IMAGE_SAVE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {list(IMAGE_SAVE_FORMATS)}")
+    return {'op': op, 'format': format, 'quality': step_value(step, 'quality', 95, int, 1, 100)}
+
+@app.post("/image/pipeline")
+async def image_pipeline(
+    file: UploadFile = File(...),
+    operations: str = Form("[]"),
+    current_user = Depends(get_current_user_optional)
+):
+    """Apply an ordered list of image operations with a single decode and encode"""
+    # Parse operations, e.g. [{"op": "resize", "width": 800, "height": 600}, {"op": "compress", "quality": 80}]
+    try:
+        steps = json.loads(operations) if operations else []
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid operations format")
+
+    if not isinstance(steps, list) or not steps:
+        raise HTTPException(status_code=400, detail="No operations specified")
+
+    steps = [parse_image_pipeline_step(step) for step in steps]
+
+    try:
+        # Read file content for size calculation
+        content = await file.read()
+        file_size = len(content)
+        timings = []
+
+        # Decode once - at reduced JPEG scale when the first step is a downscale
+        step_start = time.perf_counter()
+        first_step = steps[0]
+        if first_step['op'] == 'resize' and first_step['width'] and first_step['height']:
+            image = open_image(
+                content,
+                (first_step['width'], first_step['height']),
+                first_step['maintain_aspect'],
+                max_pixels=MAX_TILED_IMAGE_PIXELS
+            )
+        else:
+            image = open_image(content, max_pixels=MAX_TILED_IMAGE_PIXELS)
+        original_format = image.format or "UNKNOWN"
+        image.load()
+        timings.append(("decode", time.perf_counter() - step_start))
+
+        # Output defaults to the input format; compress/convert only change the final encode
+        output_format = original_format if original_format in IMAGE_SAVE_FORMATS.values() else "PNG"
+        quality = None
+        optimize = False
+
+        for index, step in enumerate(steps):
+            step_start = time.perf_counter()
+            op = step['op']
+
+            if op == 'resize':
+                image = resize_pil_image(
+                    image,
+                    step['width'] or image.width,
+                    step['height'] or image.height,
+                    step['maintain_aspect']
+                )
+            elif op == 'enhance':
+                image = enhance_pil_image(
+                    image,
+                    step['brightness'],
+                    step['contrast'],
+                    step['saturation'],
+                    step['auto_levels']
+                )
+            elif op == 'watermark':
+                image = watermark_pil_image(
+                    image,
+                    step['text'],
+                    step['position'],
+                    step['opacity'],
+                    step['font_family'],
+                    step['font_size'] or None,
+                    step['pattern']
+                )
+            elif op == 'compress':
+                output_format = "JPEG"
+                quality = step['quality']
+                optimize = True
+            elif op == 'convert':
+                output_format = IMAGE_SAVE_FORMATS[step['format']]
+                quality = step['quality']
+
+            timings.append((f"{op}-{index + 1}", time.perf_counter() - step_start))
+
+        # Encode once
+        step_start = time.perf_counter()
+        output_data = encode_pil_image(image, output_format, quality=quality, optimize=optimize)
+        timings.append(("encode", time.perf_counter() - step_start))
+
+        extension = "jpg" if output_format == "JPEG" else output_format.lower()
+        filename = f"processed_{file.filename.rsplit('.', 1)[0]}.{extension}"
+
+        # Log the operation
+        if current_user:
+            await log_operation(
+                current_user.id, "image_pipeline", file.filename,
+                original_format.lower(), extension, file_size, True
+            )
+
+        return StreamingResponse(
+            io.BytesIO(output_data),
+            media_type=f"image/{'jpeg' if output_format == 'JPEG' else output_format.lower()}",
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}",
+                "Server-Timing": format_server_timing(timings)
+            }
+        )
+
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
+    except Exception as e:
+        if current_user:
+            await log_operation(
+                current_user.id, "image_pipeline", file.filename,
+                "unknown", "unknown", 0, False
+            )
+        raise HTTPException(status_code=500, detail=f"Image pipeline failed: {str(e)}")
+
+MAX_DERIVATIVE_TARGETS = 20
+
+@app.post("/image/derivatives")
+async def image_derivatives(
+    file: UploadFile = File(...),
+    targets: str = Form("[]"),
+    current_user = Depends(get_current_user_optional)
+):
+    """Build several resized/re-encoded versions of one image and return them as a ZIP"""
+    # Parse targets, e.g. [{"width": 1600, "format": "webp", "quality": 80}, {"width": 320, "format": "jpg"}]
+    try:
+        target_list = json.loads(targets) if targets else []
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid targets format")
+
+    if not isinstance(target_list, list) or not target_list:
+        raise HTTPException(status_code=400, detail="No targets specified")
+    if len(target_list) > MAX_DERIVATIVE_TARGETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_DERIVATIVE_TARGETS} targets allowed")
+
+    for target in target_list:
+        if not isinstance(target, dict) or not isinstance(target.get('width'), int) or target['width'] <= 0:
+            raise HTTPException(status_code=400, detail="Each target needs a positive integer 'width'")
+        if str(target.get('format', 'jpg')).lower() not in IMAGE_SAVE_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Format must be one of: {list(IMAGE_SAVE_FORMATS)}")
+        quality = target.get('quality', 85)
+        if not isinstance(quality, int) or isinstance(quality, bool) or not 1 <= quality <= 100:
+            raise HTTPException(status_code=400, detail="Each target's 'quality' must be an integer between 1 and 100")
+
+    try:
+        # Read file content for size calculation
+        content = await file.read()
+        file_size = len(content)
+        timings = []
+        loop = asyncio.get_running_loop()
+
+        def decode():
+            # Decode once, at reduced JPEG scale when even the largest target is smaller
+            largest = max(target['width'] for target in target_list)
+            image = open_image(content, (largest, MAX_TILED_IMAGE_PIXELS), maintain_aspect=True, max_pixels=MAX_TILED_IMAGE_PIXELS)
+            image.load()
+            return image
+
+        step_start = time.perf_counter()
+        image = await loop.run_in_executor(None, decode)
+        original_format = image.format or "UNKNOWN"
+        timings.append(("decode", time.perf_counter() - step_start))
+
+        source_width, source_height = image.size
+
+        def downscale():
+            # Downscale chain: each width is resampled from the next larger one, never upscaled
+            sized = {}
+            current = image
+            for width in sorted({min(target['width'], source_width) for target in target_list}, reverse=True):
+                height = max(1, round(source_height * width / source_width))
+                if current.size != (width, height):
+                    current = resize_pil_image(current, width, height)
+                sized[width] = current
+            return sized
+
+        step_start = time.perf_counter()
+        sized = await loop.run_in_executor(None, downscale)
+        timings.append(("resize", time.perf_counter() - step_start))
+
+        def encode_target(target):
+            width = min(target['width'], source_width)
+            save_format = IMAGE_SAVE_FORMATS[str(target.get('format', 'jpg')).lower()]
+            if save_format == "PNG":
+                return encode_png(sized[width], parallel=False)
+            return encode_pil_image(sized[width], save_format, quality=target.get('quality', 85), optimize=True)
+
+        # Encode all targets in parallel
+        step_start = time.perf_counter()
+        encoded = await asyncio.gather(
+            *(loop.run_in_executor(image_encode_executor, encode_target, target) for target in target_list)
+        )
+        timings.append(("encode", time.perf_counter() - step_start))
+
+        # Already-compressed images gain nothing from deflate
+        stem = file.filename.rsplit('.', 1)[0]
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zip_file:
+            for index, (target, data) in enumerate(zip(target_list, encoded)):
+                extension = str(target.get('format', 'jpg')).lower()
+                name = f"{stem}_{min(target['width'], source_width)}w.{extension}"
+                if name in zip_file.namelist():
+                    name = f"{stem}_{min(target['width'], source_width)}w_{index + 1}.{extension}"
+                zip_file.writestr(name, data)
+
+        # Log the operation
+        if current_user:
+            await log_operation(
+                current_user.id, "image_derivatives", file.filename,
+                original_format.lower(), "zip", file_size, True
+            )
+
+        return StreamingResponse(
+            io.BytesIO(zip_buffer.getvalue()),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f"attachment; filename={stem}_derivatives.zip",
+                "Server-Timing": format_server_timing(timings)
+            }
+        )
+
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
+    except Exception as e:
+        if current_user:
+            await log_operation(
+                current_user.id, "image_derivatives", file.filename,
+                "unknown", "zip", 0, False
+            )
+        raise HTTPException(status_code=500, detail=f"Derivative generation failed: {str(e)}")
+
 # Utility Endpoints
 
 @app.post("/api/convert/jpg-to-pdf")
@@ -3157,18 +5975,16 @@ async def images_to_pdf(files: List[UploadFile] = File(...), current_user = Depe
     
     try:
         total_file_size = 0
-        images = []
+        pdf_document = fitz.open()
+        # One image at a time: only the current upload (and, if transcoded, its pixels) is in memory
         for file in files:
             content = await file.read()
             total_file_size += len(content)
-            image = Image.open(io.BytesIO(content))
-            if image.mode != "RGB":
-                image = image.convert("RGB")
-            images.append(image)
+            add_image_page(pdf_document, content)
         
         # Save as PDF
-        if images:
-            images[0].save(temp_output, save_all=True, append_images=images[1:])
+        pdf_document.save(temp_output, garbage=3, deflate=True)
+        pdf_document.close()
         
         # Log the operation
         if current_user:
@@ -3184,6 +6000,9 @@ async def images_to_pdf(files: List[UploadFile] = File(...), current_user = Depe
             filename="images_to_pdf.pdf"
         )
     
+    except HTTPException:
+        cleanup_file(temp_output)
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -3210,7 +6029,7 @@ async def ocr_extract_text(file: UploadFile = File(...), current_user = Depends(
         if file_size > 25 * 1024 * 1024:
             raise HTTPException(status_code=400, detail="File size too large. Maximum 25MB allowed.")
         
-        image = Image.open(io.BytesIO(content))
+        image = open_image(content)
         text = pytesseract.image_to_string(image)
         
         # Log the operation
@@ -3222,6 +6041,9 @@ async def ocr_extract_text(file: UploadFile = File(...), current_user = Depends(
         
         return {"text": text, "filename": file.filename}
     
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         if current_user:
             await log_operation(
@@ -3231,6 +6053,36 @@ async def ocr_extract_text(file: UploadFile = File(...), current_user = Depends(
         raise HTTPException(status_code=500, detail=f"OCR failed: {str(e)}")
 
 # Admin endpoints (optional - for monitoring)
+@app.get("/admin/image-backends")
+async def get_image_backends():
+    """Imaging backend chosen for each operation, with the startup measurements"""
+    return {"backends": image_backends, "details": image_backend_report}
+
+@app.get("/admin/office-converter")
+async def get_office_converter():
+    """LibreOffice pool status: queue depth, per-process jobs and memory"""
+    return {
+        "enabled": office_idle_slots is not None,
+        "queue_depth": office_pool_stats["waiting"],
+        "stats": office_pool_stats,
+        "processes": [
+            {"index": slot["index"], "healthy": slot["healthy"], "jobs": slot["jobs"], "rss_mb": round(office_rss_mb(slot), 1)}
+            for slot in office_slots
+        ],
+    }
+
+@app.get("/admin/job-routing")
+async def get_job_routing():
+    """Heavy-slot usage, refusals and the calibration learned for each operation"""
+    return {
+        "heavy_slots": JOB_HEAVY_SLOTS,
+        "stats": heavy_job_stats,
+        "calibration": {
+            operation: {"factor": round(entry["factor"], 3), "samples": entry["samples"]}
+            for operation, entry in job_cost_calibration.items()
+        },
+    }
+
 @app.get("/admin/stats")
 async def get_admin_stats():
     """Get admin statistics (protected)"""
@@ -3265,6 +6117,7 @@ async def startup_event():
         await users_collection.create_index("google_id", unique=True, sparse=True)
         await conversions_collection.create_index("user_id")
         await conversions_collection.create_index("timestamp")
+        await job_costs_collection.create_index([("operation", 1), ("timestamp", -1)])
         await files_collection.create_index("user_id")
         await files_collection.create_index("upload_date")
         
@@ -3277,6 +6130,74 @@ async def startup_event():
         print("⚠️ Server will start without MongoDB - some features may be limited")
 
 
+@app.on_event("startup")
+async def select_image_backends():
+    """Resolve the imaging backend for each operation before serving requests"""
+    calibrate_image_backends()
+    for operation, report in image_backend_report.items():
+        print(f"🖼️ Image {operation} backend: {report['backend']} ({report['source']})")
+
+@app.on_event("startup")
+async def start_office_pool():
+    """Start the warm LibreOffice processes behind the office-to-PDF endpoints"""
+    global office_idle_slots
+    if not OFFICE_BINARY:
+        print("⚠️ LibreOffice not found - office-to-PDF conversion disabled")
+        return
+    try:
+        import uno  # noqa: F401 - LibreOffice's Python bridge
+    except ImportError:
+        print("⚠️ LibreOffice Python bridge (uno) not found - office-to-PDF conversion disabled")
+        return
+
+    loop = asyncio.get_running_loop()
+    office_slots[:] = [{"index": index, "healthy": False, "jobs": 0} for index in range(OFFICE_POOL_SIZE)]
+    results = await asyncio.gather(
+        *(loop.run_in_executor(office_executor, start_office_process, slot) for slot in office_slots),
+        return_exceptions=True
+    )
+    office_idle_slots = asyncio.Queue()
+    for slot, result in zip(office_slots, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ LibreOffice {slot['index']} failed to start: {result}")
+            # Retried in the background, the same way a failed slot is recycled
+            task = asyncio.create_task(release_office_slot(slot))
+            office_release_tasks.add(task)
+            task.add_done_callback(office_release_tasks.discard)
+        else:
+            office_idle_slots.put_nowait(slot)
+    print(f"📄 LibreOffice pool: {office_idle_slots.qsize()}/{OFFICE_POOL_SIZE} processes ready")
+
+
+@app.on_event("shutdown")
+async def stop_office_pool():
+    """Shut the LibreOffice processes down with the API"""
+    for slot in office_slots:
+        stop_office_process(slot)
+
+@app.on_event("startup")
+async def start_html_renderer():
+    """Start the warm WeasyPrint workers behind html-to-pdf"""
+    global html_render_executor
+    executor = make_html_render_executor()
+    try:
+        version = await asyncio.wrap_future(executor.submit(html_renderer.warm_up))
+    except Exception as e:
+        html_render_pid_queues.pop(executor, None)
+        executor.shutdown(wait=False, cancel_futures=True)
+        print(f"⚠️ WeasyPrint unavailable ({type(e).__name__}) - html-to-pdf falls back to PyMuPDF")
+        return
+    html_render_executor = executor
+    print(f"📄 WeasyPrint {version}: {HTML_RENDER_WORKERS} warm renderer worker(s)")
+
+
+@app.on_event("shutdown")
+async def stop_html_renderer():
+    """Stop the renderer workers with the API"""
+    if html_render_executor is not None:
+        html_render_executor.shutdown(wait=False, cancel_futures=True)
+
+
 # Add these endpoints to your FastAPI application
 
 # Additional Pydantic models needed
@@ -0,0 +1,198 @@
+"""
+PDF Page Workers
+Jobs for the PDF process pool started by main.py. Each job opens the PDF from
+its path and works on its own set of pages, so long documents use every core
+instead of one.
+
+This module must stay light: spawned workers import it, not main.py.
+"""
+
+import re
+import time
+
+import fitz  # PyMuPDF
+from pdf2docx import Converter
+
+import pii_scanner
+
+
+def timed_job(func, *args):
+    """Run a job; returns (result, CPU seconds this worker spent on it)"""
+    start = time.process_time()
+    return func(*args), time.process_time() - start
+
+
+def parse_docx_pages(pdf_path, page_indexes):
+    """Run pdf2docx's parse phases on some pages
+
+    Returns (stored pages, parse seconds, layout seconds); the stored pages
+    are restored into one Converter in the parent, which writes the DOCX.
+
+    Splitting loses no cross-page analysis in pdf2docx 0.5.x: fonts are read
+    from the whole file in every job, tables and paragraphs are parsed page by
+    page, and the document-level pass for headers and footers
+    (Pages._parse_document) is an unimplemented stub. Chunked output matches a
+    single pass; recheck this if an upgrade implements that pass.
+    """
+    converter = Converter(pdf_path)
+    try:
+        settings = converter.default_settings
+        start = time.perf_counter()
+        converter.load_pages(pages=page_indexes)
+        converter.parse_document(**settings)  # raw text, shapes and page sections
+        parsed = time.perf_counter()
+        converter.parse_pages(**settings)  # paragraphs, tables and images
+        return converter.store(), parsed - start, time.perf_counter() - parsed
+    finally:
+        converter.close()
+
+
+def extract_page_tables(pdf_path, page_indexes, with_text=False):
+    """Find the tables on some pages with PyMuPDF
+
+    Returns one (page index, tables, text lines) tuple per page; each table
+    is a list of rows of cell strings, header row first. Text lines are only
+    collected (when with_text is set) for pages without tables.
+    """
+    results = []
+    with fitz.open(pdf_path) as pdf_document:
+        for page_index in page_indexes:
+            page = pdf_document[page_index]
+            tables = []
+            for table in page.find_tables().tables:
+                rows = table.extract()
+                if table.header.external:
+                    rows.insert(0, table.header.names)
+                tables.append([["" if cell is None else cell for cell in row] for row in rows])
+            lines = []
+            if with_text and not tables:
+                lines = [line.strip() for line in page.get_text().split("\n") if line.strip()]
+            results.append((page_index, tables, lines))
+    return results
+
+
+def slide_image_payload(pdf_document, xref):
+    """Image bytes python-pptx can embed: original JPEG/PNG streams as they are, anything else as PNG"""
+    image = pdf_document.extract_image(xref)
+    if image and image["ext"] in ("jpeg", "png") and image["colorspace"] in (1, 3):
+        return image["image"]
+    pixmap = fitz.Pixmap(pdf_document, xref)
+    if pixmap.n - pixmap.alpha >= 4:  # CMYK and other spaces PowerPoint renders badly
+        pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+    return pixmap.tobytes("png")
+
+
+def prepare_slide_pages(pdf_path, page_indexes, images_per_page=2):
+    """Text spans and images for some pages of a PDF-to-PowerPoint conversion
+
+    Returns (pages, images): pages holds one (page index, spans, image xrefs)
+    entry per page, with spans as (text, size, flags); images maps each xref
+    to its payload, extracted once however many pages repeat it.
+    """
+    pages = []
+    images = {}
+    with fitz.open(pdf_path) as pdf_document:
+        for page_index in page_indexes:
+            page = pdf_document[page_index]
+            # One extraction per page; image blocks are left out of the dict
+            text_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+            spans = [
+                (span["text"].strip(), span["size"], span["flags"])
+                for block in text_dict["blocks"]
+                for line in block.get("lines", [])
+                for span in line["spans"]
+                if span["text"].strip()
+            ]
+            xrefs = []
+            for image in page.get_images()[:images_per_page]:
+                xref = image[0]
+                if xref not in images:
+                    try:
+                        images[xref] = slide_image_payload(pdf_document, xref)
+                    except Exception:
+                        images[xref] = None
+                if images[xref] is not None:
+                    xrefs.append(xref)
+            pages.append((page_index, spans, xrefs))
+    return pages, images
+
+
+HTML_TAG = re.compile(r"<[a-zA-Z]")
+
+
+def render_html_pages(pdf_path, page_indexes, preserve_layout=True, with_images=True):
+    """HTML for some pages with MuPDF's own converters
+
+    preserve_layout uses "html" (absolutely positioned lines, fonts and
+    colours); otherwise "xhtml" (semantic headings and paragraphs). Returns
+    one (page index, html, element count) tuple per page.
+    """
+    mode = "html" if preserve_layout else "xhtml"
+    flags = fitz.TEXTFLAGS_HTML if preserve_layout else fitz.TEXTFLAGS_XHTML
+    if not with_images:
+        flags &= ~fitz.TEXT_PRESERVE_IMAGES
+    results = []
+    with fitz.open(pdf_path) as pdf_document:
+        for page_index in page_indexes:
+            html = pdf_document[page_index].get_text(mode, flags=flags)
+            # MuPDF numbers the page it was given, which is always page0 here
+            html = html.replace('id="page0"', f'id="page{page_index}"', 1)
+            results.append((page_index, html, len(HTML_TAG.findall(html))))
+    return results
+
+
+def page_text_with_boxes(textpage):
+    """Page text plus the bbox of each of its characters (None for the added line breaks)"""
+    parts = []
+    boxes = []
+    for block in textpage.extractRAWDICT()["blocks"]:
+        for line in block.get("lines", ()):
+            for span in line["spans"]:
+                for char in span["chars"]:
+                    parts.append(char["c"])
+                    boxes.extend([char["bbox"]] * len(char["c"]))
+            parts.append("\n")
+            boxes.append(None)
+    return "".join(parts), boxes
+
+
+def match_rects(boxes, start, end):
+    """One rect per line that the text span start:end covers"""
+    rects = []
+    line = []
+    for box in boxes[start:end] + [None]:
+        if box is not None:
+            line.append(box)
+        elif line:
+            x0s, y0s, x1s, y1s = zip(*line)
+            rects.append((min(x0s), min(y0s), max(x1s), max(y1s)))
+            line = []
+    return rects
+
+
+def scan_pii_pages(pdf_path, page_indexes, detectors, custom_pattern=None, keywords=(), whole_words=True):
+    """PII on some pages, one scanner pass over each page's text
+
+    Matches are boxed from the characters they cover, so no per-match search
+    is needed. Returns (pages, stats): one (page index, matches) entry per
+    page that has any, each match a (detector, matched text, rect tuple), and
+    the characters scanned, candidates rejected by validators and scan seconds.
+    """
+    scanner = pii_scanner.build_scanner(tuple(detectors), custom_pattern or None, tuple(keywords), whole_words)
+    start = time.perf_counter()
+    results = []
+    characters = rejected = 0
+    with fitz.open(pdf_path) as pdf_document:
+        for page_index in page_indexes:
+            text, boxes = page_text_with_boxes(pdf_document[page_index].get_textpage())
+            characters += len(text)
+            found, page_rejected = scanner.scan(text)
+            rejected += page_rejected
+            matches = [
+                (detector, match_text.strip(), rect)
+                for detector, match_text, match_start, match_end in found
+                for rect in match_rects(boxes, match_start, match_end)
+            ]
+            if matches:
+                results.append((page_index, matches))
+    return results, {"characters": characters, "rejected": rejected, "seconds": time.perf_counter() - start}
@@ -0,0 +1,199 @@
+"""
+PII Scanner
+One pass over a page's text finds every enabled detector: the regex detectors
+are compiled into a single alternation, keyword lists run through an
+Aho-Corasick automaton, and candidates that fail a checksum (Luhn for card
+numbers, mod-97 for IBANs) are dropped before any coordinates are looked up.
+A rejected candidate does not hide the text it covered: the remaining
+detectors are tried at the same position before the scan moves on. A custom
+regex is compiled on its own, so its group numbers, backreferences and inline
+flags mean what its author wrote.
+
+This module must stay light: spawned PDF workers import it, not main.py.
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+
+
+def luhn_valid(text):
+    """Luhn checksum over the digits of a card-number candidate"""
+    digits = [int(char) for char in text if char.isdigit()]
+    if not 13 <= len(digits) <= 19:
+        return False
+    total = 0
+    for position, digit in enumerate(reversed(digits)):
+        if position % 2:
+            digit = digit * 2 - 9 if digit > 4 else digit * 2
+        total += digit
+    return total % 10 == 0
+
+
+def iban_valid(text):
+    """ISO 13616 mod-97 check of an IBAN candidate"""
+    iban = "".join(text.split()).upper()
+    if not 15 <= len(iban) <= 34:
+        return False
+    rearranged = iban[4:] + iban[:4]
+    return int("".join(str(int(char, 36)) for char in rearranged)) % 97 == 1
+
+
+def ssn_valid(text):
+    """US SSN ranges that are never issued: area 000, 666 or 9xx, group 00, serial 0000"""
+    area, group, serial = text.split("-")
+    return area not in ("000", "666") and area[0] != "9" and group != "00" and serial != "0000"
+
+
+# name -> (regex, validator or None); earlier entries win where two could match,
+# so exact formats come before the loose digit run of a card number
+DETECTORS = {
+    "email": (r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b", None),
+    "iban": (r"\b[A-Z]{2}\d{2}(?: ?[A-Z0-9]{4}){2,7}(?: ?[A-Z0-9]{1,3})?\b", iban_valid),
+    "ssn": (r"\b\d{3}-\d{2}-\d{4}\b", ssn_valid),
+    "credit_card": (r"\b\d(?:[ -]?\d){12,18}\b", luhn_valid),
+    "phone": (r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b", None),
+    "ipv4": (r"\b(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)\b", None),
+}
+
+
+def fold_case(text):
+    """Lowercase text without changing its length, so offsets stay valid"""
+    folded = text.lower()
+    if len(folded) != len(text):
+        folded = "".join(char.lower()[0] for char in text)
+    return folded
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton: every keyword found in one pass, case-insensitively"""
+
+    def __init__(self, keywords):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.lengths = [()]  # lengths of the keywords ending at each state
+        for keyword in keywords:
+            state = 0
+            for char in fold_case(keyword):
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.lengths.append(())
+                    self.transitions[state][char] = next_state
+                state = next_state
+            self.lengths[state] += (len(keyword),)
+
+        # Breadth-first, so a state's fail link is final before its children need it
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.transitions[fallback].get(char, 0)
+                self.lengths[next_state] += self.lengths[self.fail[next_state]]
+
+    def finditer(self, text, whole_words=True):
+        """(start, end) of every keyword occurrence, overlapping ones included"""
+        transitions, fail, lengths = self.transitions, self.fail, self.lengths
+        state = 0
+        for index, char in enumerate(fold_case(text)):
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            for length in lengths[state]:
+                start, end = index + 1 - length, index + 1
+                if whole_words and (
+                    (start > 0 and text[start - 1].isalnum()) or (end < len(text) and text[end].isalnum())
+                ):
+                    continue
+                yield start, end
+
+
+class PIIScanner:
+    """The chosen detectors, a custom regex and keywords, compiled for single-pass scans"""
+
+    def __init__(self, detectors=(), custom_pattern=None, keywords=(), whole_words=True):
+        # In DETECTORS order, whatever order they were asked for in
+        self.groups = [(name, DETECTORS[name][0]) for name in DETECTORS if name in detectors]
+        self.regex = self.compile_groups(())
+        self.custom = re.compile(custom_pattern, re.IGNORECASE) if custom_pattern else None
+        self.fallbacks = {}  # rejected detectors -> alternation of the others
+        self.validators = {name: DETECTORS[name][1] for name in detectors if DETECTORS[name][1]}
+        self.keywords = KeywordMatcher(keywords) if keywords else None
+        self.whole_words = whole_words
+
+    def compile_groups(self, excluded):
+        """One named-group alternation of the detectors not in excluded, or None"""
+        groups = [f"(?P<{name}>{pattern})" for name, pattern in self.groups if name not in excluded]
+        return re.compile("|".join(groups), re.IGNORECASE) if groups else None
+
+    def validated(self, match, text):
+        """The first candidate at match's position that passes its validator
+
+        After each rejection the detectors not yet rejected there are tried at
+        the same position. Returns (match or None, candidates rejected).
+        """
+        rejected = ()
+        while match is not None:
+            validator = self.validators.get(match.lastgroup)
+            if validator is None or validator(match.group()):
+                return match, len(rejected)
+            rejected += (match.lastgroup,)
+            if rejected not in self.fallbacks:
+                self.fallbacks[rejected] = self.compile_groups(rejected)
+            fallback = self.fallbacks[rejected]
+            match = fallback.match(text, match.start()) if fallback is not None else None
+        return None, len(rejected)
+
+    def merge_custom(self, matches, text):
+        """matches plus the custom regex's hits that do not overlap one of them, in text order"""
+        merged = []
+        index = 0
+        for match in self.custom.finditer(text):
+            start, end = match.span()
+            if start == end or not match.group().strip():
+                continue
+            while index < len(matches) and matches[index][3] <= start:
+                merged.append(matches[index])
+                index += 1
+            if index < len(matches) and matches[index][2] < end:
+                continue  # the built-in detector keeps the text
+            merged.append(("custom", match.group(), start, end))
+        return merged + matches[index:]
+
+    def scan(self, text):
+        """Returns ([(detector, matched text, start, end)], candidates rejected by a validator)
+
+        Keyword hits are reported under the "keyword" detector.
+        """
+        matches = []
+        rejected = 0
+        position = 0
+        while self.regex is not None and position <= len(text):
+            candidate = self.regex.search(text, position)
+            if candidate is None:
+                break
+            match, candidate_rejected = self.validated(candidate, text)
+            rejected += candidate_rejected
+            if match is None or match.end() == match.start():
+                position = candidate.start() + 1
+                continue
+            if match.group().strip():
+                matches.append((match.lastgroup, match.group(), match.start(), match.end()))
+            position = match.end()
+        if self.custom is not None:
+            matches = self.merge_custom(matches, text)
+        if self.keywords is not None:
+            matches += [("keyword", text[start:end], start, end) for start, end in self.keywords.finditer(text, self.whole_words)]
+        return matches, rejected
+
+
+@lru_cache(maxsize=32)
+def build_scanner(detectors, custom_pattern=None, keywords=(), whole_words=True):
+    """PIIScanner cached per worker; arguments must be hashable (tuples)"""
+    return PIIScanner(detectors, custom_pattern, keywords, whole_words)
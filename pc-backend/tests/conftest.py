@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The backend modules are imported by name, as uvicorn runs them from pc-backend
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
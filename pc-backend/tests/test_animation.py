@@ -0,0 +1,62 @@
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def animation():
+    frames = [Image.new("RGB", (120, 80), color) for color in ("red", "green", "blue", "yellow")]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:], duration=[100, 200, 300, 400], loop=0)
+    return buffer.getvalue()
+
+
+def frame_durations(content):
+    image = Image.open(io.BytesIO(content))
+    durations = []
+    for index in range(image.n_frames):
+        image.seek(index)
+        image.load()
+        durations.append(image.info["duration"])
+    return image, durations
+
+
+def test_resize_keeps_every_frame_and_its_timing(client, animation):
+    response = client.post(
+        "/image/resize",
+        files={"file": ("anim.gif", animation, "image/gif")},
+        data={"width": "60", "height": "40"},
+    )
+    assert response.status_code == 200, response.text
+    image, durations = frame_durations(response.content)
+    assert image.size == (60, 40)
+    assert durations == [100, 200, 300, 400]
+    image.seek(2)
+    assert image.convert("RGB").getpixel((30, 20)) == (0, 0, 255)
+
+
+def test_gif_to_webp_stays_animated(client, animation):
+    response = client.post(
+        "/image/convert?format=webp",
+        files={"file": ("anim.gif", animation, "image/gif")},
+    )
+    assert response.status_code == 200, response.text
+    image, durations = frame_durations(response.content)
+    assert image.format == "WEBP"
+    assert durations == [100, 200, 300, 400]
+
+
+def test_oversized_animations_are_refused(animation, monkeypatch):
+    monkeypatch.setattr(main, "MAX_TILED_IMAGE_PIXELS", 120 * 80 * 3)
+    with pytest.raises(main.HTTPException) as error:
+        main.transform_animation(Image.open(io.BytesIO(animation)), lambda frame: frame, "GIF")
+    assert error.value.status_code == 413
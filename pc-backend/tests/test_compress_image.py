@@ -0,0 +1,63 @@
+import io
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def photo():
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, 320)[None, :, None] * np.ones((240, 1, 3))
+    noise = rng.normal(0, 12, (240, 320, 3))
+    buffer = io.BytesIO()
+    Image.fromarray(np.clip(gradient + noise, 0, 255).astype(np.uint8)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def compress(client, content, **data):
+    return client.post(
+        "/image/compress",
+        files={"file": ("photo.png", content, "image/png")},
+        data={key: str(value) for key, value in data.items()},
+    )
+
+
+def test_target_bytes_fits_the_budget(client, photo):
+    response = compress(client, photo, target_bytes=12000, formats="jpeg,webp")
+    assert response.status_code == 200, response.text
+    assert len(response.content) <= 12000
+    assert response.headers["X-Compression-Target-Met"] == "true"
+    assert response.headers["X-Compression-Format"] in ("jpg", "webp")
+
+
+def test_target_ssim_is_reached(client, photo):
+    response = compress(client, photo, target_ssim=0.9, formats="jpeg")
+    assert response.status_code == 200, response.text
+    assert float(response.headers["X-Compression-SSIM"]) >= 0.9
+    assert response.headers["X-Compression-Format"] == "jpg"
+
+
+def test_fixed_quality_stays_the_default(client, photo):
+    response = compress(client, photo, quality=40)
+    assert response.status_code == 200
+    assert response.headers["X-Compression-Quality"] == "40"
+    assert Image.open(io.BytesIO(response.content)).format == "JPEG"
+
+
+@pytest.mark.parametrize("data", [
+    {"target_bytes": 1000, "target_ssim": 0.9},
+    {"target_bytes": -1},
+    {"target_ssim": 1.5},
+    {"target_bytes": 1000, "formats": "tiff"},
+])
+def test_bad_targets_are_rejected(client, photo, data):
+    assert compress(client, photo, **data).status_code == 400
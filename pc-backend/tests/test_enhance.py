@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageEnhance
+
+import main
+
+
+@pytest.fixture(scope="module")
+def photo():
+    rng = np.random.default_rng(1)
+    return Image.fromarray(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8), "RGB")
+
+
+def sequential(image, brightness, contrast, saturation):
+    image = ImageEnhance.Brightness(image).enhance(brightness)
+    image = ImageEnhance.Contrast(image).enhance(contrast)
+    return ImageEnhance.Color(image).enhance(saturation)
+
+
+def difference(first, second):
+    return np.abs(np.asarray(first, dtype=np.int16) - np.asarray(second, dtype=np.int16))
+
+
+@pytest.mark.parametrize("brightness, contrast, saturation", [
+    (1.3, 1.0, 1.0), (1.0, 1.4, 1.0), (0.8, 1.2, 1.0), (1.1, 0.9, 1.5), (1.0, 1.0, 0.0),
+])
+def test_fused_pass_matches_imageenhance(photo, brightness, contrast, saturation):
+    fused = main.enhance_pil_image(photo.copy(), brightness, contrast, saturation)
+    expected = sequential(photo, brightness, contrast, saturation)
+    assert difference(fused, expected).max() <= 1
+
+
+def test_strips_match_the_whole_image(photo, monkeypatch):
+    whole = main.enhance_pil_image(photo.copy(), 1.2, 1.1, 1.3, auto_levels=True)
+    monkeypatch.setattr(main, "TILED_PROCESSING_PIXELS", 1000)
+    monkeypatch.setattr(main, "IMAGE_STRIP_ROWS", 16)
+    strips = main.enhance_pil_image(photo.copy(), 1.2, 1.1, 1.3, auto_levels=True)
+    assert difference(whole, strips).max() == 0
+
+
+def test_alpha_passes_through(photo):
+    rgba = photo.copy()
+    rgba.putalpha(Image.linear_gradient("L").resize(photo.size))
+    enhanced = main.enhance_pil_image(rgba, 1.2, 1.1, 0.5)
+    assert enhanced.mode == "RGBA"
+    assert difference(enhanced.getchannel("A"), rgba.getchannel("A")).max() == 0
+
+
+def test_auto_levels_stretches_a_narrow_range():
+    narrow = Image.fromarray(np.tile(np.arange(100, 151, dtype=np.uint8), (20, 1)), "L")
+    stretched = main.enhance_pil_image(narrow, auto_levels=True)
+    assert stretched.getextrema() == (0, 255)
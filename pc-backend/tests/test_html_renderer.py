@@ -0,0 +1,32 @@
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+import html_renderer
+import main
+
+try:
+    import weasyprint  # noqa: F401
+except (ImportError, OSError):  # OSError: the Pango libraries are missing
+    pytest.skip("WeasyPrint is not usable here", allow_module_level=True)
+
+
+def test_a_stuck_render_kills_its_worker_and_replaces_the_pool(monkeypatch):
+    monkeypatch.setattr(main, "HTML_RENDER_TIMEOUT", 2)
+    executor = main.make_html_render_executor()
+    executor.submit(html_renderer.warm_up).result()
+    monkeypatch.setattr(main, "html_render_executor", executor)
+    workers = {process.pid for process in multiprocessing.active_children()}
+    assert workers
+
+    with pytest.raises(main.HTTPException) as error:
+        asyncio.run(main.run_html_render(time.sleep, 60))
+    assert error.value.status_code == 504
+
+    time.sleep(0.5)
+    alive = {process.pid for process in multiprocessing.active_children()}
+    assert not alive & workers
+    assert main.html_render_executor is not executor
+    main.html_render_executor.shutdown(wait=False, cancel_futures=True)
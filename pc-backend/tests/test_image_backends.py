@@ -0,0 +1,54 @@
+import io
+
+import pytest
+from PIL import Image
+
+import main
+
+
+@pytest.fixture(scope="module")
+def sample():
+    return main.make_calibration_image(400, 300)
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    monkeypatch.setattr(main, "image_backends", {"resize": "pillow", "encode": "pillow"})
+    monkeypatch.setattr(main, "image_backend_report", {})
+    return main.image_backends
+
+
+def test_opencv_resize_stays_close_to_lanczos(sample, backends):
+    backends["resize"] = "opencv"
+    resized = main.resize_pil_image(sample.copy(), 100, 100, maintain_aspect=True)
+    assert (resized.mode, resized.size) == ("RGB", (100, 75))
+    reference = sample.resize((100, 75), Image.Resampling.LANCZOS)
+    assert main.compute_ssim(main.ssim_luma(reference), main.ssim_luma(resized)) >= main.IMAGE_BACKEND_MIN_SSIM
+
+
+@pytest.mark.parametrize("format", ["JPEG", "WEBP"])
+def test_opencv_encode_decodes_with_the_right_colours(sample, backends, format):
+    backends["encode"] = "opencv"
+    data = main.encode_pil_image(sample, format, quality=90)
+    decoded = Image.open(io.BytesIO(data))
+    assert decoded.format == format
+    assert main.compute_ssim(main.ssim_luma(sample), main.ssim_luma(decoded)) >= main.IMAGE_BACKEND_MIN_SSIM
+    # Channel order survives the RGB <-> BGR swap
+    red = Image.new("RGB", (64, 64), (220, 20, 20))
+    r, g, b = Image.open(io.BytesIO(main.encode_pil_image(red, format, quality=95))).convert("RGB").getpixel((32, 32))
+    assert r > 200 and g < 50 and b < 50
+
+
+def test_alpha_images_stay_on_pillow(backends):
+    backends["resize"] = "opencv"
+    assert not main.uses_opencv("resize", Image.new("RGBA", (10, 10)))
+    assert main.uses_opencv("resize", Image.new("RGB", (10, 10)))
+
+
+def test_configured_backend_skips_the_benchmark(backends, monkeypatch):
+    monkeypatch.setitem(main.IMAGE_BACKEND_SETTINGS, "resize", "opencv")
+    monkeypatch.setitem(main.IMAGE_BACKEND_SETTINGS, "encode", "auto")
+    report = main.calibrate_image_backends()
+    assert report["resize"] == {"backend": "opencv", "source": "config"}
+    assert report["encode"]["source"] == "benchmark"
+    assert set(report["encode"]["results"]) == {"pillow", "opencv"}
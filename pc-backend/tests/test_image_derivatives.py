@@ -0,0 +1,54 @@
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def photo():
+    buffer = io.BytesIO()
+    Image.new("RGB", (1200, 800), "teal").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def derivatives(client, content, targets):
+    return client.post(
+        "/image/derivatives",
+        files={"file": ("photo.jpg", content, "image/jpeg")},
+        data={"targets": json.dumps(targets)},
+    )
+
+
+def test_each_target_is_one_zip_entry(client, photo):
+    response = derivatives(client, photo, [
+        {"width": 800, "format": "webp", "quality": 70},
+        {"width": 320, "format": "png"},
+        {"width": 2000, "format": "jpg"},
+    ])
+    assert response.status_code == 200, response.text
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        sizes = {name: Image.open(archive.open(name)).size for name in archive.namelist()}
+    # Never upscaled past the source width
+    assert sizes == {"photo_800w.webp": (800, 533), "photo_320w.png": (320, 213), "photo_1200w.jpg": (1200, 800)}
+    assert "encode" in response.headers["Server-Timing"]
+
+
+@pytest.mark.parametrize("target", [
+    {"width": 0},
+    {"width": 100, "format": "tiff"},
+    {"width": 100, "quality": "high"},
+    {"width": 100, "quality": 0},
+    {"width": 100, "quality": 101},
+])
+def test_bad_targets_are_rejected(client, photo, target):
+    assert derivatives(client, photo, [target]).status_code == 400
@@ -0,0 +1,62 @@
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def photo():
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), (120, 90, 60)).save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def run_pipeline(client, content, operations):
+    return client.post(
+        "/image/pipeline",
+        files={"file": ("photo.jpg", content, "image/jpeg")},
+        data={"operations": json.dumps(operations)},
+    )
+
+
+def test_steps_run_in_order_with_one_encode(client, photo):
+    response = run_pipeline(client, photo, [
+        {"op": "resize", "width": 400, "height": 400, "maintain_aspect": True},
+        {"op": "enhance", "brightness": 1.5},
+        {"op": "watermark", "text": "PROOF"},
+        {"op": "convert", "format": "webp", "quality": 80},
+    ])
+    assert response.status_code == 200, response.text
+    image = Image.open(io.BytesIO(response.content))
+    assert (image.format, image.size) == ("WEBP", (400, 300))
+    # Brightened: the untouched top-left corner is lighter than the source colour
+    assert image.convert("RGB").getpixel((5, 5))[0] > 150
+    timing_names = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+    assert timing_names == ["decode", "resize-1", "enhance-2", "watermark-3", "convert-4", "encode"]
+
+
+def test_output_keeps_the_input_format_by_default(client, photo):
+    response = run_pipeline(client, photo, [{"op": "enhance", "contrast": 1.2}])
+    assert Image.open(io.BytesIO(response.content)).format == "JPEG"
+
+
+@pytest.mark.parametrize("operation, message", [
+    ({"op": "resize", "width": 0}, "'width' for resize must be at least 1"),
+    ({"op": "enhance", "brightness": 11}, "'brightness' for enhance must be at most 10"),
+    ({"op": "compress", "quality": "best"}, "Invalid 'quality' for compress"),
+    ({"op": "watermark", "position": "middle"}, "Position must be one of"),
+    ({"op": "sharpen"}, "Each operation must have an 'op' of"),
+])
+def test_bad_steps_are_rejected_before_decoding(client, operation, message):
+    response = run_pipeline(client, b"not an image", [operation])
+    assert response.status_code == 400
+    assert message in response.json()["detail"]
@@ -0,0 +1,52 @@
+import io
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import main
+
+
+def encode(image, format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format, **options)
+    return buffer.getvalue()
+
+
+def embedded_images(pdf_bytes):
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf_document:
+        return [
+            (pdf_document.extract_image(xref), page.rect)
+            for page in pdf_document
+            for xref, *_ in page.get_images()
+        ]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+def test_jpeg_bytes_are_embedded_unchanged(client):
+    jpeg = encode(Image.new("RGB", (300, 200), "purple"), "JPEG", quality=70)
+    response = client.post("/image/to-pdf", files=[("files", ("a.jpg", jpeg, "image/jpeg"))])
+    assert response.status_code == 200, response.text
+    [(image, rect)] = embedded_images(response.content)
+    assert image["ext"] == "jpeg"
+    assert image["image"] == jpeg
+    assert (rect.width, rect.height) == (300, 200)
+
+
+def test_each_upload_becomes_a_page_sized_to_it(client):
+    files = [
+        ("files", ("a.png", encode(Image.new("RGBA", (120, 80), (0, 0, 255, 128)), "PNG"), "image/png")),
+        ("files", ("b.bmp", encode(Image.new("RGB", (60, 90), "green"), "BMP"), "image/bmp")),
+        ("files", ("c.jpg", encode(Image.new("CMYK", (50, 50)), "JPEG"), "image/jpeg")),
+    ]
+    response = client.post("/image/to-pdf", files=files)
+    assert response.status_code == 200, response.text
+    images = embedded_images(response.content)
+    assert [(rect.width, rect.height) for _, rect in images] == [(120, 80), (60, 90), (50, 50)]
+    assert images[0][0]["smask"]  # PNG transparency is kept
+    assert images[2][0]["colorspace"] == 3  # CMYK became RGB
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+class MemoryCollection:
+    """Just enough of a Motor collection for the job cost queries"""
+
+    def __init__(self):
+        self.documents = []
+
+    async def insert_one(self, document):
+        self.documents.append(document)
+
+    def find(self, query, projection=None):
+        def matches(document):
+            for name, condition in query.items():
+                value = document.get(name)
+                if isinstance(condition, dict):
+                    if value is None or not value > condition["$gt"]:
+                        return False
+                elif value != condition:
+                    return False
+            return True
+        return MemoryCursor([document for document in self.documents if matches(document)])
+
+
+class MemoryCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, name, direction):
+        self.documents.sort(key=lambda document: document[name], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.documents[:length]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "job_costs_collection", MemoryCollection())
+    monkeypatch.setattr(main, "job_cost_calibration", {"pdf_to_images": {"factor": 1.0, "samples": 0, "updated": time.time()}})
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def pdf():
+    pdf_document = fitz.open()
+    for index in range(2):
+        pdf_document.new_page().insert_text((72, 72), f"page {index + 1}")
+    return pdf_document.tobytes()
+
+
+def to_images(client, pdf, path="/api/pdf/to-images"):
+    return client.post(f"{path}?dpi=30", files={"file": ("doc.pdf", pdf, "application/pdf")})
+
+
+def test_calibration_moves_after_enough_runs(client, pdf, monkeypatch):
+    monkeypatch.setattr(main, "JOB_COST_MIN_SAMPLES", 3)
+    for _ in range(3):
+        assert to_images(client, pdf).status_code == 200
+    samples = main.job_costs_collection.documents
+    assert len(samples) == 3
+    assert all(sample["operation"] == "pdf_to_images" and sample["success"] for sample in samples)
+    assert "user_id" not in samples[0]
+
+    asyncio.run(main.refresh_job_calibration("pdf_to_images"))
+    calibration = main.job_cost_calibration["pdf_to_images"]
+    ratios = sorted(sample["cpu_seconds"] / sample["model_seconds"] for sample in samples)
+    low, high = main.JOB_COST_FACTOR_RANGE
+    assert calibration["samples"] == 3
+    assert calibration["factor"] == min(high, max(low, ratios[1]))
+    assert calibration["factor"] != 1.0
+
+
+def test_calibration_waits_for_enough_samples(client, pdf, monkeypatch):
+    monkeypatch.setattr(main, "JOB_COST_MIN_SAMPLES", 5)
+    for _ in range(2):
+        to_images(client, pdf)
+    asyncio.run(main.refresh_job_calibration("pdf_to_images"))
+    assert main.job_cost_calibration["pdf_to_images"]["factor"] == 1.0
+
+
+@pytest.mark.parametrize("path", ["/api/pdf/to-images", "/api/pdf/to-image"])
+def test_calibrated_estimate_over_budget_is_refused(client, pdf, monkeypatch, path):
+    model_seconds = asyncio.run(main.estimate_job_cost("pdf_to_images", pdf, {"dpi": 30}))["model_seconds"]
+    monkeypatch.setattr(main, "JOB_MAX_CPU_SECONDS", model_seconds * 2)
+    assert to_images(client, pdf, path).status_code == 200
+
+    main.job_cost_calibration["pdf_to_images"]["factor"] = 4.0
+    response = to_images(client, pdf, path)
+    assert response.status_code == 413
+    assert "CPU-seconds" in response.json()["detail"]
+    # A refused job never ran, so it leaves no sample
+    assert len(main.job_costs_collection.documents) == 1
@@ -0,0 +1,75 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import docx
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "office_idle_slots", None)
+    return TestClient(main.app)
+
+
+def test_docx_falls_back_to_a_text_rebuild_without_libreoffice(client):
+    document = docx.Document()
+    document.add_heading("Quarterly report", 1)
+    document.add_paragraph("Revenue went up.")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    response = client.post("/api/convert/word-to-pdf", files={"file": ("report.docx", buffer.getvalue())})
+    assert response.status_code == 200, response.text
+    with fitz.open(stream=response.content, filetype="pdf") as pdf_document:
+        text = pdf_document[0].get_text()
+    assert "Quarterly report" in text and "Revenue went up." in text
+
+
+def test_other_formats_need_libreoffice(client):
+    assert client.post("/api/convert/excel-to-pdf", files={"file": ("sheet.xlsx", b"PK")}).status_code == 503
+    assert client.post("/api/convert/excel-to-pdf", files={"file": ("sheet.txt", b"x")}).status_code == 400
+
+
+def test_timed_out_process_is_recycled_before_its_next_job(monkeypatch):
+    restarts = []
+    durations = iter([1.0, 0.0])
+
+    def convert(slot, source, target, kind):
+        time.sleep(next(durations))
+
+    def restart(slot):
+        restarts.append(slot["index"])
+        slot.update(healthy=True, jobs=0)
+
+    monkeypatch.setattr(main, "OFFICE_JOB_TIMEOUT", 0.2)
+    # Two threads: the timed-out export is still sleeping on the first
+    monkeypatch.setattr(main, "office_executor", ThreadPoolExecutor(max_workers=2))
+    monkeypatch.setattr(main, "convert_with_office", convert)
+    monkeypatch.setattr(main, "start_office_process", restart)
+    monkeypatch.setattr(main, "stop_office_process", lambda slot: None)
+    monkeypatch.setattr(main, "office_rss_mb", lambda slot: 0)
+
+    async def scenario():
+        monkeypatch.setattr(main, "office_idle_slots", asyncio.Queue())
+        slot = {"index": 0, "healthy": True, "jobs": 0}
+        main.office_idle_slots.put_nowait(slot)
+
+        with pytest.raises(main.HTTPException) as error:
+            await main.office_convert("in.docx", "out.pdf", "word")
+        assert error.value.status_code == 504
+        assert main.office_release_tasks  # the restart runs in the background, referenced
+        await asyncio.gather(*main.office_release_tasks)
+
+        timings = await main.office_convert("in.docx", "out.pdf", "word")
+        await asyncio.gather(*main.office_release_tasks)
+        return slot, timings
+
+    slot, timings = asyncio.run(scenario())
+    assert restarts == [0]
+    assert slot["jobs"] == 1
+    assert [name for name, _ in timings] == ["queue", "convert"]
@@ -0,0 +1,51 @@
+import io
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+import main
+
+
+def encode(image, format="JPEG"):
+    buffer = io.BytesIO()
+    image.save(buffer, format)
+    return buffer.getvalue()
+
+
+def test_jpeg_is_drafted_near_the_target_size():
+    content = encode(Image.new("RGB", (2000, 1000), "red"))
+    image = main.open_image(content, (200, 100))
+    assert image.size == (500, 250)
+    image = main.open_image(content, (200, 200), maintain_aspect=True)
+    assert image.size == (500, 250)
+    assert main.open_image(content).size == (2000, 1000)
+
+
+def test_images_over_max_pixels_are_rejected_from_the_header():
+    content = encode(Image.new("RGB", (400, 300)), "PNG")
+    assert main.open_image(content, max_pixels=120000).size == (400, 300)
+    with pytest.raises(HTTPException) as error:
+        main.open_image(content, max_pixels=119999)
+    assert error.value.status_code == 413
+
+
+def test_tiled_limit_goes_past_pillows_limit(monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    monkeypatch.setattr(main, "MAX_IMAGE_PIXELS", 1000)
+    content = encode(Image.new("RGB", (400, 300)), "PNG")
+    with pytest.raises(HTTPException) as error:
+        main.open_image(content, max_pixels=1000)
+    assert error.value.status_code == 413
+    assert main.open_image(content, max_pixels=200000).size == (400, 300)
+
+
+def test_pillows_limit_is_restored_after_a_tiled_open(monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    monkeypatch.setattr(main, "MAX_IMAGE_PIXELS", 1000)
+    content = encode(Image.new("RGB", (400, 300)), "PNG")
+    main.open_image(content, max_pixels=200000)
+    assert Image.MAX_IMAGE_PIXELS == 1000
+    with pytest.raises(HTTPException):
+        main.open_image(content, max_pixels=50000)
+    assert Image.MAX_IMAGE_PIXELS == 1000
@@ -0,0 +1,88 @@
+import io
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def pdf():
+    scan = io.BytesIO()
+    Image.new("L", (1275, 1650), 235).save(scan, format="PNG")  # letter size at 150 dpi
+    pdf_document = fitz.open()
+    page = pdf_document.new_page(width=612, height=792)
+    page.insert_text((72, 72), "Invoice 42", fontname="Courier")
+    widget = fitz.Widget()
+    widget.field_name, widget.field_type, widget.rect = "total", fitz.PDF_WIDGET_TYPE_TEXT, fitz.Rect(72, 100, 272, 120)
+    page.add_widget(widget)
+    page = pdf_document.new_page(width=612, height=792)
+    scan_xref = page.insert_image(page.rect, stream=scan.getvalue())
+    # OCR'd scan: the same image under an invisible text layer
+    page = pdf_document.new_page(width=612, height=792)
+    page.insert_image(page.rect, xref=scan_xref)
+    page.insert_text((72, 72), "Recognised text", render_mode=3)
+    return pdf_document.tobytes()
+
+
+def test_structure_is_read_without_rendering(pdf, monkeypatch):
+    monkeypatch.setattr(fitz.Page, "get_pixmap", lambda *args, **kwargs: pytest.fail("page rendered"))
+    report = main.analyze_pdf_structure(pdf)
+    assert report["page_count"] == 3
+    assert [(page["width"], page["height"]) for page in report["pages"]] == [(612, 792)] * 3
+    assert "Courier" in report["fonts"]
+    assert report["has_forms"] and report["form_fields"] == 1
+    assert not report["encrypted"]
+    # The scan is stored once though two pages show it
+    assert report["image_count"] == 1
+    assert [page["images"] for page in report["pages"]] == [0, 1, 1]
+    assert report["pages"][1]["image_bytes"] == report["pages"][2]["image_bytes"] == report["image_bytes"] > 0
+    assert [page["has_text"] for page in report["pages"]] == [True, False, True]
+    assert [page["ocr_text"] for page in report["pages"]] == [False, False, True]
+    assert [page["likely_scan"] for page in report["pages"]] == [False, True, True]
+    assert report["scan_ratio"] == round(2 / 3, 3)
+    assert report["text_preview"].startswith("Invoice 42")
+
+
+def test_encrypted_pdf_reports_what_it_can(pdf):
+    with fitz.open(stream=pdf, filetype="pdf") as pdf_document:
+        locked = pdf_document.tobytes(encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw="owner", user_pw="user")
+    report = main.analyze_pdf_structure(locked)
+    assert report["encrypted"] and report["needs_password"]
+    assert report["page_count"] == 3
+    assert report["pages"] == []
+
+
+def test_reports_are_cached_by_content(client, pdf, monkeypatch):
+    monkeypatch.setattr(main, "pdf_preflight_cache", main.OrderedDict())
+    calls = []
+    analyze = main.analyze_pdf_structure
+    monkeypatch.setattr(main, "analyze_pdf_structure", lambda content: calls.append(content) or analyze(content))
+
+    def post(content, name="file.pdf"):
+        response = client.post("/api/pdf/analyze", files={"file": (name, content, "application/pdf")})
+        assert response.status_code == 200, response.text
+        return response
+
+    first = post(pdf)
+    second = post(pdf, "renamed.pdf")
+    assert (first.json()["cached"], second.json()["cached"]) == (False, True)
+    assert second.headers["server-timing"].startswith("cache;")
+    assert first.json()["pages"] == second.json()["pages"]
+    assert len(calls) == 1
+    with fitz.open(stream=pdf, filetype="pdf") as pdf_document:
+        pdf_document.delete_page(0)
+        post(pdf_document.tobytes())
+    assert len(calls) == 2
+
+
+def test_rejects_invalid_pdf(client):
+    response = client.post("/api/pdf/analyze", files={"file": ("broken.pdf", b"not a pdf", "application/pdf")})
+    assert response.status_code == 400
@@ -0,0 +1,56 @@
+import json
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+def make_pdf(pages=3):
+    pdf_document = fitz.open()
+    for index in range(pages):
+        pdf_document.new_page().insert_text((72, 72), f"page {index + 1}")
+    return pdf_document.tobytes()
+
+
+def run_pipeline(client, steps):
+    return client.post(
+        "/api/pdf/pipeline",
+        files={"file": ("doc.pdf", make_pdf(), "application/pdf")},
+        data={"steps": json.dumps(steps)},
+    )
+
+
+def test_steps_apply_to_one_document(client):
+    response = run_pipeline(client, [
+        {"op": "rotate", "settings": {"rotation": 90}},
+        {"op": "watermark", "settings": {"text": "DRAFT"}},
+        {"op": "compress"},
+    ])
+    assert response.status_code == 200, response.text
+    with fitz.open(stream=response.content, filetype="pdf") as pdf_document:
+        assert len(pdf_document) == 3
+        assert all(page.rotation == 90 for page in pdf_document)
+        assert "DRAFT" in pdf_document[0].get_text()
+    assert "rotate-1" in response.headers["Server-Timing"]
+
+
+@pytest.mark.parametrize("rotation", ["sideways", 45, None])
+def test_bad_rotation_is_rejected_before_any_step_runs(client, rotation):
+    response = run_pipeline(client, [
+        {"op": "watermark", "settings": {"text": "DRAFT"}},
+        {"op": "rotate", "settings": {"rotation": rotation}},
+    ])
+    assert response.status_code == 400
+    assert "multiple of 90" in response.json()["detail"]
+
+
+def test_unknown_step_is_rejected(client):
+    assert run_pipeline(client, [{"op": "explode"}]).status_code == 400
+    assert run_pipeline(client, [{"op": "crop", "settings": [1, 2]}]).status_code == 400
@@ -0,0 +1,78 @@
+import json
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def pdf():
+    pdf_document = fitz.open()
+    pdf_document.new_page().insert_text((72, 72), "Quarterly figures")
+    return pdf_document.tobytes()
+
+
+def protect(client, content, **form):
+    return client.post(
+        "/api/pdf/protect",
+        files={"file": ("doc.pdf", content, "application/pdf")},
+        data={"user_password": "open-sesame", **form},
+    )
+
+
+def unlock(client, content, password):
+    return client.post(
+        "/api/pdf/unlock",
+        files={"file": ("doc.pdf", content, "application/pdf")},
+        data={"password": password},
+    )
+
+
+@pytest.mark.parametrize("level", list(main.PDF_ENCRYPTION_LEVELS))
+def test_round_trip_for_each_encryption_level(client, pdf, level):
+    response = protect(client, pdf, encryption_level=level)
+    assert response.status_code == 200, response.text
+    assert response.headers["X-Encryption"] == main.PDF_ENCRYPTION_NAMES[main.PDF_ENCRYPTION_LEVELS[level]]
+    with fitz.open(stream=response.content, filetype="pdf") as protected:
+        assert protected.needs_pass
+        assert protected.authenticate("open-sesame")
+        assert "Quarterly figures" in protected[0].get_text()
+
+    unlocked = unlock(client, response.content, "open-sesame")
+    assert unlocked.status_code == 200, unlocked.text
+    with fitz.open(stream=unlocked.content, filetype="pdf") as pdf_document:
+        assert not pdf_document.is_encrypted
+        assert "Quarterly figures" in pdf_document[0].get_text()
+
+
+def test_denied_permission_holds_for_the_user_password(client, pdf):
+    response = protect(client, pdf, permissions=json.dumps({"printing": False}))
+    with fitz.open(stream=response.content, filetype="pdf") as protected:
+        protected.authenticate("open-sesame")
+        assert not protected.permissions & fitz.PDF_PERM_PRINT
+        assert protected.permissions & fitz.PDF_PERM_COPY
+
+
+def test_wrong_password_is_a_400(client, pdf):
+    protected = protect(client, pdf).content
+    response = unlock(client, protected, "guess")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Incorrect password"
+
+
+def test_bad_level_and_double_protection_are_400s(client, pdf):
+    assert protect(client, pdf, encryption_level="rot13").status_code == 400
+    assert protect(client, protect(client, pdf).content).status_code == 400
+
+
+def test_unencrypted_file_unlocks_unchanged(client, pdf):
+    response = unlock(client, pdf, "")
+    assert response.status_code == 200
+    assert response.content == pdf
@@ -0,0 +1,58 @@
+import csv
+import io
+
+import fitz
+import openpyxl
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+CELLS = [["Name", "Value"], ["=1+1", "-5"], ["+cmd", "@SUM(A1)"], ["-x", "plain"]]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def table_pdf():
+    pdf_document = fitz.open()
+    page = pdf_document.new_page()
+    left, top, width, height = 72, 72, 150, 24
+    for row_index, row in enumerate(CELLS):
+        for column_index, text in enumerate(row):
+            rect = fitz.Rect(left + column_index * width, top + row_index * height,
+                             left + (column_index + 1) * width, top + (row_index + 1) * height)
+            page.draw_rect(rect, color=(0, 0, 0), width=0.8)
+            page.insert_text((rect.x0 + 4, rect.y1 - 7), text, fontsize=10)
+    return pdf_document.tobytes()
+
+
+def convert(client, content, format):
+    response = client.post(
+        f"/api/pdf/to-excel?format={format}",
+        files={"file": ("table.pdf", content, "application/pdf")},
+    )
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_csv_keeps_formula_text_inert(client, table_pdf):
+    rows = list(csv.reader(io.StringIO(convert(client, table_pdf, "csv").text)))
+    assert [row[2:] for row in rows] == [
+        ["Name", "Value"], ["'=1+1", "-5"], ["'+cmd", "'@SUM(A1)"], ["'-x", "plain"]
+    ]
+    assert all(row[:2] == ["1", "1"] for row in rows)
+
+
+def test_xlsx_stores_formula_text_as_strings(client, table_pdf):
+    workbook = openpyxl.load_workbook(io.BytesIO(convert(client, table_pdf, "xlsx").content))
+    cells = {cell.value: cell.data_type for row in workbook["Tables"].iter_rows() for cell in row if cell.value}
+    assert cells["=1+1"] == "s"
+    assert cells["@SUM(A1)"] == "s"
+
+
+def test_plain_numbers_are_not_escaped():
+    assert main.csv_row(["-5", "+3.25", "-x", 7]) == ["-5", "+3.25", "'-x", 7]
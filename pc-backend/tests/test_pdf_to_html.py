@@ -0,0 +1,94 @@
+import os
+import re
+import time
+from types import SimpleNamespace
+
+import fitz
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(autouse=True)
+def document_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "PDF_HTML_DOCUMENT_DIR", tmp_path / "documents")
+    return tmp_path / "documents"
+
+
+@pytest.fixture(scope="module")
+def pdf():
+    pdf_document = fitz.open()
+    for index in range(4):
+        pdf_document.new_page().insert_text((72, 72), f"Chapter {index + 1}")
+    return pdf_document.tobytes()
+
+
+def to_html(client, pdf, **form):
+    return client.post("/api/pdf/to-html", files={"file": ("book.pdf", pdf, "application/pdf")}, data=form)
+
+
+def page_numbers(html):
+    return [int(number) for number in re.findall(r'data-page="(\d+)"', html)]
+
+
+@pytest.mark.parametrize("pages_per_job", [16, 1])
+def test_streamed_html_keeps_page_order(client, pdf, monkeypatch, pages_per_job):
+    monkeypatch.setattr(main, "PDF_HTML_PAGES_PER_JOB", pages_per_job)
+    response = to_html(client, pdf, stream="true")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    assert re.fullmatch(r"[0-9a-f]{32}", response.headers["x-document-id"])
+    html = response.text
+    assert html.startswith("<!DOCTYPE html>")
+    assert page_numbers(html) == [1, 2, 3, 4]
+    assert all(f"Chapter {number}" in html for number in range(1, 5))
+    assert re.search(r"</html>\n<!-- pages: 4, elements: \d+, processing_time: [\d.]+s -->\n$", html)
+
+
+def test_json_result_matches_stream(client, pdf):
+    result = to_html(client, pdf, output_format="content-only").json()
+    assert result["pages_processed"] == 4
+    assert page_numbers(result["html_content"]) == [1, 2, 3, 4]
+    assert not result["html_content"].startswith("<!DOCTYPE")
+    assert result["output_size"] == len(result["html_content"].encode("utf-8"))
+
+
+def test_stored_document_is_served_by_page(client, pdf):
+    document_id = to_html(client, pdf).json()["document_id"]
+    response = client.get(f"/api/pdf/to-html/{document_id}/3")
+    assert response.status_code == 200
+    assert page_numbers(response.text) == [3]
+    assert "Chapter 3" in response.text
+    assert response.headers["x-page-count"] == "4"
+    assert client.get(f"/api/pdf/to-html/{document_id}/5").status_code == 404
+    assert client.get("/api/pdf/to-html/not-an-id/1").status_code == 404
+
+
+def test_documents_are_private_to_their_owner(pdf):
+    owner, other = SimpleNamespace(id="owner"), SimpleNamespace(id="other")
+    document_id = main.store_html_document(pdf, owner)
+    assert main.html_document_path(document_id, owner).read_bytes() == pdf
+    for user in (other, None):
+        with pytest.raises(HTTPException) as error:
+            main.html_document_path(document_id, user)
+        assert error.value.status_code == 404
+    # Anonymous uploads are served to whoever holds the id
+    anonymous_id = main.store_html_document(pdf)
+    assert main.html_document_path(anonymous_id, other).exists()
+
+
+def test_documents_expire(pdf, document_dir):
+    document_id = main.store_html_document(pdf)
+    past = time.time() - main.PDF_HTML_DOCUMENT_TTL - 1
+    for stored in document_dir.glob(f"{document_id}.*"):
+        os.utime(stored, (past, past))
+    with pytest.raises(HTTPException):
+        main.html_document_path(document_id)
+    assert not list(document_dir.glob(f"{document_id}.*"))
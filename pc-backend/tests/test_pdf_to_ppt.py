@@ -0,0 +1,61 @@
+import io
+import zipfile
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+import main
+import pdf_workers
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    logo = io.BytesIO()
+    Image.new("RGB", (64, 32), (200, 30, 30)).save(logo, format="PNG")
+    pdf_document = fitz.open()
+    logo_xref = 0
+    for index in range(5):
+        page = pdf_document.new_page()
+        page.insert_text((72, 72), f"Slide text {index + 1}")
+        # The same logo on every page is stored once in the PDF
+        logo_xref = page.insert_image(fitz.Rect(400, 20, 464, 52), stream=logo.getvalue(), xref=logo_xref)
+    path = tmp_path / "deck.pdf"
+    pdf_document.save(path)
+    return path
+
+
+def to_ppt(client, pdf):
+    response = client.post("/api/pdf/to-ppt", files={"file": ("deck.pdf", pdf.read_bytes(), "application/pdf")})
+    assert response.status_code == 200, response.text
+    return response.content
+
+
+def test_repeated_image_is_extracted_once(pdf):
+    pages, images = pdf_workers.prepare_slide_pages(str(pdf), list(range(5)))
+    assert len(images) == 1
+    assert [xrefs for _, _, xrefs in pages] == [list(images)] * 5
+    assert [spans[0][0] for _, spans, _ in pages] == [f"Slide text {index}" for index in range(1, 6)]
+
+
+@pytest.mark.parametrize("pages_per_job", [16, 2])
+def test_slides_follow_page_order(client, pdf, monkeypatch, pages_per_job):
+    monkeypatch.setattr(main, "PDF_SLIDE_PAGES_PER_JOB", pages_per_job)
+    content = to_ppt(client, pdf)
+    slides = list(Presentation(io.BytesIO(content)).slides)
+    assert len(slides) == 5
+    for index, slide in enumerate(slides[1:], start=2):
+        text = "\n".join(shape.text_frame.text for shape in slide.shapes if shape.has_text_frame)
+        assert f"Page {index}" in text and f"Slide text {index}" in text
+    assert all(any(shape.shape_type == MSO_SHAPE_TYPE.PICTURE for shape in slide.shapes) for slide in slides)
+    # Every slide shows the logo, but the package holds one copy
+    with zipfile.ZipFile(io.BytesIO(content)) as package:
+        assert len([name for name in package.namelist() if name.startswith("ppt/media/")]) == 1
@@ -0,0 +1,61 @@
+import io
+
+import docx
+import fitz
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="module")
+def pdf():
+    pdf_document = fitz.open()
+    for index in range(6):
+        pdf_document.new_page().insert_text((72, 72), f"Section {index + 1} body text")
+    return pdf_document.tobytes()
+
+
+def paragraphs(response):
+    assert response.status_code == 200, response.text
+    document = docx.Document(io.BytesIO(response.content))
+    return [paragraph.text for paragraph in document.paragraphs if paragraph.text.startswith("Section")]
+
+
+def to_word(client, pdf, query=""):
+    return client.post(f"/api/pdf/to-word{query}", files={"file": ("doc.pdf", pdf, "application/pdf")})
+
+
+def test_page_selection():
+    assert main.parse_page_selection(10, "1,3,5-7") == [0, 2, 4, 5, 6]
+    assert main.parse_page_selection(10, start=9) == [8, 9]
+    assert main.parse_page_selection(3) == [0, 1, 2]
+    for pages in ("0", "4-12", "two"):
+        with pytest.raises(HTTPException):
+            main.parse_page_selection(10, pages)
+
+
+def test_pages_split_into_contiguous_runs():
+    assert main.split_pages(list(range(10)), 4, 3) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    assert main.split_pages(list(range(5)), 4, 8) == [[0, 1, 2, 3, 4]]
+
+
+def test_only_the_selected_pages_are_converted(client, pdf):
+    assert paragraphs(to_word(client, pdf, "?pages=2,4-5")) == [
+        "Section 2 body text", "Section 4 body text", "Section 5 body text"
+    ]
+
+
+def test_parallel_chunks_keep_page_order(client, pdf, monkeypatch):
+    monkeypatch.setattr(main, "PDF_TO_WORD_PAGES_PER_PROCESS", 2)
+    monkeypatch.setattr(main, "PDF_WORKER_PROCESSES", 3)
+    split_pages, chunks = main.split_pages, []
+    monkeypatch.setattr(main, "split_pages", lambda *args: chunks.append(split_pages(*args)) or chunks[-1])
+    assert paragraphs(to_word(client, pdf)) == [f"Section {index} body text" for index in range(1, 7)]
+    assert chunks == [[[0, 1], [2, 3], [4, 5]]]
@@ -0,0 +1,57 @@
+import pii_scanner
+
+ALL_DETECTORS = tuple(pii_scanner.DETECTORS)
+
+
+def scan(text, detectors=ALL_DETECTORS):
+    return pii_scanner.PIIScanner(detectors).scan(text)
+
+
+def test_rejected_card_candidate_falls_back_to_phone():
+    matches, rejected = scan("Tel 555-123-4567 1234")
+    assert [(detector, text) for detector, text, _, _ in matches] == [("phone", "555-123-4567")]
+    assert rejected == 1
+
+
+def test_ssn_wins_over_card_digit_run():
+    matches, _ = scan("SSN 123-45-6789 1985")
+    assert [(detector, text) for detector, text, _, _ in matches] == [("ssn", "123-45-6789")]
+
+
+def test_same_results_for_all_and_explicit_detectors():
+    text = "Call 555-123-4567 1234 or mail jane@example.com, SSN 123-45-6789 1985"
+    explicit, _ = scan(text, ("email", "ssn", "phone"))
+    everything, _ = scan(text)
+    assert [match[1] for match in explicit] == [match[1] for match in everything]
+
+
+def test_validators_drop_bad_checksums():
+    assert scan("card 4111 1111 1111 1111")[0][0][:2] == ("credit_card", "4111 1111 1111 1111")
+    assert scan("card 4111 1111 1111 1112") == ([], 1)
+    assert scan("IBAN GB82 WEST 1234 5698 7654 32")[0][0][0] == "iban"
+    assert scan("SSN 000-12-3456") == ([], 1)
+
+
+def test_keywords_are_case_insensitive():
+    matches, _ = pii_scanner.PIIScanner(keywords=("Project X",)).scan("notes on project x and PROJECT X.")
+    assert [text for _, text, _, _ in matches] == ["project x", "PROJECT X"]
+
+
+def test_custom_pattern_keeps_its_own_backreferences():
+    matches, _ = pii_scanner.PIIScanner(("email",), r"\b(\w)\1\w*").scan("see jane@example.com about aardvark")
+    assert [(detector, text) for detector, text, _, _ in matches] == [
+        ("email", "jane@example.com"), ("custom", "aardvark")
+    ]
+
+
+def test_custom_pattern_may_start_with_global_flags():
+    scanner = pii_scanner.PIIScanner(ALL_DETECTORS, r"(?i)secret")
+    matches, _ = scanner.scan("SSN 123-45-6789 marked Secret")
+    assert [(detector, text) for detector, text, _, _ in matches] == [("ssn", "123-45-6789"), ("custom", "Secret")]
+    matches, _ = pii_scanner.PIIScanner((), r"(?x) code \s* - \s* \d+").scan("ref CODE - 42")
+    assert [text for _, text, _, _ in matches] == ["CODE - 42"]
+
+
+def test_detectors_keep_text_a_custom_match_overlaps():
+    matches, _ = pii_scanner.PIIScanner(("email",), r"\w+@").scan("mail jane@example.com")
+    assert [detector for detector, _, _, _ in matches] == ["email"]
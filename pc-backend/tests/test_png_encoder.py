@@ -0,0 +1,50 @@
+import io
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+import main
+
+
+def graphic():
+    image = Image.new("RGB", (400, 300), "white")
+    draw = ImageDraw.Draw(image)
+    for index, color in enumerate(["red", "navy", "orange", "green"]):
+        draw.rectangle((20 + index * 90, 40, 90 + index * 90, 260), fill=color)
+    return image
+
+
+def decoded(data):
+    return Image.open(io.BytesIO(data))
+
+
+def test_flat_graphics_become_lossless_palette_pngs():
+    image = graphic()
+    data = main.encode_png(image)
+    result = decoded(data)
+    assert result.mode == "P"
+    assert np.array_equal(np.asarray(result.convert("RGB")), np.asarray(image))
+    plain = io.BytesIO()
+    image.save(plain, "PNG")
+    assert len(data) < len(plain.getvalue())
+
+
+def test_photos_stay_truecolor():
+    noise = np.random.default_rng(2).integers(0, 256, (200, 200, 3), dtype=np.uint8)
+    result = decoded(main.encode_png(Image.fromarray(noise, "RGB")))
+    assert result.mode == "RGB"
+    assert np.array_equal(np.asarray(result), noise)
+
+
+def test_palette_trial_is_skipped_for_strip_processed_images(monkeypatch):
+    monkeypatch.setattr(main, "TILED_PROCESSING_PIXELS", 1000)
+    assert decoded(main.encode_png(graphic())).mode == "RGB"
+
+
+def test_transparency_survives_quantization():
+    image = graphic().convert("RGBA")
+    image.putalpha(0)
+    ImageDraw.Draw(image).rectangle((100, 100, 200, 200), fill=(255, 0, 0, 255))
+    result = decoded(main.encode_png(image)).convert("RGBA")
+    assert result.getpixel((10, 10))[3] == 0
+    assert result.getpixel((150, 150)) == (255, 0, 0, 255)
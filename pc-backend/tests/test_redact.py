@@ -0,0 +1,75 @@
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+LINES = [
+    "Tel 555-123-4567 1234",
+    "SSN 123-45-6789 1985",
+    "Mail jane.doe@example.com about Project Falcon",
+    "Order 4711 ships on Monday",
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    # No context manager: the startup hooks (database, converter pools) are not needed here
+    return TestClient(main.app)
+
+
+def make_pdf(pages=3):
+    pdf_document = fitz.open()
+    for _ in range(pages):
+        page = pdf_document.new_page()
+        for index, line in enumerate(LINES):
+            page.insert_text((72, 72 + index * 24), line, fontsize=11)
+    return pdf_document.tobytes()
+
+
+def redact(client, **form):
+    response = client.post("/api/pdf/redact", files={"file": ("report.pdf", make_pdf(), "application/pdf")}, data=form)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def redacted_text(response):
+    with fitz.open(stream=response.content, filetype="pdf") as pdf_document:
+        return "\n".join(page.get_text() for page in pdf_document)
+
+
+@pytest.mark.parametrize("pattern_types", ["all", "email,ssn,phone"])
+def test_patterns_are_removed_from_text(client, pattern_types):
+    response = redact(client, pattern_types=pattern_types)
+    text = redacted_text(response)
+    for secret in ("555-123-4567", "123-45-6789", "jane.doe@example.com"):
+        assert secret not in text
+    assert "Order 4711 ships on Monday" in text
+    assert response.headers["X-Redacted-Pages"] == "3"
+
+
+def test_search_terms_are_removed_from_text(client):
+    text = redacted_text(redact(client, search_terms='["project falcon"]'))
+    assert "Falcon" not in text
+    assert "Tel 555-123-4567 1234" in text
+
+
+@pytest.mark.parametrize("custom_pattern", [r"(?i)monday", r"(M)(o)nday|(\w)\3{3}"])
+def test_custom_pattern_is_compiled_on_its_own(client, custom_pattern):
+    text = redacted_text(redact(client, pattern_types="email,custom", custom_pattern=custom_pattern))
+    assert "Monday" not in text
+    assert "jane.doe@example.com" not in text
+    assert "Order 4711 ships on" in text
+
+
+def test_dry_run_reports_without_redacting(client):
+    response = client.post(
+        "/api/pdf/redact",
+        files={"file": ("report.pdf", make_pdf(), "application/pdf")},
+        data={"pattern_types": "all", "dry_run": "true"},
+    )
+    assert response.status_code == 200
+    report = response.json()
+    assert report["pages_affected"] == [1, 2, 3]
+    assert report["match_counts"]["phone"] == 3
+    assert report["match_counts"]["ssn"] == 3
@@ -0,0 +1,73 @@
+import os
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def text_pdf(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "INCREMENTAL_SAVE_MIN_BYTES", 0)
+    pdf_document = fitz.open()
+    for index in range(200):
+        pdf_document.new_page().insert_text((72, 72), f"page {index}")
+    path = tmp_path / "source.pdf"
+    pdf_document.save(path)
+    return str(path), str(tmp_path / "target.pdf")
+
+
+def test_small_edit_is_appended(text_pdf):
+    source, target = text_pdf
+    original = open(source, "rb").read()
+    with fitz.open(source) as pdf_document:
+        pdf_document[0].insert_text((100, 100), "signed")
+        output, mode, written = main.save_pdf_edit(pdf_document, source, target)
+    assert (output, mode) == (source, "incremental")
+    data = open(source, "rb").read()
+    assert data.startswith(original) and len(data) - len(original) == written
+    assert not os.path.exists(target)
+
+
+def test_edit_of_every_page_is_written_once_in_full(text_pdf):
+    source, target = text_pdf
+    original = open(source, "rb").read()
+    with fitz.open(source) as pdf_document:
+        main.watermark_pdf_pages(pdf_document, {"text": "DRAFT"})
+        output, mode, written = main.save_pdf_edit(pdf_document, source, target)
+    assert (output, mode) == (target, "full")
+    assert open(source, "rb").read() == original
+    assert written == os.path.getsize(target)
+
+
+def test_incremental_save_keeps_the_encryption(text_pdf):
+    source, target = text_pdf
+    with fitz.open(source) as pdf_document:
+        pdf_document.save(target, encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw="owner", user_pw="")
+    os.replace(target, source)
+    output, mode, _, _ = main.edit_pdf_file(source, target, main.rotate_pdf_pages, 90)
+    assert (output, mode) == (source, "incremental")
+    with fitz.open(source) as pdf_document:
+        assert "AES" in pdf_document.metadata["encryption"]
+        assert pdf_document[0].rotation == 90
+
+
+@pytest.mark.parametrize("path, form, check", [
+    ("/api/pdf/rotate", {"rotation": "180"}, lambda page: page.rotation == 180),
+    ("/api/pdf/watermark", {"settings": '{"text": "DRAFT"}'}, lambda page: "DRAFT" in page.get_text()),
+    ("/api/pdf/add-page-numbers", {"settings": "{}"}, lambda page: str(page.number + 1) in page.get_text().split()),
+    ("/api/pdf/sign", {"settings": '{"page": "all"}'}, lambda page: "SIGNED" in page.get_text()),
+])
+def test_edit_endpoints_report_how_they_saved(path, form, check):
+    pdf_document = fitz.open()
+    for index in range(3):
+        pdf_document.new_page().insert_text((72, 72), f"page {index}")
+    response = TestClient(main.app).post(
+        path, files={"file": ("doc.pdf", pdf_document.tobytes(), "application/pdf")}, data=form
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["X-Save-Mode"] == "full"
+    assert int(response.headers["X-Bytes-Written"]) == len(response.content)
+    with fitz.open(stream=response.content, filetype="pdf") as edited:
+        assert all(check(page) for page in edited)
@@ -0,0 +1,77 @@
+import io
+import json
+
+import fitz
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image, ImageDraw
+
+import main
+
+
+def text_page(width=600, height=800):
+    page = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    for y in range(60, height - 60, 30):
+        draw.rectangle((50, y, width - 50, y + 8), fill=0)
+    return page
+
+
+def png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def photographed_page():
+    photo = Image.new("RGB", (1000, 1200), (60, 50, 40))
+    photo.paste(text_page().convert("RGB"), (200, 200))
+    return png(photo)
+
+
+@pytest.fixture(scope="module")
+def color_photo():
+    return png(Image.fromarray(np.random.default_rng(0).integers(0, 256, (400, 300, 3), dtype=np.uint8)))
+
+
+def test_skew_is_measured_from_text_lines():
+    page = text_page()
+    assert main.estimate_skew(np.asarray(page)) == 0.0
+    assert main.estimate_skew(np.asarray(page.rotate(3, fillcolor=255, resample=Image.Resampling.BILINEAR))) == -3.0
+
+
+def test_page_is_cropped_from_the_photo_and_stored_as_g4(photographed_page):
+    kind, width, height, _ = main.prepare_scan_page(photographed_page, "high", "auto", "auto", True, True)
+    assert kind == "g4"
+    assert abs(width - 600) <= 4 and abs(height - 800) <= 4
+
+
+def test_colour_photos_stay_jpeg(color_photo):
+    kind, width, height, data = main.prepare_scan_page(color_photo, "high", "auto", "auto", True, True)
+    assert (kind, width, height) == ("jpeg", 300, 400)
+    assert Image.open(io.BytesIO(data)).format == "JPEG"
+
+
+def test_pages_follow_upload_order_on_the_paper_size(photographed_page, color_photo):
+    response = TestClient(main.app).post(
+        "/api/convert/scan-to-pdf",
+        files=[("files", ("a.png", photographed_page, "image/png")), ("files", ("b.png", color_photo, "image/png"))],
+        data={"settings": json.dumps({"paperSize": "letter", "orientation": "landscape"})},
+    )
+    assert response.status_code == 200, response.text
+    with fitz.open(stream=response.content, filetype="pdf") as pdf_document:
+        assert [tuple(page.rect)[2:] for page in pdf_document] == [(792, 612), (792, 612)]
+        assert "CCITTFaxDecode" in pdf_document.xref_object(pdf_document[0].get_images()[0][0])
+        assert pdf_document[1].get_images()[0][8] == "DCTDecode"
+
+
+@pytest.mark.parametrize("settings", [{"quality": "ultra"}, {"paperSize": "b5"}, {"colorMode": "sepia"}])
+def test_bad_settings_are_rejected(color_photo, settings):
+    response = TestClient(main.app).post(
+        "/api/convert/scan-to-pdf",
+        files=[("files", ("b.png", color_photo, "image/png"))],
+        data={"settings": json.dumps(settings)},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+import main
+
+
+def changed_box(before, after):
+    pixels = (np.asarray(image).reshape(before.height, before.width, -1) for image in (before, after))
+    rows, columns = np.nonzero(np.any(next(pixels) != next(pixels), axis=-1))
+    return columns.min(), rows.min(), columns.max() + 1, rows.max() + 1
+
+
+def test_single_mark_only_touches_its_corner():
+    image = Image.new("RGB", (600, 400), (0, 0, 128))
+    marked = main.watermark_pil_image(image.copy(), "PROOF", "bottom-right", opacity=0.8)
+    left, top, right, bottom = changed_box(image, marked)
+    assert left > 300 and top > 200
+    assert right <= 600 - 20 and bottom <= 400 - 20
+
+
+def test_tile_covers_the_whole_image():
+    image = Image.new("L", (400, 300), 0)
+    marked = main.watermark_pil_image(image.copy(), "PROOF", pattern="tile")
+    left, top, right, bottom = changed_box(image, marked)
+    assert left < 40 and top < 40 and right > 360 and bottom > 260
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "LA"])
+def test_transparency_is_unchanged(mode):
+    image = Image.new(mode, (300, 200), (10, 0) if mode == "LA" else (10, 10, 10, 0))
+    marked = main.watermark_pil_image(image.copy(), "PROOF", "center", opacity=1.0)
+    assert marked.mode == mode
+    if mode == "LA":
+        assert marked.getchannel("A").getextrema() == (0, 0)
+    else:
+        assert marked.getchannel("A").getextrema()[1] > 0  # "over" adds the mark's own coverage
+
+
+def test_font_size_must_fit_the_image():
+    image = Image.new("RGB", (200, 100))
+    with pytest.raises(HTTPException) as error:
+        main.watermark_pil_image(image, "PROOF", font_size=5000)
+    assert error.value.status_code == 400
+
+
+def test_fonts_are_loaded_once_per_size():
+    main.load_font.cache_clear()
+    main.load_font(main.DEFAULT_WATERMARK_FONT, 24)
+    main.load_font(main.DEFAULT_WATERMARK_FONT, 24)
+    assert main.load_font.cache_info().hits == 1